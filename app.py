@@ -1,10 +1,13 @@
 from flask import Flask, render_template
-from routes.dashboard_routes import dashboard_bp
+from routes.registry import register_routes
+from services.snapshot_service import start_snapshots
 
 
 def create_app():
     app = Flask(__name__)
-    app.register_blueprint(dashboard_bp)
+    register_routes(app)
+
+    start_snapshots()
 
     @app.route("/")
     def index():
@@ -0,0 +1,30 @@
+"""
+ASGI 模式啟動（async 路由，見 routes/async_dashboard_routes.py）：
+
+    hypercorn asgi:app --bind 0.0.0.0:5000
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+DB / pandas 仍在 thread pool 執行，但等待中的連線（SSE、慢速 client）不占用 thread。
+"""
+from quart import Quart, render_template
+
+from routes.registry import register_routes
+from services.snapshot_service import start_snapshots
+
+
+def create_asgi_app():
+    app = Quart(__name__)
+    register_routes(app, asgi=True)
+
+    @app.before_serving
+    async def start_snapshot_refresh():
+        start_snapshots()
+
+    @app.route("/")
+    async def index():
+        return await render_template("index.html")
+
+    return app
+
+
+app = create_asgi_app()
@@ -0,0 +1,76 @@
+"""
+比較 order history 的各種取數路徑（需要可連線的 PostgreSQL）：
+
+    python -m benchmarks.fetch_paths --repeat 5 --lookback-days 365
+"""
+import argparse
+import json
+import statistics
+import time
+
+import pandas as pd
+
+import repositories.transaction_repository as transaction_repository
+from db.postgres import get_pg_conn
+from repositories.transaction_repository import get_order_history_df
+
+
+FETCH_MODES = ("read_sql", "stream", "copy_csv", "copy_binary")
+
+
+def fetch_read_sql(pg_conn):
+    # 舊的路徑：pd.read_sql + pd.to_numeric 重新轉型
+    df = pd.read_sql(transaction_repository._order_history_sql(), pg_conn)
+    df["order_date"] = pd.to_datetime(df["order_date"])
+    df["product_id"] = pd.to_numeric(df["product_id"], errors="coerce")
+    df["qty"] = pd.to_numeric(df["qty"], errors="coerce")
+    return df
+
+
+def run_mode(pg_conn, mode):
+    started = time.perf_counter()
+    if mode == "read_sql":
+        df = fetch_read_sql(pg_conn)
+    else:
+        df = get_order_history_df(pg_conn, fetch_mode=mode)
+    elapsed = time.perf_counter() - started
+    pg_conn.rollback()
+    return elapsed, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order history fetch paths")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lookback-days", type=int, default=None)
+    parser.add_argument("--modes", nargs="+", default=list(FETCH_MODES), choices=FETCH_MODES)
+    args = parser.parse_args()
+
+    if args.lookback_days is not None:
+        transaction_repository.LOOKBACK_DAYS = args.lookback_days
+
+    pg_conn = get_pg_conn()
+    results = {}
+
+    try:
+        for mode in args.modes:
+            run_mode(pg_conn, mode)  # warm-up
+            timings = []
+            rows = 0
+            for _ in range(args.repeat):
+                elapsed, rows = run_mode(pg_conn, mode)
+                timings.append(elapsed)
+
+            results[mode] = {
+                "rows": rows,
+                "median_seconds": round(statistics.median(timings), 6),
+                "min_seconds": round(min(timings), 6),
+                "max_seconds": round(max(timings), 6),
+            }
+    finally:
+        pg_conn.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
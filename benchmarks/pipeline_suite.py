@@ -0,0 +1,172 @@
+"""
+以合成資料集（benchmarks/synthetic.py）量測主要運算在各規模下的耗時，不需要資料庫：
+
+    python -m benchmarks.pipeline_suite --tiers small medium --repeat 3 --output results.json
+    python -m benchmarks.pipeline_suite --baseline results.json   # 與上一版比較，變慢超過門檻時 exit 1
+
+full_pipeline 從與 repository 相同格式的 DataFrame 開始：逐批健康度 / 訂單彙總 + 完整 stage DAG（不使用 memo）。
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SCALE_TIERS, dashboard_sources, generate_dataset
+from config.settings import DEFAULT_LEADTIME_DAYS, FORECAST_DAYS, LOOKBACK_DAYS
+from repositories.erp_repository import clean_bom_df, clean_incoming_df, clean_parts_df
+from services.dashboard_service import (
+    DASHBOARD_PIPELINE,
+    bom_explode_stage,
+    build_mrp_input,
+    load_bom_stage,
+    load_parts_stage,
+)
+from services.forecast_service import accumulate_order_history, build_complete_history, build_forecast
+from services.health_service import compute_health_score
+from services.mrp_service import simulate_inventory_and_mrp
+from services.pipeline import Pipeline
+
+
+BENCHMARKS = ("compute_health_score", "build_complete_history", "build_forecast", "simulate_inventory_and_mrp", "full_pipeline")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _time(func, repeat):
+    func()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "median_seconds": round(statistics.median(timings), 6),
+        "min_seconds": round(min(timings), 6),
+        "max_seconds": round(max(timings), 6),
+    }
+
+
+def _full_pipeline(dataset):
+    # 每次都用新的 Pipeline，量到的是完整重算而不是 memo 命中
+    pipeline = Pipeline(DASHBOARD_PIPELINE.stages.values(), DASHBOARD_PIPELINE.volatile_sources)
+    return pipeline.run(["format", "capacity"], dashboard_sources(dataset))
+
+
+def run_tier(params, repeat, seed, benchmarks):
+    dataset = generate_dataset(**params, seed=seed)
+    bom = clean_bom_df(dataset["bom"])
+    parts = clean_parts_df(dataset["parts"])
+    incoming = clean_incoming_df(dataset["incoming"])
+
+    # 各函式的輸入先準備好，只量函式本身
+    history = accumulate_order_history([dataset["orders"]])
+    hist_full = build_complete_history(history, LOOKBACK_DAYS)
+    forecast_df = build_forecast(hist_full, FORECAST_DAYS)
+    sim_input = build_mrp_input(
+        bom_explode_stage(forecast_df, load_bom_stage(bom)),
+        load_parts_stage(parts, incoming),
+    )
+
+    cases = {
+        "compute_health_score": lambda: compute_health_score(dataset["iot"]),
+        "build_complete_history": lambda: build_complete_history(history, LOOKBACK_DAYS),
+        "build_forecast": lambda: build_forecast(hist_full, FORECAST_DAYS),
+        "simulate_inventory_and_mrp": lambda: simulate_inventory_and_mrp(sim_input, DEFAULT_LEADTIME_DAYS),
+        "full_pipeline": lambda: _full_pipeline(dataset),
+    }
+
+    return {
+        "params": params,
+        "rows": {
+            **{name: len(df) for name, df in dataset.items()},
+            "history_full": len(hist_full),
+            "forecast": len(forecast_df),
+            "mrp_input": len(sim_input),
+        },
+        "timings": {name: _time(cases[name], repeat) for name in benchmarks},
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    回傳 [(tier, benchmark, 基準秒數, 本次秒數, 倍數)]，只列出 median 變慢超過 threshold 倍的項目。
+    """
+    regressions = []
+    for tier, result in results["tiers"].items():
+        base_tier = baseline.get("tiers", {}).get(tier)
+        if base_tier is None or base_tier["params"] != result["params"]:
+            continue
+
+        for name, timing in result["timings"].items():
+            base = base_tier["timings"].get(name)
+            if base is None or not base["median_seconds"]:
+                continue
+            ratio = timing["median_seconds"] / base["median_seconds"]
+            if ratio > threshold:
+                regressions.append((tier, name, base["median_seconds"], timing["median_seconds"], round(ratio, 3)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard computations on synthetic datasets")
+    parser.add_argument("--tiers", nargs="+", default=["small", "medium"], choices=list(SCALE_TIERS))
+    parser.add_argument("--benchmarks", nargs="+", default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "tiers": {},
+    }
+
+    for tier in args.tiers:
+        print(f"⏱️ Running tier '{tier}'...", file=sys.stderr, flush=True)
+        results["tiers"][tier] = run_tier(SCALE_TIERS[tier], args.repeat, args.seed, args.benchmarks)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.threshold)
+        for tier, name, before, after, ratio in regressions:
+            print(f"⚠️ {tier}/{name}: {before}s -> {after}s ({ratio}x)", file=sys.stderr, flush=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""
+合成資料集：依規模參數產生與 repository 回傳格式相同的 DataFrame（不需要資料庫）。
+
+    dataset = generate_dataset(**SCALE_TIERS["medium"], seed=0)
+    dataset["bom"], dataset["parts"], dataset["incoming"], dataset["orders"], dataset["iot"]
+
+也可以寫成 DATA_BACKEND=duckdb 使用的 Parquet 資料表，不需要資料庫就能啟動整個 dashboard：
+
+    python -m benchmarks.synthetic --tier medium --parquet-dir data/parquet
+
+- 日期以今天為基準：訂單落在最近 LOOKBACK_DAYS 天，到貨落在未來 FORECAST_DAYS 天，IoT 落在最近 IOT_LOOKBACK_HOURS 小時
+- 同一個 seed 產生的資料相同（日期除外），可跨版本比較
+"""
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    DUCKDB_DATA_DIR,
+    FETCH_CHUNK_SIZE,
+    FORECAST_DAYS,
+    IOT_LOOKBACK_HOURS,
+    LOOKBACK_DAYS,
+    RPM_TARGET,
+    TEMP_BASE,
+    VIB_BASE,
+)
+from db.embedded import table_path, write_parquet
+from repositories.erp_repository import clean_bom_df, clean_incoming_df, clean_parts_df
+from services.forecast_service import accumulate_order_history
+from services.health_service import summarize_health_chunks
+
+
+# products: 產品數；parts: 零件數；bom_fanout: 每個產品的零件種類數
+# order_lines_per_day: 每天的訂單明細筆數；machines: 設備數；iot_rows_per_machine: 每台設備的讀數筆數
+SCALE_TIERS = {
+    "small": {
+        "products": 20,
+        "parts": 100,
+        "bom_fanout": 8,
+        "order_lines_per_day": 200,
+        "machines": 10,
+        "iot_rows_per_machine": 1440,
+    },
+    "medium": {
+        "products": 200,
+        "parts": 1000,
+        "bom_fanout": 15,
+        "order_lines_per_day": 2000,
+        "machines": 50,
+        "iot_rows_per_machine": 1440,
+    },
+    "large": {
+        "products": 1000,
+        "parts": 5000,
+        "bom_fanout": 25,
+        "order_lines_per_day": 20000,
+        "machines": 200,
+        "iot_rows_per_machine": 2880,
+    },
+}
+
+
+def _part_numbers(parts):
+    return [f"P{i:06d}" for i in range(1, parts + 1)]
+
+
+def generate_bom(rng, products, parts, bom_fanout):
+    """
+    BOM_SCHEMA：每個產品隨機取 bom_fanout 種零件（不重複）。
+    """
+    fanout = min(bom_fanout, parts)
+    part_numbers = np.array(_part_numbers(parts), dtype=object)
+
+    part_index = np.concatenate([rng.choice(parts, size=fanout, replace=False) for _ in range(products)])
+    return pd.DataFrame({
+        "product_id": np.repeat(np.arange(1, products + 1, dtype=np.int64), fanout),
+        "part_no": part_numbers[part_index],
+        "bom_qty": rng.integers(1, 6, size=products * fanout).astype(np.float64),
+    })
+
+
+def generate_parts(rng, parts):
+    """
+    PARTS_SCHEMA：庫存與安全庫存。
+    """
+    safety_qty = rng.integers(10, 200, size=parts).astype(np.float64)
+    return pd.DataFrame({
+        "part_no": _part_numbers(parts),
+        "stock_qty": (safety_qty * rng.uniform(0.0, 3.0, size=parts)).round(),
+        "safety_qty": safety_qty,
+    })
+
+
+def generate_incoming(rng, parts):
+    """
+    INCOMING_SCHEMA：約三成零件在未來 FORECAST_DAYS 天內有一筆到貨。
+    """
+    count = max(1, parts * 3 // 10)
+    today = np.datetime64(date.today(), "D")
+    eta = today + rng.integers(1, FORECAST_DAYS + 1, size=count)
+
+    return pd.DataFrame({
+        "part_no": np.array(_part_numbers(parts), dtype=object)[rng.choice(parts, size=count, replace=False)],
+        "eta_date": eta.astype("datetime64[s]"),
+        "incoming_qty": rng.integers(50, 500, size=count).astype(np.float64),
+    })
+
+
+def generate_orders(rng, products, order_lines_per_day):
+    """
+    ORDER_HISTORY_SCHEMA 的訂單明細：最近 LOOKBACK_DAYS 天，每天 order_lines_per_day 筆，
+    產品依 Zipf 分佈（少數產品占大部分需求），同一天同一產品可有多筆。
+    """
+    total = LOOKBACK_DAYS * order_lines_per_day
+    end = np.datetime64(date.today(), "D") - 1
+    days = end - np.repeat(np.arange(LOOKBACK_DAYS), order_lines_per_day)
+
+    product_id = (rng.zipf(1.3, size=total) - 1) % products + 1
+    return pd.DataFrame({
+        "order_date": days.astype("datetime64[s]"),
+        "product_id": product_id.astype(np.int64),
+        "qty": rng.integers(1, 20, size=total).astype(np.float64),
+    })
+
+
+def generate_iot(rng, machines, iot_rows_per_machine):
+    """
+    IOT_SCHEMA：每台設備在最近 IOT_LOOKBACK_HOURS 小時內等間隔的讀數，依 (machine_id, created_at) 排序。
+    約一成設備偏熱 / 震動偏高，讓健康度有高有低。
+    """
+    total = machines * iot_rows_per_machine
+    machine_ids = [f"M{i:04d}" for i in range(1, machines + 1)]
+
+    now = np.datetime64(pd.Timestamp.now().floor("s"), "s")
+    step = np.timedelta64(int(IOT_LOOKBACK_HOURS * 3600 / iot_rows_per_machine * 1_000_000), "us")
+    offsets = np.tile(np.arange(iot_rows_per_machine, 0, -1), machines)
+
+    degraded = np.repeat(rng.random(machines) < 0.1, iot_rows_per_machine)
+    temperature = rng.normal(TEMP_BASE - 5, 4.0, size=total) + degraded * 15
+    vibration = np.abs(rng.normal(VIB_BASE - 0.01, 0.01, size=total)) + degraded * 0.05
+
+    return pd.DataFrame({
+        "id": np.arange(1, total + 1, dtype=np.int64),
+        "machine_id": pd.Categorical(np.repeat(machine_ids, iot_rows_per_machine)),
+        "temperature": temperature.round(2),
+        "vibration": vibration.round(4),
+        "rpm": rng.normal(RPM_TARGET, 80.0, size=total).round(),
+        "created_at": now.astype("datetime64[us]") - offsets * step,
+    })
+
+
+def generate_dataset(products, parts, bom_fanout, order_lines_per_day, machines, iot_rows_per_machine, seed=0):
+    """
+    回傳 {"bom", "parts", "incoming", "orders", "iot"}，欄位與型別同各 repository 的 *_SCHEMA
+    （bom / parts / incoming 另外經過 clean_*_df 的清理）。
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "bom": generate_bom(rng, products, parts, bom_fanout),
+        "parts": generate_parts(rng, parts),
+        "incoming": generate_incoming(rng, parts),
+        "orders": generate_orders(rng, products, order_lines_per_day),
+        "iot": generate_iot(rng, machines, iot_rows_per_machine),
+    }
+
+
+def iter_chunks(df, chunk_size):
+    """
+    模擬 iter_typed_chunks：逐批回傳獨立的 DataFrame（與逐批讀取一樣各自配置）。
+    """
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size].copy()
+
+
+def dashboard_sources(dataset, chunk_size=FETCH_CHUNK_SIZE):
+    """
+    與 data_loader.load_dashboard_inputs() 的 data 相同的 pipeline 來源（清理、逐批彙總後）。
+    """
+    return {
+        "bom": clean_bom_df(dataset["bom"]),
+        "parts": clean_parts_df(dataset["parts"]),
+        "incoming": clean_incoming_df(dataset["incoming"]),
+        "history": accumulate_order_history(iter_chunks(dataset["orders"], chunk_size)),
+        "iot": summarize_health_chunks(iter_chunks(dataset["iot"], chunk_size)),
+    }
+
+
+def to_tables(dataset):
+    """
+    轉成與 MySQL / PostgreSQL 相同欄位的原始資料表（db.embedded.TABLES）。
+    daily_product_demand 直接放訂單明細，由 DuckDB 查詢時彙總。
+    """
+    bom = dataset["bom"]
+    product_ids = np.sort(bom["product_id"].unique())
+    return {
+        "bom_header": pd.DataFrame({"bom_id": product_ids, "product_code": product_ids.astype(str)}),
+        "bom_detail": pd.DataFrame({
+            "id": np.arange(1, len(bom) + 1, dtype=np.int64),
+            "bom_id": bom["product_id"].to_numpy(),
+            "part_no": bom["part_no"].to_numpy(),
+            "qty": bom["bom_qty"].astype(np.int64).to_numpy(),
+        }),
+        "parts": pd.DataFrame({
+            "part_no": dataset["parts"]["part_no"],
+            "stock_qty": dataset["parts"]["stock_qty"].astype(np.int64),
+            "safety_stock": dataset["parts"]["safety_qty"].astype(np.int64),
+        }),
+        "purchase": pd.DataFrame({
+            "id": np.arange(1, len(dataset["incoming"]) + 1, dtype=np.int64),
+            "part_no": dataset["incoming"]["part_no"].to_numpy(),
+            "delivery_date": dataset["incoming"]["eta_date"].to_numpy(),
+            "order_qty": dataset["incoming"]["incoming_qty"].astype(np.int64).to_numpy(),
+            "status": "pending",
+        }),
+        "machine_data": dataset["iot"].assign(machine_id=dataset["iot"]["machine_id"].astype(str)),
+        "daily_product_demand": dataset["orders"].assign(updated_at=pd.Timestamp.now().floor("s")),
+    }
+
+
+def write_parquet_tables(dataset, data_dir=DUCKDB_DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    tables = to_tables(dataset)
+    write_parquet({table_path(table, data_dir): df for table, df in tables.items()})
+    for table, df in tables.items():
+        print(f"✅ {table}: {len(df)} rows -> {table_path(table, data_dir)}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset as Parquet tables for DATA_BACKEND=duckdb")
+    parser.add_argument("--tier", default="small", choices=list(SCALE_TIERS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parquet-dir", default=DUCKDB_DATA_DIR)
+    args = parser.parse_args()
+
+    write_parquet_tables(generate_dataset(**SCALE_TIERS[args.tier], seed=args.seed), args.parquet_dir)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -27,8 +27,76 @@ MYSQL_USER = os.getenv("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "root")
 MYSQL_DB = os.getenv("MYSQL_DB", "erp")
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_IDLE_SECONDS = int(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+DB_POOL_MAX_LIFETIME_SECONDS = int(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT_SECONDS", "10"))
+DB_POOL_PING_AFTER_IDLE_SECONDS = float(os.getenv("DB_POOL_PING_AFTER_IDLE_SECONDS", "30"))
+# 建立連線的逾時；DB 主機無回應時不會卡住連線池的建立與借用
+DB_CONNECT_TIMEOUT_SECONDS = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10"))
+
+# 資料來源：sql（MySQL + PostgreSQL）/ duckdb（DUCKDB_DATA_DIR 下每個資料表一個 Parquet 檔，不需要資料庫）
+DATA_BACKEND = os.getenv("DATA_BACKEND", "sql")
+DUCKDB_DATA_DIR = os.getenv("DUCKDB_DATA_DIR", "data/parquet")
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "4"))
+
+DATA_LOAD_WORKERS = int(os.getenv("DATA_LOAD_WORKERS", "8"))
+DATA_LOAD_TIMEOUT_SECONDS = float(os.getenv("DATA_LOAD_TIMEOUT_SECONDS", "10"))
+FETCH_CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", "5000"))
+# stream / copy_binary / copy_csv
+ORDER_HISTORY_FETCH_MODE = os.getenv("ORDER_HISTORY_FETCH_MODE", "stream")
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "32"))
+BOM_CACHE_TTL_SECONDS = float(os.getenv("BOM_CACHE_TTL_SECONDS", "300"))
+PARTS_CACHE_TTL_SECONDS = float(os.getenv("PARTS_CACHE_TTL_SECONDS", "60"))
+# 有 watermark 的快取項目最長保留時間（watermark 不變時不重讀）
+WATERMARK_CACHE_MAX_AGE_SECONDS = float(os.getenv("WATERMARK_CACHE_MAX_AGE_SECONDS", "3600"))
+# ERP 全表 checksum 驗證的間隔（補上 trigger 計數抓不到的 TRUNCATE / 直接匯入）
+ERP_CHECKSUM_VERIFY_SECONDS = float(os.getenv("ERP_CHECKSUM_VERIFY_SECONDS", "3600"))
+
+DASHBOARD_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_REFRESH_SECONDS", "2"))
+DASHBOARD_SNAPSHOT_MAX_STALE_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_MAX_STALE_SECONDS", "30"))
+DASHBOARD_SNAPSHOT_IDLE_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_IDLE_SECONDS", "60"))
+# forecast / MRP section 的重算頻率（watermark 不變時重算只需要一次 probe）
+DASHBOARD_PLAN_REFRESH_SECONDS = float(os.getenv("DASHBOARD_PLAN_REFRESH_SECONDS", "30"))
+DASHBOARD_PLAN_MAX_STALE_SECONDS = float(os.getenv("DASHBOARD_PLAN_MAX_STALE_SECONDS", "300"))
+# forecast / MRP 的來源：live（plan snapshot 重算時在 app 內計算）/ runs（讀取排程 planning run 的最新結果）
+DASHBOARD_PLAN_SOURCE = os.getenv("DASHBOARD_PLAN_SOURCE", "live")
+# 排程 planning run（python -m services.planning_run）：輸入沒變時跳過，只保留最近 PLANNING_RUN_KEEP 次
+PLANNING_RUN_INTERVAL_SECONDS = float(os.getenv("PLANNING_RUN_INTERVAL_SECONDS", "300"))
+PLANNING_RUN_KEEP = int(os.getenv("PLANNING_RUN_KEEP", "48"))
+DASHBOARD_SNAPSHOT_BACKGROUND = os.getenv("DASHBOARD_SNAPSHOT_BACKGROUND", "true").lower() == "true"
+
+# 多 worker（gunicorn）部署：設定後由選出的 leader worker 重算 snapshot，經 mmap 檔分享給其他 worker
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR") or None
+SHARED_SNAPSHOT_MAX_BYTES = int(os.getenv("SHARED_SNAPSHOT_MAX_BYTES", str(64 * 1024 * 1024)))
+SHARED_SNAPSHOT_ELECTION_SECONDS = float(os.getenv("SHARED_SNAPSHOT_ELECTION_SECONDS", "5"))
+SHARED_SNAPSHOT_WAIT_SECONDS = float(os.getenv("SHARED_SNAPSHOT_WAIT_SECONDS", "10"))
+
+# API 回應壓縮（gzip / brotli，依 Accept-Encoding 協商）
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# IoT 曲線每台設備最多保留的最新點數（健康度仍以整段 IOT_LOOKBACK_HOURS 計算）；0 代表不保留曲線
+IOT_CHART_MAX_POINTS = int(os.getenv("IOT_CHART_MAX_POINTS", "2000"))
+
+# /api/iot/stream（SSE）：所有連線共用一個 polling thread
+IOT_STREAM_POLL_SECONDS = float(os.getenv("IOT_STREAM_POLL_SECONDS", "1"))
+IOT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("IOT_STREAM_HEARTBEAT_SECONDS", "15"))
+IOT_STREAM_BATCH_LIMIT = int(os.getenv("IOT_STREAM_BATCH_LIMIT", "5000"))
+IOT_STREAM_QUEUE_SIZE = int(os.getenv("IOT_STREAM_QUEUE_SIZE", "100"))
+
+# ASGI 模式（asgi.py）：阻塞的 DB driver / pandas 運算在這個 thread pool 執行，event loop 只負責連線
+ASYNC_EXECUTOR_WORKERS = int(os.getenv("ASYNC_EXECUTOR_WORKERS", "32"))
+
 SIMULATOR_RETRIES = int(os.getenv("SIMULATOR_RETRIES", "20"))
 SIMULATOR_RETRY_DELAY = int(os.getenv("SIMULATOR_RETRY_DELAY", "3"))
 SIMULATOR_SLEEP_SECONDS = int(os.getenv("SIMULATOR_SLEEP_SECONDS", "3"))
 SIMULATOR_CLEANUP_EVERY = int(os.getenv("SIMULATOR_CLEANUP_EVERY", "20"))
-SIMULATOR_CLEANUP_MINUTES = int(os.getenv("SIMULATOR_CLEANUP_MINUTES", "30"))
\ No newline at end of file
+SIMULATOR_CLEANUP_MINUTES = int(os.getenv("SIMULATOR_CLEANUP_MINUTES", "30"))
+SIMULATOR_SEED = int(os.getenv("SIMULATOR_SEED")) if os.getenv("SIMULATOR_SEED") else None
+SIMULATOR_RECORD_PATH = os.getenv("SIMULATOR_RECORD_PATH") or None
+SIMULATOR_REPLAY_BATCH_SIZE = int(os.getenv("SIMULATOR_REPLAY_BATCH_SIZE", "500"))
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+DuckDB（DATA_BACKEND=duckdb）：process 內的分析引擎，直接查詢 DUCKDB_DATA_DIR 下的 Parquet 檔。
+
+每個資料表一個檔（bom_header.parquet、machine_data.parquet ...），各建成一個同名 view，
+查詢 SQL 與 MySQL / PostgreSQL 版本的資料表名稱相同。檔案更新後 view 自動讀到新內容；
+啟動時還不存在的檔案，之後每次取得連線時會再檢查，出現後才建立 view。
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from config.settings import DUCKDB_DATA_DIR, DUCKDB_THREADS
+
+TABLES = (
+    "bom_header",
+    "bom_detail",
+    "parts",
+    "purchase",
+    "machine_data",
+    "daily_product_demand",
+)
+
+_db = None
+# 還沒有 Parquet 檔、尚未建立 view 的資料表
+_missing = set(TABLES)
+_db_lock = threading.Lock()
+
+
+def table_path(table, data_dir=DUCKDB_DATA_DIR):
+    return os.path.join(data_dir, f"{table}.parquet")
+
+
+def _create_views(db):
+    """
+    替已出現的檔案建立 view，回傳仍缺少的資料表；呼叫端需持有 _db_lock。
+    """
+    for table in sorted(_missing):
+        path = table_path(table)
+        if not os.path.exists(path):
+            continue
+        escaped = path.replace("'", "''")
+        db.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{escaped}')")
+        _missing.discard(table)
+    return _missing
+
+
+def get_duckdb():
+    global _db
+
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                try:
+                    import duckdb
+                except ImportError as e:
+                    raise RuntimeError("DATA_BACKEND=duckdb requires the duckdb package") from e
+
+                db = duckdb.connect(database=":memory:", config={"threads": DUCKDB_THREADS})
+                for table in sorted(_create_views(db)):
+                    print(
+                        f"⚠️ DuckDB: {table_path(table)} not found, queries on '{table}' will fail until it exists",
+                        flush=True,
+                    )
+                print(f"✅ DuckDB backend ready ({DUCKDB_DATA_DIR})", flush=True)
+                _db = db
+                return _db
+
+    if _missing:
+        # 只有缺檔時才多幾次 stat；全部建好之後沒有額外成本
+        with _db_lock:
+            _create_views(_db)
+
+    return _db
+
+
+@contextmanager
+def duckdb_connection():
+    """
+    與 mysql_connection() / pg_connection() 相同的用法；每次借用一個獨立的 cursor（可跨 thread 同時查詢）。
+    """
+    cur = get_duckdb().cursor()
+    try:
+        yield cur
+    finally:
+        cur.close()
+
+
+def write_parquet(frames):
+    """
+    frames: {路徑: DataFrame}；以 DuckDB 寫出 Parquet，不需要 pyarrow。
+    """
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("writing Parquet requires the duckdb package") from e
+
+    conn = duckdb.connect()
+    try:
+        for path, df in frames.items():
+            escaped = path.replace("'", "''")
+            conn.register("frame", df)
+            conn.execute(f"COPY (SELECT * FROM frame) TO '{escaped}' (FORMAT PARQUET)")
+            conn.unregister("frame")
+    finally:
+        conn.close()
\ No newline at end of file
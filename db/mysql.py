@@ -1,3 +1,4 @@
+import threading
 import time
 import pymysql
 
@@ -7,7 +8,18 @@ from config.settings import (
     MYSQL_USER,
     MYSQL_PASSWORD,
     MYSQL_DB,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_IDLE_SECONDS,
+    DB_POOL_MAX_LIFETIME_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    DB_POOL_PING_AFTER_IDLE_SECONDS,
+    DB_CONNECT_TIMEOUT_SECONDS,
 )
+from db.pool import ConnectionPool
+
+_pool = None
+_pool_lock = threading.Lock()
 
 
 def get_mysql_conn():
@@ -20,6 +32,7 @@ def get_mysql_conn():
         charset="utf8mb4",
         use_unicode=True,
         init_command="SET NAMES utf8mb4",
+        connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
     )
 
 
@@ -32,6 +45,7 @@ def get_mysql_conn_autocommit():
         database=MYSQL_DB,
         charset="utf8mb4",
         autocommit=True,
+        connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
     )
 
 
@@ -48,4 +62,46 @@ def get_mysql_conn_with_retry(retries=20, delay=3):
             print(f"⏳ MySQL not ready yet ({i + 1}/{retries}): {e}", flush=True)
             time.sleep(delay)
 
-    raise last_error
\ No newline at end of file
+    raise last_error
+
+
+def _ping(conn):
+    conn.ping(reconnect=False)
+
+
+def _reset(conn):
+    # 結束 REPEATABLE READ 快照，避免下一個借用者讀到舊資料
+    conn.rollback()
+
+
+def get_mysql_pool():
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    "mysql",
+                    connect=get_mysql_conn,
+                    health_check=_ping,
+                    reset=_reset,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    max_idle_seconds=DB_POOL_MAX_IDLE_SECONDS,
+                    max_lifetime_seconds=DB_POOL_MAX_LIFETIME_SECONDS,
+                    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+                    ping_after_idle_seconds=DB_POOL_PING_AFTER_IDLE_SECONDS,
+                )
+
+    return _pool
+
+
+def peek_mysql_pool():
+    """
+    已建立的連線池；尚未建立時回傳 None（不會為了查看狀態而建立連線）。
+    """
+    return _pool
+
+
+def mysql_connection():
+    return get_mysql_pool().connection()
@@ -0,0 +1,256 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    執行緒安全的 DB 連線池（不綁定特定 driver）。
+
+    - min_size: 建立時預先開啟、閒置回收時至少保留的連線數
+    - max_size: 同時存在（借出 + 閒置）的連線上限，超過時借用者需等待
+    - max_idle_seconds: 閒置超過此時間的連線會被關閉
+    - max_lifetime_seconds: 建立超過此時間的連線歸還時直接關閉
+    - ping_after_idle_seconds: 借出前若閒置超過此時間，先做 health check
+    """
+
+    def __init__(
+        self,
+        name,
+        connect,
+        health_check,
+        reset,
+        min_size=1,
+        max_size=10,
+        max_idle_seconds=300,
+        max_lifetime_seconds=1800,
+        checkout_timeout=10,
+        ping_after_idle_seconds=30,
+    ):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(f"invalid pool size: min={min_size}, max={max_size}")
+
+        self.name = name
+        self._connect = connect
+        self._health_check = health_check
+        self._reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.checkout_timeout = checkout_timeout
+        self.ping_after_idle_seconds = ping_after_idle_seconds
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = {}
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._closed = 0
+        self._health_check_failures = 0
+
+        self._prefill()
+
+    def _prefill(self):
+        # 預先開好 min_size 條連線，第一批請求不必等待建立連線；DB 尚未就緒時改為用到時才建立
+        for _ in range(self.min_size):
+            try:
+                pooled = _PooledConnection(self._connect())
+            except Exception as e:
+                print(f"⚠️ {self.name} pool: could not pre-open connections ({e}), opening on demand", flush=True)
+                return
+            with self._cond:
+                self._size += 1
+                self._created += 1
+                self._idle.append(pooled)
+
+    def acquire(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            pooled = None
+            create = False
+
+            with self._cond:
+                self._evict_idle()
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"{self.name} pool exhausted ({self.max_size} connections in use) "
+                            f"after waiting {timeout}s"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    self._evict_idle()
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    pooled = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+
+            elif not self._is_alive(pooled):
+                self._discard(pooled)
+                continue
+
+            wait_seconds = time.monotonic() - started
+            with self._cond:
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                self._wait_seconds_total += wait_seconds
+                self._wait_seconds_max = max(self._wait_seconds_max, wait_seconds)
+                self._in_use[id(pooled.conn)] = pooled
+
+            return pooled.conn
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+
+        if pooled is None:
+            raise ValueError(f"connection was not checked out from the {self.name} pool")
+
+        if not discard:
+            try:
+                self._reset(conn)
+            except Exception:
+                discard = True
+
+        expired = time.monotonic() - pooled.created_at > self.max_lifetime_seconds
+        if discard or expired:
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._cond:
+            in_use = len(self._in_use)
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "utilization": round(in_use / self.max_size, 3),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_seconds_total": round(self._wait_seconds_total, 6),
+                "wait_seconds_avg": round(self._wait_seconds_total / self._checkouts, 6) if self._checkouts else 0.0,
+                "wait_seconds_max": round(self._wait_seconds_max, 6),
+                "created": self._created,
+                "closed": self._closed,
+                "health_check_failures": self._health_check_failures,
+            }
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _is_alive(self, pooled):
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_lifetime_seconds:
+            return False
+        if now - pooled.last_used_at < self.ping_after_idle_seconds:
+            return True
+
+        try:
+            self._health_check(pooled.conn)
+            return True
+        except Exception:
+            with self._cond:
+                self._health_check_failures += 1
+            return False
+
+    def _evict_idle(self):
+        # 呼叫端需持有 self._cond
+        now = time.monotonic()
+        keep = deque()
+        evicted = []
+
+        # 最舊的閒置連線在左側
+        while self._idle:
+            pooled = self._idle.popleft()
+            idle_too_long = now - pooled.last_used_at > self.max_idle_seconds
+            too_old = now - pooled.created_at > self.max_lifetime_seconds
+            above_min = self._size - len(evicted) > self.min_size
+
+            if too_old or (idle_too_long and above_min):
+                evicted.append(pooled)
+            else:
+                keep.append(pooled)
+
+        self._idle = keep
+        for pooled in evicted:
+            self._size -= 1
+            self._closed += 1
+            _close_quietly(pooled.conn)
+
+    def _discard(self, pooled):
+        _close_quietly(pooled.conn)
+        with self._cond:
+            self._size -= 1
+            self._closed += 1
+            self._cond.notify()
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -1,3 +1,4 @@
+import threading
 import psycopg2
 
 from config.settings import (
@@ -6,7 +7,18 @@ from config.settings import (
     PG_USER,
     PG_PASSWORD,
     PG_PORT,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_IDLE_SECONDS,
+    DB_POOL_MAX_LIFETIME_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    DB_POOL_PING_AFTER_IDLE_SECONDS,
+    DB_CONNECT_TIMEOUT_SECONDS,
 )
+from db.pool import ConnectionPool
+
+_pool = None
+_pool_lock = threading.Lock()
 
 
 def get_pg_conn():
@@ -16,4 +28,53 @@ def get_pg_conn():
         user=PG_USER,
         password=PG_PASSWORD,
         port=PG_PORT,
-    )
\ No newline at end of file
+        connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
+    )
+
+
+def _ping(conn):
+    if conn.closed:
+        raise psycopg2.InterfaceError("connection already closed")
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+    conn.rollback()
+
+
+def _reset(conn):
+    if conn.closed:
+        raise psycopg2.InterfaceError("connection already closed")
+    conn.rollback()
+
+
+def get_pg_pool():
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    "postgres",
+                    connect=get_pg_conn,
+                    health_check=_ping,
+                    reset=_reset,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    max_idle_seconds=DB_POOL_MAX_IDLE_SECONDS,
+                    max_lifetime_seconds=DB_POOL_MAX_LIFETIME_SECONDS,
+                    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+                    ping_after_idle_seconds=DB_POOL_PING_AFTER_IDLE_SECONDS,
+                )
+
+    return _pool
+
+
+def peek_pg_pool():
+    """
+    已建立的連線池；尚未建立時回傳 None（不會為了查看狀態而建立連線）。
+    """
+    return _pool
+
+
+def pg_connection():
+    return get_pg_pool().connection()
@@ -0,0 +1,35 @@
+"""
+正式環境（多 worker）啟動：
+
+    gunicorn -c gunicorn.conf.py app:app
+
+每個 worker 各自處理請求，但只有選出的 leader worker 向 DB 重算 dashboard snapshot，
+結果經 SHARED_SNAPSHOT_DIR 下的 mmap 檔分享給其他 worker（見 services/shared_snapshot.py）。
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+# SSE（/api/iot/stream）會占住一個 thread，使用 gthread worker
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
+
+# 在 fork 之前設定，所有 worker 都會繼承
+os.environ.setdefault(
+    "SHARED_SNAPSHOT_DIR",
+    "/dev/shm/mrp-snapshots" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "mrp-snapshots"),
+)
+
+
+def on_starting(server):
+    # 清掉上一次執行留下的 snapshot，避免 worker 讀到舊資料
+    directory = os.environ["SHARED_SNAPSHOT_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.snap")):
+        os.remove(path)
@@ -0,0 +1,57 @@
+-- ERP 資料表的變更偵測：每筆資料帶 updated_at（ON UPDATE CURRENT_TIMESTAMP(6)），
+-- watermark probe 讀 COUNT(*) 與 MAX(updated_at)（updated_at 有索引），不必掃描資料本身。
+--
+-- 寫入成本：每次寫入只更新該筆資料自己的 updated_at 與其索引，不會碰到其他資料列，
+-- 並行寫入同一張表不會互相等待；大量 UPDATE 也不需要額外的寫入。
+-- （先前以 FOR EACH ROW trigger 遞增 table_versions 的同一列：每筆異動都多一次 UPDATE，
+--  並行寫入同一張表時全部排隊等那一列的 row lock。本檔會移除那些 trigger。）
+--
+-- 無法偵測的變更：明確指定舊的 updated_at 的寫入、刪除後再新增相同筆數且沿用舊時間的匯入，
+-- 由低頻率的 checksum 驗證補上（ERP_CHECKSUM_VERIFY_SECONDS）。
+--
+-- 新資料庫由 init.sql 直接建立欄位；既有資料庫執行一次 mysql erp < mysql/erp_change_tracking.sql（可重複執行）。
+
+USE erp;
+
+DROP PROCEDURE IF EXISTS add_updated_at;
+
+DELIMITER //
+CREATE PROCEDURE add_updated_at(IN tbl VARCHAR(64))
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = tbl AND column_name = 'updated_at'
+  ) THEN
+    SET @ddl = CONCAT(
+      'ALTER TABLE ', tbl,
+      ' ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),',
+      ' ADD KEY idx_', tbl, '_updated_at (updated_at)'
+    );
+    PREPARE stmt FROM @ddl;
+    EXECUTE stmt;
+    DEALLOCATE PREPARE stmt;
+  END IF;
+END //
+DELIMITER ;
+
+CALL add_updated_at('bom_header');
+CALL add_updated_at('bom_detail');
+CALL add_updated_at('parts');
+CALL add_updated_at('purchase');
+
+DROP PROCEDURE add_updated_at;
+
+-- 移除舊的 table_versions 計數
+DROP TRIGGER IF EXISTS trg_bom_header_version_ins;
+DROP TRIGGER IF EXISTS trg_bom_header_version_upd;
+DROP TRIGGER IF EXISTS trg_bom_header_version_del;
+DROP TRIGGER IF EXISTS trg_bom_detail_version_ins;
+DROP TRIGGER IF EXISTS trg_bom_detail_version_upd;
+DROP TRIGGER IF EXISTS trg_bom_detail_version_del;
+DROP TRIGGER IF EXISTS trg_parts_version_ins;
+DROP TRIGGER IF EXISTS trg_parts_version_upd;
+DROP TRIGGER IF EXISTS trg_parts_version_del;
+DROP TRIGGER IF EXISTS trg_purchase_version_ins;
+DROP TRIGGER IF EXISTS trg_purchase_version_upd;
+DROP TRIGGER IF EXISTS trg_purchase_version_del;
+DROP TABLE IF EXISTS table_versions;
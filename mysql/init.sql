@@ -10,7 +10,10 @@ USE erp;
 -- BOM Header
 CREATE TABLE IF NOT EXISTS bom_header (
   bom_id INT PRIMARY KEY,
-  product_code VARCHAR(20) NOT NULL
+  product_code VARCHAR(20) NOT NULL,
+  -- 每筆資料自己帶異動時間，watermark probe 以 COUNT(*) 與 MAX(updated_at) 偵測變更（見 mysql/erp_change_tracking.sql）
+  updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  KEY idx_bom_header_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- BOM Detail
@@ -19,14 +22,18 @@ CREATE TABLE IF NOT EXISTS bom_detail (
   bom_id INT NOT NULL,
   part_no VARCHAR(50) NOT NULL,
   qty INT NOT NULL,
-  KEY idx_bom_id (bom_id)
+  updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  KEY idx_bom_id (bom_id),
+  KEY idx_bom_detail_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Parts (Inventory)
 CREATE TABLE IF NOT EXISTS parts (
   part_no VARCHAR(50) PRIMARY KEY,
   stock_qty INT NOT NULL,
-  safety_stock INT NOT NULL
+  safety_stock INT NOT NULL,
+  updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  KEY idx_parts_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Purchase Orders
@@ -36,7 +43,9 @@ CREATE TABLE IF NOT EXISTS purchase (
   delivery_date DATE NULL,
   order_qty INT NOT NULL,
   status VARCHAR(20) NOT NULL,
-  KEY idx_purchase_part_date (part_no, delivery_date)
+  updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  KEY idx_purchase_part_date (part_no, delivery_date),
+  KEY idx_purchase_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Machine Data
@@ -47,7 +56,9 @@ CREATE TABLE IF NOT EXISTS machine_data (
   vibration DECIMAL(8,4) NOT NULL,
   rpm INT NOT NULL,
   created_at DATETIME NOT NULL,
-  KEY idx_machine_created (created_at)
+  KEY idx_machine_created (created_at),
+  -- 單台設備依時間區間讀取（/api/iot?since=<時間>&machine_id=...）
+  KEY idx_machine_data_machine_created (machine_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Clean old data
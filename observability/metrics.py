@@ -0,0 +1,307 @@
+"""
+Prometheus text format（0.0.4）的輕量 metrics registry，不依賴 prometheus_client。
+
+hot path 的成本：
+- 各呼叫點在 import / 第一次使用時就取得帶 label 的 child，observe() 只有 bisect + 一次 lock
+- 連線池、查詢快取、snapshot 等已有 stats() 的元件以 collector 在 scrape 時讀取，平常沒有額外成本
+
+每個 process 各自累計；gunicorn 多 worker 時每次 scrape 只看到其中一個 worker 的數字。
+"""
+import bisect
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+from observability.tracing import add_span
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def samples(self):
+        return [("_total", (), self._value)]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+
+    def set(self, value):
+        self._value = value
+
+    def samples(self):
+        return [("", (), self._value)]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # 最後一格是 +Inf
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        result = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            result.append(("_bucket", (("le", _format_value(float(bound))),), cumulative))
+        result.append(("_sum", (), total))
+        result.append(("_count", (), cumulative))
+        return result
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self):
+        with self._lock:
+            children = list(self._children.items())
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in children:
+            base = tuple(zip(self.labelnames, key))
+            for suffix, extra, value in child.samples():
+                lines.append(f"{self.name}{suffix}{_format_labels(base + extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector):
+        """
+        collector() 回傳 [(name, type, help, [(labels dict, value), ...]), ...]，在 scrape 時才呼叫。
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collector, '__name__', collector)} failed: {e}", flush=True)
+                continue
+
+            for name, type_name, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUERY_SECONDS = Histogram(
+    "mrp_query_seconds", "Repository query latency (time spent inside the query / fetch).", ["query"]
+)
+QUERY_ROWS = Counter("mrp_query_rows", "Rows returned by repository queries.", ["query"])
+STAGE_SECONDS = Histogram("mrp_stage_seconds", "Compute time per pipeline stage.", ["stage"])
+STAGE_ROWS = Gauge("mrp_stage_output_rows", "Rows in the latest output of each pipeline stage.", ["stage"])
+SERIALIZE_SECONDS = Histogram(
+    "mrp_serialize_seconds", "Response serialization time (once per snapshot).", ["endpoint", "format"]
+)
+PAYLOAD_BYTES = Histogram(
+    "mrp_payload_bytes", "Uncompressed response payload size.", ["endpoint", "format"], buckets=BYTE_BUCKETS
+)
+COMPRESS_SECONDS = Histogram("mrp_compress_seconds", "Response compression time.", ["encoding"])
+RESPONSE_BYTES = Histogram(
+    "mrp_response_bytes", "Bytes sent per response body.", ["encoding"], buckets=BYTE_BUCKETS
+)
+RENDER_CACHE = Counter("mrp_render_cache", "Serialized response cache lookups.", ["endpoint", "result"])
+PLANNING_RUN_SECONDS = Histogram(
+    "mrp_planning_run_seconds", "Scheduled planning run duration.", ["status"], buckets=LATENCY_BUCKETS + (60.0, 120.0, 300.0)
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "mrp_http_request_seconds", "Time until the response is returned by the view.", ["endpoint", "method", "status"]
+)
+
+
+def output_rows(value):
+    """
+    DataFrame 的列數；dict / tuple 時加總其中的 DataFrame；其餘回傳 None。
+    """
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (tuple, list)):
+        return None
+
+    frames = [len(item) for item in value if isinstance(item, pd.DataFrame)]
+    return sum(frames) if frames else None
+
+
+def _timed_iterator(iterator, name, seconds, rows):
+    # 只計入取得下一批資料的時間，不含呼叫端處理每一批的時間
+    elapsed = 0.0
+    count = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - started
+            count += output_rows(chunk) or 0
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        seconds.observe(elapsed)
+        rows.inc(count)
+        add_span(f"query.{name}", elapsed, rows_out=count)
+
+
+def timed_query(func):
+    """
+    repository 函式的 decorator：記錄 mrp_query_seconds / mrp_query_rows（label 為函式名稱），
+    有進行中的 trace 時另外記一個 query.<函式名稱> span。
+    回傳 generator 的函式（逐批讀取）改為在消化完時記錄。
+    """
+    name = func.__name__
+    seconds = QUERY_SECONDS.labels(query=name)
+    rows = QUERY_ROWS.labels(query=name)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        if inspect.isgenerator(result):
+            return _timed_iterator(result, name, seconds, rows)
+
+        elapsed = time.perf_counter() - started
+        seconds.observe(elapsed)
+        count = output_rows(result)
+        if count:
+            rows.inc(count)
+        add_span(f"query.{name}", elapsed, rows_out=count)
+        return result
+
+    return wrapper
+
+
+def observe_stage(stage, seconds, rows=None):
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    if rows is not None:
+        STAGE_ROWS.labels(stage=stage).set(rows)
\ No newline at end of file
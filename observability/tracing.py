@@ -0,0 +1,166 @@
+"""
+輕量 span API（contextvars）：記錄一次計算中各 repository 查詢與 pipeline stage 的耗時與筆數。
+
+    with start_trace("plan") as root:
+        with span("load.bom") as s:
+            ...
+            s.set(cached=True)
+        add_span("query.get_bom_df", seconds, rows_out=120)   # 已量好的耗時
+
+- 沒有進行中的 trace 時 span() / add_span() 幾乎沒有成本（只讀一次 ContextVar）
+- thread pool 中執行的工作要以 propagate() 包裝，span 才會掛在同一個 trace 下
+- to_dict() 的結果可 JSON / pickle，隨 snapshot 保存；server_timing() 產生 Server-Timing header
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import partial
+
+_current = contextvars.ContextVar("trace_span", default=None)
+_root = contextvars.ContextVar("trace_root", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "children", "started", "duration")
+
+    def __init__(self, name, attrs=None, started=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.started = time.perf_counter() if started is None else started
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def elapsed(self):
+        return self.duration if self.duration is not None else time.perf_counter() - self.started
+
+    def to_dict(self, origin=None):
+        origin = self.started if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            **self.attrs,
+            "children": [child.to_dict(origin) for child in list(self.children)],
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span():
+    return _current.get()
+
+
+def current_trace():
+    return _root.get()
+
+
+def tracing_active():
+    return _current.get() is not None
+
+
+@contextmanager
+def start_trace(name, **attrs):
+    """
+    開始一個新的 trace（與外層 trace 無關），結束時 root.duration 為總耗時。
+    """
+    root = Span(name, attrs)
+    token = _current.set(root)
+    root_token = _root.set(root)
+    try:
+        yield root
+    finally:
+        root.finish()
+        _root.reset(root_token)
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, **attrs):
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP
+        return
+
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def add_span(name, seconds, **attrs):
+    """
+    把已量好的耗時記成目前 span 的子 span；沒有進行中的 trace 時不做任何事。
+    """
+    parent = _current.get()
+    if parent is None:
+        return None
+
+    child = Span(name, attrs, started=time.perf_counter() - seconds)
+    child.duration = seconds
+    parent.children.append(child)
+    return child
+
+
+def propagate(func, *args, **kwargs):
+    """
+    包裝成在目前 context 下執行的 callable，交給 thread pool 時 span 仍掛在同一個 trace。
+    """
+    return partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def _describe(entry):
+    parts = []
+    if entry.get("cached"):
+        parts.append("cached")
+    rows_in, rows_out = entry.get("rows_in"), entry.get("rows_out")
+    if rows_in is not None and rows_out is not None:
+        parts.append(f"rows {rows_in}->{rows_out}")
+    elif rows_out is not None:
+        parts.append(f"rows {rows_out}")
+    if entry.get("error"):
+        parts.append("error")
+    return " ".join(parts)
+
+
+def _flatten(entry, prefix):
+    for child in entry.get("children", ()):
+        yield f"{prefix}{child['name']}", child
+        yield from _flatten(child, prefix)
+
+
+def server_timing(entries):
+    """
+    entries: [(名稱, trace dict)]；每個 trace 本身與其所有子 span 各成一個 Server-Timing 項目，
+    子 span 名稱加上 "<名稱>." 前綴。
+    """
+    metrics = []
+    for name, trace in entries:
+        if trace is None:
+            continue
+        for metric, entry in [(name, trace), *_flatten(trace, f"{name}.")]:
+            item = f"{metric};dur={entry['duration_ms']:.3f}"
+            desc = _describe(entry)
+            if desc:
+                item += f';desc="{desc}"'
+            metrics.append(item)
+    return ", ".join(metrics)
\ No newline at end of file
@@ -0,0 +1,112 @@
+-- 每日產品需求彙總表：由 orders / order_items 的 trigger 增量維護。
+-- 可重複執行；既有資料庫可直接 psql -f 套用（最後會回補整段歷史）。
+
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+
+CREATE TABLE IF NOT EXISTS daily_product_demand (
+  order_date DATE NOT NULL,
+  product_id INT NOT NULL,
+  qty BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (order_date, product_id)
+);
+
+CREATE OR REPLACE FUNCTION apply_daily_product_demand(p_date DATE, p_product_id INT, p_delta BIGINT)
+RETURNS VOID AS $$
+BEGIN
+  IF p_delta = 0 THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO daily_product_demand (order_date, product_id, qty, updated_at)
+  VALUES (p_date, p_product_id, p_delta, NOW())
+  ON CONFLICT (order_date, product_id)
+  DO UPDATE SET qty = daily_product_demand.qty + EXCLUDED.qty, updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- order_items 異動：依所屬訂單的日期 / 狀態加減數量
+CREATE OR REPLACE FUNCTION trg_order_items_daily_demand()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_created_at TIMESTAMP;
+  v_status VARCHAR(20);
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT created_at, status INTO v_created_at, v_status FROM orders WHERE id = OLD.order_id;
+    -- 訂單整筆刪除時（cascade）已由 orders 的 trigger 扣除
+    IF FOUND AND v_status <> 'cancelled' THEN
+      PERFORM apply_daily_product_demand(DATE(v_created_at), OLD.product_id, -OLD.quantity);
+    END IF;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT created_at, status INTO v_created_at, v_status FROM orders WHERE id = NEW.order_id;
+    IF FOUND AND v_status <> 'cancelled' THEN
+      PERFORM apply_daily_product_demand(DATE(v_created_at), NEW.product_id, NEW.quantity);
+    END IF;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- orders 狀態 / 日期異動或刪除：整張訂單的明細一起搬移
+CREATE OR REPLACE FUNCTION trg_orders_daily_demand()
+RETURNS TRIGGER AS $$
+DECLARE
+  item RECORD;
+BEGIN
+  IF TG_OP = 'UPDATE'
+     AND OLD.created_at IS NOT DISTINCT FROM NEW.created_at
+     AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+    RETURN NEW;
+  END IF;
+
+  FOR item IN SELECT product_id, quantity FROM order_items WHERE order_id = OLD.id LOOP
+    IF OLD.status <> 'cancelled' THEN
+      PERFORM apply_daily_product_demand(DATE(OLD.created_at), item.product_id, -item.quantity);
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.status <> 'cancelled' THEN
+      PERFORM apply_daily_product_demand(DATE(NEW.created_at), item.product_id, item.quantity);
+    END IF;
+  END LOOP;
+
+  IF TG_OP = 'DELETE' THEN
+    RETURN OLD;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER order_items_daily_demand
+AFTER INSERT OR UPDATE OR DELETE ON order_items
+FOR EACH ROW EXECUTE FUNCTION trg_order_items_daily_demand();
+
+CREATE OR REPLACE TRIGGER orders_daily_demand
+BEFORE UPDATE OR DELETE ON orders
+FOR EACH ROW EXECUTE FUNCTION trg_orders_daily_demand();
+
+-- 依基礎資料重算指定日期區間（回補 / 修復用）
+CREATE OR REPLACE FUNCTION refresh_daily_product_demand(p_from DATE, p_to DATE)
+RETURNS VOID AS $$
+BEGIN
+  DELETE FROM daily_product_demand
+  WHERE order_date BETWEEN p_from AND p_to;
+
+  INSERT INTO daily_product_demand (order_date, product_id, qty, updated_at)
+  SELECT DATE(o.created_at), oi.product_id, SUM(oi.quantity), NOW()
+  FROM orders o
+  JOIN order_items oi ON o.id = oi.order_id
+  WHERE o.status <> 'cancelled'
+    AND o.created_at >= p_from
+    AND o.created_at < p_to + 1
+  GROUP BY DATE(o.created_at), oi.product_id;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_daily_product_demand(
+  COALESCE((SELECT MIN(created_at)::date FROM orders), CURRENT_DATE),
+  CURRENT_DATE
+);
@@ -0,0 +1,64 @@
+-- 排程的 planning run（services/planning_run.py）：forecast / BOM 展開 / MRP 的結果依 run_id 保存，
+-- dashboard（DASHBOARD_PLAN_SOURCE=runs）只讀取最新一次完成的 run，不在請求路徑上計算。
+
+CREATE TABLE IF NOT EXISTS planning_runs (
+  run_id BIGSERIAL PRIMARY KEY,
+  started_at TIMESTAMP NOT NULL,
+  finished_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  status VARCHAR(20) NOT NULL,          -- completed / failed
+  input_version TEXT,                   -- 輸入資料的 watermark；沒變時不重算
+  sim_rows INT NOT NULL DEFAULT 0,
+  po_rows INT NOT NULL DEFAULT 0,
+  duration_seconds DOUBLE PRECISION,
+  error TEXT
+);
+
+-- 最新一次完成的 run：只掃描索引的第一筆
+CREATE INDEX IF NOT EXISTS idx_planning_runs_completed
+  ON planning_runs (run_id DESC) WHERE status = 'completed';
+
+-- 完整的 MRP 模擬格：未來 FORECAST_DAYS 天 x 所有零件
+CREATE TABLE IF NOT EXISTS planning_run_sim (
+  run_id BIGINT NOT NULL REFERENCES planning_runs(run_id) ON DELETE CASCADE,
+  part_no VARCHAR(50) NOT NULL,
+  forecast_date DATE NOT NULL,
+  part_demand DOUBLE PRECISION NOT NULL,
+  incoming_qty DOUBLE PRECISION NOT NULL,
+  stock_qty DOUBLE PRECISION NOT NULL,
+  safety_qty DOUBLE PRECISION NOT NULL,
+  start_available DOUBLE PRECISION NOT NULL,
+  end_available DOUBLE PRECISION NOT NULL,
+  below_safety BOOLEAN NOT NULL,
+  below_zero BOOLEAN NOT NULL,
+  shortage_qty DOUBLE PRECISION NOT NULL,
+  recommended_po_qty DOUBLE PRECISION NOT NULL,
+  suggested_order_date DATE,
+  required_eta_date DATE,
+  PRIMARY KEY (run_id, part_no, forecast_date)
+);
+
+-- 建議採購彙總（依 total_recommended_qty 排序的順序存於 rank）
+CREATE TABLE IF NOT EXISTS planning_run_po_summary (
+  run_id BIGINT NOT NULL REFERENCES planning_runs(run_id) ON DELETE CASCADE,
+  rank INT NOT NULL,
+  part_no VARCHAR(50) NOT NULL,
+  total_recommended_qty DOUBLE PRECISION NOT NULL,
+  first_shortage_date DATE,
+  first_suggested_order_date DATE,
+  first_required_eta DATE,
+  max_shortage_qty DOUBLE PRECISION,
+  days_below_safety INT,
+  days_below_zero INT,
+  min_available DOUBLE PRECISION,
+  PRIMARY KEY (run_id, rank)
+);
+
+-- 產品別需求預測（產出預估依目前的產能係數在 dashboard 端計算）
+CREATE TABLE IF NOT EXISTS planning_run_forecast (
+  run_id BIGINT NOT NULL REFERENCES planning_runs(run_id) ON DELETE CASCADE,
+  forecast_date DATE NOT NULL,
+  product_id INT NOT NULL,
+  forecast_demand_qty INT NOT NULL,
+  parts_per_unit DOUBLE PRECISION,
+  PRIMARY KEY (run_id, forecast_date, product_id)
+);
\ No newline at end of file
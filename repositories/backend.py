@@ -0,0 +1,49 @@
+"""
+資料來源 backend（DATA_BACKEND）：data_loader 與 IoT stream 透過 get_backend() 取得連線與查詢函式，
+不直接依賴 MySQL / PostgreSQL。
+
+- "sql"：repositories.sql_backend（MySQL + PostgreSQL，預設）
+- "duckdb"：repositories.duckdb_repository（DuckDB 查詢 Parquet 檔，本機 / benchmark / profiling 不需要資料庫）
+
+backend 是提供 BACKEND_INTERFACE 所有名稱的 module：*_connection 為 connection context manager，
+其餘為與 erp / iot / transaction / watermark repository 同名、同回傳 schema 的查詢函式。
+"""
+import importlib
+
+from config.settings import DATA_BACKEND
+
+BACKENDS = {
+    "sql": "repositories.sql_backend",
+    "duckdb": "repositories.duckdb_repository",
+}
+
+BACKEND_INTERFACE = (
+    "erp_connection",
+    "iot_connection",
+    "orders_connection",
+    "get_bom_df",
+    "get_parts_df",
+    "get_incoming_purchase_df",
+    "get_recent_iot_df",
+    "iter_recent_iot_chunks",
+    "get_latest_iot_id",
+    "get_iot_since_id",
+    "get_iot_since_time",
+    "get_order_history_df",
+    "iter_order_history_chunks",
+    "probe_erp_watermarks",
+    "probe_order_watermarks",
+    "verify_erp_checksums",
+)
+
+
+def get_backend(name=None):
+    name = name or DATA_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"unknown DATA_BACKEND: {name} (expected one of {', '.join(BACKENDS)})")
+
+    module = importlib.import_module(BACKENDS[name])
+    missing = [attr for attr in BACKEND_INTERFACE if not hasattr(module, attr)]
+    if missing:
+        raise TypeError(f"backend '{name}' is missing: {missing}")
+    return module
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+DATA_BACKEND=duckdb 的查詢：與 erp / iot / transaction / watermark repository 同名、同 schema，
+資料表是 db.embedded 建立的 Parquet view。
+
+- 結果以 DuckDB 的 DataFrame 輸出（fetch_df_chunk）取得，不逐筆轉成 tuple
+- JOIN / GROUP BY 在 DuckDB 內以向量化方式執行；daily_product_demand 可以是未彙總的訂單明細
+- watermark 取自 Parquet 檔的大小與修改時間，不需要掃描資料
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config.settings import FETCH_CHUNK_SIZE, IOT_LOOKBACK_HOURS, IOT_STREAM_BATCH_LIMIT, LOOKBACK_DAYS
+from db.embedded import duckdb_connection, table_path
+from observability.metrics import timed_query
+from repositories.erp_repository import BOM_SCHEMA, INCOMING_SCHEMA, PARTS_SCHEMA
+from repositories.iot_repository import IOT_SCHEMA
+from repositories.transaction_repository import ORDER_HISTORY_SCHEMA
+from repositories.typed_fetch import empty_frame
+
+# DuckDB 每個 vector 2048 筆
+VECTOR_SIZE = 2048
+
+
+def _typed_frame(df, schema):
+    """
+    DuckDB 的輸出轉成與 typed_fetch 相同的欄位型別。
+    """
+    if df.empty:
+        return empty_frame(schema)
+
+    columns = {}
+    for name, kind in schema:
+        values = df[name]
+        if kind == "int":
+            columns[name] = values.astype("Int64") if values.isna().any() else values.astype(np.int64)
+        elif kind == "float":
+            columns[name] = values.astype(np.float64)
+        elif kind == "category":
+            columns[name] = pd.Categorical(values)
+        elif kind in ("date", "datetime"):
+            columns[name] = values.astype("datetime64[ns]")
+        else:
+            columns[name] = values
+    return pd.DataFrame(columns)
+
+
+def _fetch(conn, sql, schema, params=None):
+    return _typed_frame(conn.execute(sql, params or []).df(), schema)
+
+
+def _iter_chunks(conn, sql, schema, chunk_size, params=None):
+    cur = conn.execute(sql, params or [])
+    vectors = max(1, chunk_size // VECTOR_SIZE)
+    while True:
+        df = cur.fetch_df_chunk(vectors)
+        if df.empty:
+            break
+        yield _typed_frame(df, schema)
+
+
+@timed_query
+def get_bom_df(conn):
+    sql = """
+    SELECT
+        TRY_CAST(TRIM(CAST(b.product_code AS VARCHAR)) AS BIGINT) AS product_id,
+        d.part_no AS part_no,
+        d.qty AS bom_qty
+    FROM bom_header b
+    JOIN bom_detail d ON b.bom_id = d.bom_id
+    """
+    return _fetch(conn, sql, BOM_SCHEMA)
+
+
+@timed_query
+def get_parts_df(conn):
+    sql = """
+    SELECT part_no, stock_qty, safety_stock AS safety_qty
+    FROM parts
+    """
+    return _fetch(conn, sql, PARTS_SCHEMA)
+
+
+@timed_query
+def get_incoming_purchase_df(conn):
+    sql = """
+    SELECT
+        part_no,
+        CAST(delivery_date AS DATE) AS eta_date,
+        SUM(order_qty) AS incoming_qty
+    FROM purchase
+    WHERE status = 'pending'
+      AND delivery_date IS NOT NULL
+    GROUP BY part_no, CAST(delivery_date AS DATE)
+    """
+    return _fetch(conn, sql, INCOMING_SCHEMA)
+
+
+def _recent_iot_params():
+    # 與 MySQL 的 NOW() 相同，以本機時間為基準
+    return [datetime.now() - timedelta(hours=IOT_LOOKBACK_HOURS)]
+
+
+_RECENT_IOT_SQL = """
+SELECT id, machine_id, temperature, vibration, rpm, created_at
+FROM machine_data
+WHERE created_at >= ?
+ORDER BY machine_id, created_at ASC
+"""
+
+
+@timed_query
+def get_recent_iot_df(conn):
+    return _fetch(conn, _RECENT_IOT_SQL, IOT_SCHEMA, _recent_iot_params())
+
+
+@timed_query
+def iter_recent_iot_chunks(conn, chunk_size=FETCH_CHUNK_SIZE):
+    return _iter_chunks(conn, _RECENT_IOT_SQL, IOT_SCHEMA, chunk_size, _recent_iot_params())
+
+
+@timed_query
+def get_latest_iot_id(conn):
+    return int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM machine_data").fetchone()[0])
+
+
+@timed_query
+def get_iot_since_id(conn, after_id, upto_id=None, limit=IOT_STREAM_BATCH_LIMIT, machine_id=None):
+    # 與 iot_repository 相同，假設 id 依寫入順序遞增（單一寫入者）；Parquet 檔整批取代，不會有晚到的較小 id
+    sql = """
+    SELECT id, machine_id, temperature, vibration, rpm, created_at
+    FROM machine_data
+    WHERE id > ?
+    """
+    params = [after_id]
+    if upto_id is not None:
+        sql += " AND id <= ?"
+        params.append(upto_id)
+    if machine_id is not None:
+        sql += " AND machine_id = ?"
+        params.append(machine_id)
+    sql += " ORDER BY id ASC LIMIT ?"
+    params.append(limit)
+
+    return _fetch(conn, sql, IOT_SCHEMA, params)
+
+
+@timed_query
+def get_iot_since_time(conn, after_time, after_id=None, limit=IOT_STREAM_BATCH_LIMIT, machine_id=None):
+    sql = """
+    SELECT id, machine_id, temperature, vibration, rpm, created_at
+    FROM machine_data
+    """
+    if after_id is None:
+        sql += " WHERE created_at > ?"
+        params = [after_time]
+    else:
+        sql += " WHERE (created_at > ? OR (created_at = ? AND id > ?))"
+        params = [after_time, after_time, after_id]
+    if machine_id is not None:
+        sql += " AND machine_id = ?"
+        params.append(machine_id)
+    sql += " ORDER BY created_at ASC, id ASC LIMIT ?"
+    params.append(limit)
+
+    return _fetch(conn, sql, IOT_SCHEMA, params)
+
+
+def _order_history_sql():
+    # 同時接受已彙總的 daily_product_demand 與逐筆的訂單明細
+    return f"""
+    SELECT
+        CAST(order_date AS DATE) AS order_date,
+        CAST(product_id AS BIGINT) AS product_id,
+        CAST(SUM(qty) AS DOUBLE) AS qty
+    FROM daily_product_demand
+    WHERE CAST(order_date AS DATE) >= CURRENT_DATE - {LOOKBACK_DAYS}
+    GROUP BY 1, 2
+    HAVING SUM(qty) <> 0
+    ORDER BY order_date
+    """
+
+
+@timed_query
+def get_order_history_df(conn, fetch_mode=None):
+    # fetch_mode 只對 PostgreSQL 有意義，這裡一律整批取回
+    return _fetch(conn, _order_history_sql(), ORDER_HISTORY_SCHEMA)
+
+
+@timed_query
+def iter_order_history_chunks(conn, chunk_size=FETCH_CHUNK_SIZE):
+    return _iter_chunks(conn, _order_history_sql(), ORDER_HISTORY_SCHEMA, chunk_size)
+
+
+def _file_watermarks(tables):
+    marks = {}
+    for table in tables:
+        try:
+            stat = os.stat(table_path(table))
+            marks[table] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except FileNotFoundError:
+            marks[table] = "missing"
+    return marks
+
+
+@timed_query
+def probe_erp_watermarks(conn):
+    return _file_watermarks(("bom_header", "bom_detail", "parts", "purchase"))
+
+
+@timed_query
+def probe_order_watermarks(conn):
+    return _file_watermarks(("daily_product_demand",))
+
+
+def verify_erp_checksums(conn):
+    # 檔案的大小 / mtime 已涵蓋所有變更，不需要另外驗證
+    return {}
+
+
+# backend 介面（見 repositories.backend）：三類資料都在同一個 DuckDB
+erp_connection = duckdb_connection
+iot_connection = duckdb_connection
+orders_connection = duckdb_connection
\ No newline at end of file
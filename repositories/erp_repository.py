@@ -1,6 +1,27 @@
-import pandas as pd
+from observability.metrics import timed_query
+from repositories.typed_fetch import fetch_typed
 
 
+BOM_SCHEMA = (
+    ("product_id", "int"),
+    ("part_no", "str"),
+    ("bom_qty", "float"),
+)
+
+PARTS_SCHEMA = (
+    ("part_no", "str"),
+    ("stock_qty", "float"),
+    ("safety_qty", "float"),
+)
+
+INCOMING_SCHEMA = (
+    ("part_no", "str"),
+    ("eta_date", "date"),
+    ("incoming_qty", "float"),
+)
+
+
+@timed_query
 def get_bom_df(mysql_conn):
     sql = """
     SELECT 
@@ -10,17 +31,19 @@ def get_bom_df(mysql_conn):
     FROM bom_header b
     JOIN bom_detail d ON b.bom_id = d.bom_id;
     """
-    return pd.read_sql(sql, mysql_conn)
+    return fetch_typed(mysql_conn, sql, BOM_SCHEMA)
 
 
+@timed_query
 def get_parts_df(mysql_conn):
     sql = """
     SELECT part_no, stock_qty, safety_stock AS safety_qty
     FROM parts;
     """
-    return pd.read_sql(sql, mysql_conn)
+    return fetch_typed(mysql_conn, sql, PARTS_SCHEMA)
 
 
+@timed_query
 def get_incoming_purchase_df(mysql_conn):
     sql = """
     SELECT 
@@ -32,4 +55,24 @@ def get_incoming_purchase_df(mysql_conn):
       AND delivery_date IS NOT NULL
     GROUP BY part_no, DATE(delivery_date);
     """
-    return pd.read_sql(sql, mysql_conn)
\ No newline at end of file
+    return fetch_typed(mysql_conn, sql, INCOMING_SCHEMA)
+
+
+def clean_bom_df(bom_df):
+    bom_df = bom_df.dropna(subset=["product_id"]).copy()
+    bom_df["product_id"] = bom_df["product_id"].astype(int)
+    bom_df["bom_qty"] = bom_df["bom_qty"].fillna(0.0)
+    return bom_df
+
+
+def clean_parts_df(parts_df):
+    parts_df = parts_df.copy()
+    parts_df["stock_qty"] = parts_df["stock_qty"].fillna(0.0)
+    parts_df["safety_qty"] = parts_df["safety_qty"].fillna(0.0)
+    return parts_df
+
+
+def clean_incoming_df(incoming_df):
+    incoming_df = incoming_df.copy()
+    incoming_df["incoming_qty"] = incoming_df["incoming_qty"].fillna(0.0)
+    return incoming_df
@@ -1,12 +1,95 @@
-import pandas as pd
-from config.settings import IOT_LOOKBACK_HOURS
+from config.settings import IOT_LOOKBACK_HOURS, FETCH_CHUNK_SIZE, IOT_STREAM_BATCH_LIMIT
+from observability.metrics import timed_query
+from repositories.typed_fetch import fetch_typed, iter_typed_chunks
 
 
-def get_recent_iot_df(mysql_conn):
-    sql = f"""
-    SELECT machine_id, temperature, vibration, rpm, created_at
+IOT_SCHEMA = (
+    ("id", "int"),
+    ("machine_id", "category"),
+    ("temperature", "float"),
+    ("vibration", "float"),
+    ("rpm", "float"),
+    ("created_at", "datetime"),
+)
+
+
+def _recent_iot_sql():
+    return f"""
+    SELECT id, machine_id, temperature, vibration, rpm, created_at
     FROM machine_data
     WHERE created_at >= NOW() - INTERVAL {IOT_LOOKBACK_HOURS} HOUR
     ORDER BY machine_id, created_at ASC;
     """
-    return pd.read_sql(sql, mysql_conn)
\ No newline at end of file
+
+
+@timed_query
+def get_recent_iot_df(mysql_conn):
+    return fetch_typed(mysql_conn, _recent_iot_sql(), IOT_SCHEMA)
+
+
+@timed_query
+def iter_recent_iot_chunks(mysql_conn, chunk_size=FETCH_CHUNK_SIZE):
+    return iter_typed_chunks(mysql_conn, _recent_iot_sql(), IOT_SCHEMA, chunk_size)
+
+
+@timed_query
+def get_latest_iot_id(mysql_conn):
+    with mysql_conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM machine_data")
+        return int(cur.fetchone()[0])
+
+
+@timed_query
+def get_iot_since_id(mysql_conn, after_id, upto_id=None, limit=IOT_STREAM_BATCH_LIMIT, machine_id=None):
+    """
+    以主鍵範圍讀取 after_id 之後（不含）的新資料，成本只與新資料筆數有關。
+    upto_id: 上限（含），用來補齊訂閱前的缺口而不與後續推送重疊。
+
+    假設 machine_data 只有單一寫入者（iot_simulator，autocommit 逐筆寫入），id 依 commit 順序遞增。
+    有多個寫入者時，較小的 AUTO_INCREMENT id 可能比已讀到的較大 id 晚 commit，
+    游標已越過它，這筆資料會永遠漏掉；屆時需改為回頭重讀一小段 id 並在 client 端依 id 去重。
+    """
+    sql = """
+    SELECT id, machine_id, temperature, vibration, rpm, created_at
+    FROM machine_data
+    WHERE id > %s
+    """
+    params = [after_id]
+    if upto_id is not None:
+        sql += " AND id <= %s"
+        params.append(upto_id)
+    if machine_id is not None:
+        sql += " AND machine_id = %s"
+        params.append(machine_id)
+    sql += " ORDER BY id ASC LIMIT %s"
+    params.append(limit)
+
+    return fetch_typed(mysql_conn, sql, IOT_SCHEMA, params=tuple(params))
+
+
+@timed_query
+def get_iot_since_time(mysql_conn, after_time, after_id=None, limit=IOT_STREAM_BATCH_LIMIT, machine_id=None):
+    """
+    以時間為起點讀取 after_time 之後（不含）的資料。
+    after_id: 複合游標 (created_at, id)，接續同一秒內被 limit 切開的資料。
+    指定 machine_id 時走 (machine_id, created_at) 複合索引，否則走 created_at 索引（InnoDB 次索引已含 id）。
+    與 get_iot_since_id 相同，假設單一寫入者：晚 commit 的較早 (created_at, id) 會被游標越過。
+    """
+    sql = """
+    SELECT id, machine_id, temperature, vibration, rpm, created_at
+    FROM machine_data
+    """
+    if after_id is None:
+        sql += " WHERE created_at > %s"
+        params = [after_time]
+    else:
+        # created_at >= %s 讓 optimizer 仍以索引範圍掃描，row comparison 再排除已讀過的部分
+        sql += " WHERE created_at >= %s AND (created_at, id) > (%s, %s)"
+        params = [after_time, after_time, after_id]
+    if machine_id is not None:
+        sql += " AND machine_id = %s"
+        params.append(machine_id)
+    sql += " ORDER BY created_at ASC, id ASC LIMIT %s"
+    params.append(limit)
+
+    return fetch_typed(mysql_conn, sql, IOT_SCHEMA, params=tuple(params))
\ No newline at end of file
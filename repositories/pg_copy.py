@@ -0,0 +1,124 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+
+PGCOPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+PG_EPOCH = np.datetime64("2000-01-01", "D")
+
+# binary COPY 僅支援固定寬度欄位，查詢端需明確 cast 成對應型別
+BINARY_FIELD_TYPES = {
+    "int": (">i8", 8),       # bigint
+    "float": (">f8", 8),     # double precision
+    "date": (">i4", 4),      # date：自 2000-01-01 起的天數
+    "datetime": (">i8", 8),  # timestamp（無時區）：自 2000-01-01 起的微秒數
+}
+
+CSV_DTYPES = {
+    "int": "int64",
+    "float": "float64",
+    "str": "object",
+    "category": "category",
+}
+
+
+def _copy_out(pg_conn, sql, options):
+    buf = io.BytesIO()
+    with pg_conn.cursor() as cur:
+        cur.copy_expert(f"COPY ({sql.strip().rstrip(';')}) TO STDOUT WITH ({options})", buf)
+    return buf.getbuffer()
+
+
+def copy_query_csv(pg_conn, sql, schema):
+    """
+    COPY ... TO STDOUT (FORMAT csv)，交給 pandas 的 C parser 依 schema 直接解析成欄位。
+    """
+    data = _copy_out(pg_conn, sql, "FORMAT csv")
+    names = [name for name, _ in schema]
+    date_cols = [name for name, kind in schema if kind in ("date", "datetime")]
+
+    df = pd.read_csv(
+        io.BytesIO(data),
+        names=names,
+        header=None,
+        dtype={name: CSV_DTYPES[kind] for name, kind in schema if kind in CSV_DTYPES},
+        parse_dates=date_cols,
+        engine="c",
+    )
+
+    for name in date_cols:
+        df[name] = df[name].astype("datetime64[ns]")
+    return df
+
+
+def copy_query_binary(pg_conn, sql, schema):
+    """
+    COPY ... TO STDOUT (FORMAT binary)。
+    欄位皆為固定寬度且沒有 NULL 時，每筆 tuple 長度固定，
+    可以用 numpy structured dtype 一次解碼整個 buffer，不需要逐筆處理。
+    """
+    for name, kind in schema:
+        if kind not in BINARY_FIELD_TYPES:
+            raise ValueError(f"binary COPY does not support column {name!r} of kind {kind!r}")
+
+    data = _copy_out(pg_conn, sql, "FORMAT binary")
+
+    if bytes(data[:len(PGCOPY_SIGNATURE)]) != PGCOPY_SIGNATURE:
+        raise ValueError("unexpected COPY binary signature")
+
+    header_ext_len = int(np.frombuffer(data, dtype=">i4", count=1, offset=15)[0])
+    body_start = 19 + header_ext_len
+    body_end = len(data) - 2  # 結尾的 int16 -1
+
+    fields = [("field_count", ">i2")]
+    for i, (name, kind) in enumerate(schema):
+        dtype, width = BINARY_FIELD_TYPES[kind]
+        fields.append((f"len_{i}", ">i4"))
+        fields.append((name, dtype))
+    tuple_dtype = np.dtype(fields)
+
+    body_size = body_end - body_start
+    if body_size % tuple_dtype.itemsize != 0:
+        raise ValueError("binary COPY rows are not fixed width (NULL values or unexpected types)")
+
+    rows = np.frombuffer(data, dtype=tuple_dtype, offset=body_start, count=body_size // tuple_dtype.itemsize)
+
+    for i, (name, kind) in enumerate(schema):
+        expected = BINARY_FIELD_TYPES[kind][1]
+        if len(rows) and not (rows[f"len_{i}"] == expected).all():
+            raise ValueError(f"binary COPY column {name!r} contains NULL or unexpected width")
+
+    columns = {}
+    for name, kind in schema:
+        values = rows[name]
+        if kind == "date":
+            columns[name] = (PG_EPOCH + values.astype("timedelta64[D]")).astype("datetime64[ns]")
+        elif kind == "datetime":
+            columns[name] = (PG_EPOCH + values.astype("timedelta64[us]")).astype("datetime64[ns]")
+        else:
+            columns[name] = values.astype(values.dtype.newbyteorder("="))
+
+    return pd.DataFrame(columns)
+
+
+def copy_query_to_frame(pg_conn, sql, schema, fmt="binary"):
+    if fmt == "binary":
+        return copy_query_binary(pg_conn, sql, schema)
+    if fmt == "csv":
+        return copy_query_csv(pg_conn, sql, schema)
+    raise ValueError(f"unknown COPY format: {fmt}")
+
+
+def copy_frame_into(pg_conn, table, df, columns):
+    """
+    COPY table (columns) FROM STDIN (FORMAT csv)：整批寫入，不逐筆 INSERT。
+    NaN / NaT 寫成 NULL，日期寫成 YYYY-MM-DD；不 commit，由呼叫端決定交易範圍。
+    """
+    buf = io.StringIO()
+    df[list(columns)].to_csv(buf, index=False, header=False, date_format="%Y-%m-%d")
+    buf.seek(0)
+
+    with pg_conn.cursor() as cur:
+        cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    return len(df)
@@ -0,0 +1,202 @@
+"""
+planning run 結果表（postgres/planning_runs.sql）的讀寫。
+寫入以 COPY 整批進行；讀取都以 run_id 開頭的主鍵 / partial index 查詢。
+"""
+from observability.metrics import timed_query
+from repositories.pg_copy import copy_frame_into
+from repositories.typed_fetch import fetch_typed
+
+
+SIM_SCHEMA = (
+    ("part_no", "str"),
+    ("forecast_date", "date"),
+    ("part_demand", "float"),
+    ("incoming_qty", "float"),
+    ("stock_qty", "float"),
+    ("safety_qty", "float"),
+    ("start_available", "float"),
+    ("end_available", "float"),
+    ("below_safety", "int"),
+    ("below_zero", "int"),
+    ("shortage_qty", "float"),
+    ("recommended_po_qty", "float"),
+    ("suggested_order_date", "date"),
+    ("required_eta_date", "date"),
+)
+SIM_COLUMNS = tuple(name for name, _ in SIM_SCHEMA)
+
+PO_SUMMARY_SCHEMA = (
+    ("part_no", "str"),
+    ("total_recommended_qty", "float"),
+    ("first_shortage_date", "date"),
+    ("first_suggested_order_date", "date"),
+    ("first_required_eta", "date"),
+    ("max_shortage_qty", "float"),
+    ("days_below_safety", "int"),
+    ("days_below_zero", "int"),
+    ("min_available", "float"),
+)
+
+PART_RISK_SCHEMA = (
+    ("part_no", "str"),
+    ("days_below_safety", "int"),
+    ("days_below_zero", "int"),
+    ("min_available", "float"),
+    ("max_shortage_qty", "float"),
+    ("total_recommended_qty", "float"),
+)
+
+FORECAST_SCHEMA = (
+    ("forecast_date", "date"),
+    ("product_id", "int"),
+    ("forecast_demand_qty", "int"),
+    ("parts_per_unit", "float"),
+)
+
+
+@timed_query
+def get_latest_planning_run(pg_conn):
+    """
+    最新一次完成的 run（走 idx_planning_runs_completed），沒有時回傳 None。
+    """
+    sql = """
+    SELECT run_id, started_at, finished_at, input_version, sim_rows, po_rows, duration_seconds
+    FROM planning_runs
+    WHERE status = 'completed'
+    ORDER BY run_id DESC
+    LIMIT 1;
+    """
+    with pg_conn.cursor() as cur:
+        cur.execute(sql)
+        row = cur.fetchone()
+        names = [d[0] for d in cur.description]
+
+    return dict(zip(names, row)) if row is not None else None
+
+
+def insert_planning_run(pg_conn, started_at, input_version, sim_df, po_summary_df, forecast_df, duration_seconds):
+    """
+    在目前的交易中寫入一次完成的 run 與其結果，回傳 run_id；由呼叫端 commit。
+    """
+    with pg_conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO planning_runs (started_at, status, input_version, sim_rows, po_rows, duration_seconds)
+            VALUES (%s, 'completed', %s, %s, %s, %s)
+            RETURNING run_id;
+            """,
+            (started_at, input_version, len(sim_df), len(po_summary_df), duration_seconds),
+        )
+        run_id = cur.fetchone()[0]
+
+    copy_frame_into(pg_conn, "planning_run_sim", sim_df.assign(run_id=run_id), ("run_id",) + SIM_COLUMNS)
+    copy_frame_into(
+        pg_conn,
+        "planning_run_po_summary",
+        po_summary_df.reset_index(drop=True).assign(run_id=run_id, rank=lambda df: df.index + 1),
+        ("run_id", "rank") + tuple(name for name, _ in PO_SUMMARY_SCHEMA),
+    )
+    copy_frame_into(
+        pg_conn,
+        "planning_run_forecast",
+        forecast_df.assign(run_id=run_id),
+        ("run_id",) + tuple(name for name, _ in FORECAST_SCHEMA),
+    )
+    return run_id
+
+
+def insert_failed_planning_run(pg_conn, started_at, input_version, error, duration_seconds):
+    with pg_conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO planning_runs (started_at, status, input_version, duration_seconds, error)
+            VALUES (%s, 'failed', %s, %s, %s);
+            """,
+            (started_at, input_version, duration_seconds, error),
+        )
+
+
+def prune_planning_runs(pg_conn, keep):
+    """
+    只保留最近 keep 次 run（結果表以 ON DELETE CASCADE 一併刪除）。
+    """
+    with pg_conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM planning_runs
+            WHERE run_id < (
+                SELECT MIN(run_id) FROM (
+                    SELECT run_id FROM planning_runs ORDER BY run_id DESC LIMIT %s
+                ) AS recent
+            );
+            """,
+            (keep,),
+        )
+        return cur.rowcount
+
+
+@timed_query
+def get_run_part_risk_df(pg_conn, run_id):
+    # 各零件的風險彙總直接在 DB 端以 (run_id, ...) 主鍵範圍彙總，不需要取回整個模擬格；
+    # 以位元組順序排序，與 pandas groupby 的順序一致
+    sql = """
+    SELECT
+        part_no,
+        COUNT(*) FILTER (WHERE below_safety)::bigint AS days_below_safety,
+        COUNT(*) FILTER (WHERE below_zero)::bigint AS days_below_zero,
+        MIN(end_available) AS min_available,
+        MAX(shortage_qty) AS max_shortage_qty,
+        SUM(recommended_po_qty) AS total_recommended_qty
+    FROM planning_run_sim
+    WHERE run_id = %s
+    GROUP BY part_no
+    ORDER BY part_no COLLATE "C";
+    """
+    return fetch_typed(pg_conn, sql, PART_RISK_SCHEMA, params=(run_id,))
+
+
+@timed_query
+def get_run_po_summary_df(pg_conn, run_id):
+    sql = """
+    SELECT part_no, total_recommended_qty, first_shortage_date, first_suggested_order_date,
+           first_required_eta, max_shortage_qty, days_below_safety, days_below_zero, min_available
+    FROM planning_run_po_summary
+    WHERE run_id = %s
+    ORDER BY rank;
+    """
+    return fetch_typed(pg_conn, sql, PO_SUMMARY_SCHEMA, params=(run_id,))
+
+
+@timed_query
+def get_run_forecast_df(pg_conn, run_id):
+    sql = """
+    SELECT forecast_date, product_id, forecast_demand_qty, parts_per_unit
+    FROM planning_run_forecast
+    WHERE run_id = %s
+    ORDER BY forecast_date, product_id;
+    """
+    return fetch_typed(pg_conn, sql, FORECAST_SCHEMA, params=(run_id,))
+
+
+@timed_query
+def get_run_sim_df(pg_conn, run_id, part_no=None):
+    """
+    完整模擬格（或單一零件），給診斷 / 匯出用；dashboard 不需要。
+    """
+    # typed_fetch 沒有 bool 欄位，布林值以 0 / 1 取回後再轉型
+    columns = [f"{name}::int AS {name}" if kind == "int" else name for name, kind in SIM_SCHEMA]
+    sql = f"""
+    SELECT {', '.join(columns)}
+    FROM planning_run_sim
+    WHERE run_id = %s
+    """
+    params = [run_id]
+    if part_no is not None:
+        sql += " AND part_no = %s"
+        params.append(part_no)
+    sql += " ORDER BY part_no, forecast_date"
+
+    sim = fetch_typed(pg_conn, sql, SIM_SCHEMA, params=tuple(params))
+    sim["below_safety"] = sim["below_safety"].astype(bool)
+    sim["below_zero"] = sim["below_zero"].astype(bool)
+    return sim
\ No newline at end of file
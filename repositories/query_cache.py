@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import QUERY_CACHE_MAX_ENTRIES
+
+
+class QueryCache:
+    """
+    查詢結果快取：每個 key 各自的 TTL + 容量上限（LRU 淘汰）。
+    有提供 watermark 時，只要 watermark 相同就視為有效（TTL 只作為最長保留時間）。
+
+    快取值會被多個 request 共用，呼叫端不可就地修改回傳的 DataFrame。
+    """
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at, watermark)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._stats = {}
+
+    def _counter(self, key):
+        return self._stats.setdefault(key, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0})
+
+    def _lookup(self, key, watermark=None):
+        # 呼叫端需持有 self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        value, expires_at, cached_watermark = entry
+        if time.monotonic() >= expires_at or cached_watermark != watermark:
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key, watermark=None):
+        with self._lock:
+            found, value = self._lookup(key, watermark)
+            self._counter(key)["hits" if found else "misses"] += 1
+            return found, value
+
+    def put(self, key, value, ttl, watermark=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl, watermark)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._counter(evicted_key)["evictions"] += 1
+
+    def fetch(self, key, ttl, loader, watermark=None):
+        """
+        命中時直接回傳；未命中時呼叫 loader()。同一個 key 同時只會有一個 loader 在執行，
+        其他 thread 等它完成後直接取用結果。
+        回傳 (value, loaded)，loaded=True 代表這次實際執行了 loader。
+        """
+        found, value = self.get(key, watermark)
+        if found:
+            return value, False
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                found, value = self._lookup(key, watermark)
+            if found:
+                return value, False
+
+            value = loader()
+            self.put(key, value, ttl, watermark)
+            return value, True
+
+    def get_or_load(self, key, ttl, loader, watermark=None):
+        return self.fetch(key, ttl, loader, watermark)[0]
+
+    def invalidate(self, *keys):
+        """
+        不指定 key 時清空整個快取。
+        """
+        with self._lock:
+            targets = list(self._entries) if not keys else [k for k in keys if k in self._entries]
+            for key in targets:
+                del self._entries[key]
+                self._counter(key)["invalidations"] += 1
+            return targets
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            keys = {}
+            for key, counter in self._stats.items():
+                total = counter["hits"] + counter["misses"]
+                entry = self._entries.get(key)
+                keys[key] = {
+                    **counter,
+                    "hit_ratio": round(counter["hits"] / total, 3) if total else 0.0,
+                    "cached": entry is not None and entry[1] > now,
+                    "ttl_remaining_seconds": round(max(0.0, entry[1] - now), 3) if entry else 0.0,
+                    "watermark": str(entry[2]) if entry and entry[2] is not None else None,
+                }
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "keys": keys,
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,20 @@
+"""
+DATA_BACKEND=sql（預設）：ERP / IoT 在 MySQL，訂單彙總在 PostgreSQL。
+只是把既有的 repository 函式與連線池組成 backend 介面（見 repositories.backend）。
+"""
+from db.mysql import mysql_connection
+from db.postgres import pg_connection
+from repositories.erp_repository import get_bom_df, get_incoming_purchase_df, get_parts_df
+from repositories.iot_repository import (
+    get_iot_since_id,
+    get_iot_since_time,
+    get_latest_iot_id,
+    get_recent_iot_df,
+    iter_recent_iot_chunks,
+)
+from repositories.transaction_repository import get_order_history_df, iter_order_history_chunks
+from repositories.watermark_repository import probe_erp_watermarks, probe_order_watermarks, verify_erp_checksums
+
+erp_connection = mysql_connection
+iot_connection = mysql_connection
+orders_connection = pg_connection
\ No newline at end of file
@@ -1,18 +1,47 @@
-import pandas as pd
-from config.settings import LOOKBACK_DAYS
+from config.settings import LOOKBACK_DAYS, FETCH_CHUNK_SIZE, ORDER_HISTORY_FETCH_MODE
+from observability.metrics import timed_query
+from repositories.pg_copy import copy_query_to_frame
+from repositories.typed_fetch import fetch_typed, iter_typed_chunks
 
 
-def get_order_history_df(pg_conn):
-    sql = f"""
+ORDER_HISTORY_SCHEMA = (
+    ("order_date", "date"),
+    ("product_id", "int"),
+    ("qty", "float"),
+)
+
+
+def _order_history_sql():
+    # daily_product_demand 由 trigger 維護（postgres/daily_product_demand.sql），
+    # 以 (order_date, product_id) 主鍵做 range scan，不需每次重新 JOIN / GROUP BY
+    return f"""
     SELECT
-        DATE(o.created_at) AS order_date,
-        oi.product_id AS product_id,
-        SUM(oi.quantity) AS qty
-    FROM orders o
-    JOIN order_items oi ON o.id = oi.order_id
-    WHERE o.status != 'cancelled'
-      AND o.created_at >= NOW() - INTERVAL '{LOOKBACK_DAYS} days'
-    GROUP BY DATE(o.created_at), oi.product_id
+        order_date,
+        product_id::bigint AS product_id,
+        qty::double precision AS qty
+    FROM daily_product_demand
+    WHERE order_date >= CURRENT_DATE - {LOOKBACK_DAYS}
+      AND qty <> 0
     ORDER BY order_date;
     """
-    return pd.read_sql(sql, pg_conn)
\ No newline at end of file
+
+
+@timed_query
+def get_order_history_df(pg_conn, fetch_mode=ORDER_HISTORY_FETCH_MODE):
+    """
+    fetch_mode:
+    - "stream": server-side cursor + typed 解碼
+    - "copy_binary" / "copy_csv": COPY (SELECT ...) TO STDOUT 一次取回後欄位式解析
+    """
+    if fetch_mode == "stream":
+        return fetch_typed(pg_conn, _order_history_sql(), ORDER_HISTORY_SCHEMA)
+    if fetch_mode == "copy_binary":
+        return copy_query_to_frame(pg_conn, _order_history_sql(), ORDER_HISTORY_SCHEMA, fmt="binary")
+    if fetch_mode == "copy_csv":
+        return copy_query_to_frame(pg_conn, _order_history_sql(), ORDER_HISTORY_SCHEMA, fmt="csv")
+    raise ValueError(f"unknown order history fetch mode: {fetch_mode}")
+
+
+@timed_query
+def iter_order_history_chunks(pg_conn, chunk_size=FETCH_CHUNK_SIZE):
+    return iter_typed_chunks(pg_conn, _order_history_sql(), ORDER_HISTORY_SCHEMA, chunk_size)
@@ -0,0 +1,189 @@
+import itertools
+import math
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import psycopg2.extensions
+import pymysql.connections
+import pymysql.cursors
+
+from config.settings import FETCH_CHUNK_SIZE
+
+
+# kind -> numpy dtype；"category" / "str" 以 object 暫存後另外處理
+KIND_DTYPES = {
+    "int": np.int64,
+    "float": np.float64,
+    "date": "datetime64[D]",
+    "datetime": "datetime64[us]",
+}
+
+_cursor_ids = itertools.count(1)
+
+
+class _ColumnBuilder:
+    """
+    逐 chunk 把 driver 回傳的值直接寫進預先配置的 typed array，
+    容量不足時倍增，不經過 pandas 的 object dtype 推論。
+    """
+
+    def __init__(self, kind, capacity):
+        if kind not in KIND_DTYPES and kind not in ("category", "str"):
+            raise ValueError(f"unknown column kind: {kind}")
+
+        self.kind = kind
+        self.size = 0
+        self.has_null = False
+
+        if kind == "category":
+            self.codes = np.empty(capacity, dtype=np.int32)
+            self.categories = {}
+        elif kind == "str":
+            self.values = np.empty(capacity, dtype=object)
+        else:
+            self.values = np.empty(capacity, dtype=KIND_DTYPES[kind])
+            if kind == "int":
+                self.mask = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed):
+        target = self.size + needed
+        buf = self.codes if self.kind == "category" else self.values
+        if target <= len(buf):
+            return
+
+        new_capacity = max(target, len(buf) * 2)
+        if self.kind == "category":
+            self.codes = np.resize(self.codes, new_capacity)
+        else:
+            self.values = np.resize(self.values, new_capacity)
+            if self.kind == "int":
+                self.mask = np.resize(self.mask, new_capacity)
+
+    def append(self, values):
+        n = len(values)
+        self._grow(n)
+        start, stop = self.size, self.size + n
+
+        if self.kind == "float":
+            self.values[start:stop] = np.fromiter(
+                (math.nan if v is None else v for v in values), dtype=np.float64, count=n
+            )
+        elif self.kind == "int":
+            nulls = np.fromiter((v is None for v in values), dtype=bool, count=n)
+            if nulls.any():
+                self.has_null = True
+                self.mask[start:stop] = nulls
+            self.values[start:stop] = np.fromiter(
+                (0 if v is None else v for v in values), dtype=np.int64, count=n
+            )
+        elif self.kind == "category":
+            lookup = self.categories
+            self.codes[start:stop] = np.fromiter(
+                (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values),
+                dtype=np.int32,
+                count=n,
+            )
+        elif self.kind == "str":
+            self.values[start:stop] = values
+        else:
+            # date / datetime：None 會轉成 NaT
+            self.values[start:stop] = np.array(values, dtype=KIND_DTYPES[self.kind])
+
+        self.size = stop
+
+    def finish(self):
+        n = self.size
+
+        if self.kind == "category":
+            # categories 依值排序，讓 sort_values / groupby 的順序與字串欄位一致
+            categories = sorted(self.categories, key=self.categories.get)
+            order = np.argsort(np.array(categories, dtype=object), kind="stable")
+            remap = np.empty(len(categories) + 1, dtype=np.int32)
+            remap[order] = np.arange(len(categories), dtype=np.int32)
+            remap[-1] = -1
+            return pd.Categorical.from_codes(
+                remap[self.codes[:n]],
+                categories=[categories[i] for i in order],
+            )
+        if self.kind == "int" and self.has_null:
+            return pd.arrays.IntegerArray(self.values[:n], self.mask[:n])
+        if self.kind in ("date", "datetime"):
+            return self.values[:n].astype("datetime64[ns]")
+        return self.values[:n]
+
+
+@contextmanager
+def stream_cursor(conn):
+    """
+    Unbuffered cursor：pymysql 用 SSCursor、psycopg2 用 named (server-side) cursor，
+    資料以 fetchmany 分批從 server 取回，不會在 client 端整批暫存。
+    """
+    if isinstance(conn, pymysql.connections.Connection):
+        cur = conn.cursor(pymysql.cursors.SSCursor)
+    elif isinstance(conn, psycopg2.extensions.connection):
+        cur = conn.cursor(name=f"typed_fetch_{next(_cursor_ids)}")
+        cur.itersize = FETCH_CHUNK_SIZE
+    else:
+        cur = conn.cursor()
+
+    try:
+        yield cur
+    finally:
+        cur.close()
+
+
+def empty_frame(schema):
+    return pd.DataFrame({
+        name: _ColumnBuilder(kind, 0).finish()
+        for name, kind in schema
+    })
+
+
+def frame_from_chunks(chunks, schema, capacity=FETCH_CHUNK_SIZE):
+    """
+    chunks: 可迭代的 row tuple 批次；欄位順序需與 schema 一致。
+    """
+    builders = [_ColumnBuilder(kind, capacity) for _, kind in schema]
+
+    for rows in chunks:
+        if not rows:
+            continue
+        for builder, values in zip(builders, zip(*rows)):
+            builder.append(values)
+
+    return pd.DataFrame({
+        name: builder.finish()
+        for (name, _), builder in zip(schema, builders)
+    })
+
+
+def iter_row_chunks(cur, chunk_size=FETCH_CHUNK_SIZE):
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def fetch_typed(conn, sql, schema, chunk_size=FETCH_CHUNK_SIZE, params=None):
+    """
+    依 schema 直接把查詢結果解碼成 typed numpy 欄位：
+    schema = (("part_no", "str"), ("stock_qty", "float"), ...)
+    kind: int / float / category / str / date / datetime
+    """
+    with stream_cursor(conn) as cur:
+        cur.execute(sql.strip().rstrip(";"), params)
+        return frame_from_chunks(iter_row_chunks(cur, chunk_size), schema, chunk_size)
+
+
+def iter_typed_chunks(conn, sql, schema, chunk_size=FETCH_CHUNK_SIZE, params=None):
+    """
+    與 fetch_typed 相同的解碼方式，但每批 chunk_size 筆就 yield 一個 typed DataFrame，
+    呼叫端以累計值逐批處理，峰值記憶體只與 chunk_size 有關。
+    連線在 generator 消耗完之前不可再執行其他查詢。
+    """
+    with stream_cursor(conn) as cur:
+        cur.execute(sql.strip().rstrip(";"), params)
+        for rows in iter_row_chunks(cur, chunk_size):
+            yield frame_from_chunks([rows], schema, len(rows))
@@ -0,0 +1,66 @@
+"""
+變更偵測 probe：在昂貴的查詢之前，用一次 round trip 取得各資料表的 watermark。
+watermark 沒變代表資料沒變，可以跳過完整讀取。
+
+- ERP：各資料表的 COUNT(*) 與 MAX(updated_at)（mysql/erp_change_tracking.sql），
+  updated_at 由 MySQL 在寫入該筆資料時維護，有索引，寫入端沒有額外的共用計數列
+- 訂單：trigger 維護的 daily_product_demand 彙總表
+- verify_erp_checksums 會掃描全表，只用於低頻率的完整驗證（見 data_loader）
+"""
+from observability.metrics import timed_query
+
+
+ERP_WATERMARK_TABLES = ("bom_header", "bom_detail", "parts", "purchase")
+
+
+def _fetch_named_row(conn, sql):
+    with conn.cursor() as cur:
+        cur.execute(sql)
+        row = cur.fetchone()
+        names = [d[0] for d in cur.description]
+
+    return dict(zip(names, row))
+
+
+@timed_query
+def probe_erp_watermarks(mysql_conn):
+    # MAX(updated_at) 只讀 updated_at 索引的最後一筆；COUNT(*) 走最小的索引（不讀資料列、不加鎖），
+    # 涵蓋 MAX 看不到的刪除
+    columns = [
+        f"(SELECT CONCAT_WS(':', COUNT(*), COALESCE(MAX(updated_at), '')) FROM {table}) AS {table}"
+        for table in ERP_WATERMARK_TABLES
+    ]
+    return _fetch_named_row(mysql_conn, "SELECT " + ", ".join(columns) + ";")
+
+
+@timed_query
+def verify_erp_checksums(mysql_conn):
+    """
+    全表 checksum：涵蓋 updated_at 看不到的變更（例如匯入時明確指定舊的 updated_at），
+    成本與資料量成正比，不可放在每次 probe。
+    """
+    sql = """
+    SELECT
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('|', bom_id, product_code))), 0))
+         FROM bom_header) AS bom_header,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('|', id, bom_id, part_no, qty))), 0))
+         FROM bom_detail) AS bom_detail,
+        (SELECT CONCAT_WS(':', COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('|', part_no, stock_qty, safety_stock))), 0))
+         FROM parts) AS parts,
+        (SELECT CONCAT_WS(':', COUNT(*),
+                COALESCE(SUM(CRC32(CONCAT_WS('|', id, part_no, delivery_date, order_qty, status))), 0))
+         FROM purchase) AS purchase;
+    """
+    return _fetch_named_row(mysql_conn, sql)
+
+
+@timed_query
+def probe_order_watermarks(pg_conn):
+    # 彙總表很小，且每次異動都會更新 updated_at，不必掃描 orders / order_items
+    sql = """
+    SELECT
+        COUNT(*) || ':' || COALESCE(SUM(qty), 0) || ':' || COALESCE(MAX(updated_at)::text, '')
+            AS daily_product_demand
+    FROM daily_product_demand;
+    """
+    return _fetch_named_row(pg_conn, sql)
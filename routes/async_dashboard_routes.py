@@ -0,0 +1,151 @@
+"""
+ASGI（Quart）版本的 dashboard / IoT 路由，由 asgi.py 註冊；與 Flask 版共用 section 定義與回應邏輯。
+
+- event loop 只負責連線：snapshot 讀取 / 序列化 / 壓縮與阻塞的 DB driver 都放到 ASYNC_EXECUTOR_WORKERS 的 thread pool
+- SSE 連線等待事件時不占用 thread（AsyncSubscriber + asyncio.Queue），同一個 process 可維持大量連線
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Blueprint, Response, abort, g, request
+
+from config.settings import ASYNC_EXECUTOR_WORKERS, IOT_STREAM_HEARTBEAT_SECONDS, IOT_STREAM_QUEUE_SIZE
+from observability.metrics import CONTENT_TYPE
+from observability.tracing import start_trace
+from routes.dashboard_routes import DASHBOARD_ENDPOINTS
+from routes.iot_routes import delta_args, sse_message, stream_cursor
+from routes.metrics_routes import observe_request, render_metrics
+from routes.responses import build_response, render_payload, render_snapshot, wants_columnar, wants_trace
+from routes.system_routes import SYSTEM_ROUTES
+from services.iot_stream import AsyncSubscriber, current_health, iot_broadcaster, load_iot_delta
+
+async_dashboard_bp = Blueprint("async_dashboard", __name__)
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix="dashboard-async")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    在 thread pool 執行阻塞函式；複製 contextvars，thread 內仍可讀取目前的 request。
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+async def _json(payload, status=200):
+    rendered = await run_blocking(render_payload, payload)
+    return build_response(rendered, False, request, Response, status)
+
+
+@async_dashboard_bp.route("/api/dashboard", defaults={"name": "dashboard"})
+@async_dashboard_bp.route("/api/dashboard/<name>")
+async def api_dashboard(name):
+    if name not in DASHBOARD_ENDPOINTS:
+        abort(404)
+
+    snapshots, build, columnar_build = DASHBOARD_ENDPOINTS[name]
+    columnar = columnar_build is not None and wants_columnar(request)
+    with start_trace("request"):
+        rendered, cache_hit, metas = await run_blocking(
+            render_snapshot, name, snapshots, build, columnar_build, columnar, trace=wants_trace(request)
+        )
+        # 壓縮結果依 snapshot 快取，只有第一次需要實際壓縮
+        return await run_blocking(build_response, rendered, cache_hit, request, Response, metas=metas)
+
+
+@async_dashboard_bp.route("/api/iot/stream")
+async def api_iot_stream():
+    """
+    與 Flask 版 /api/iot/stream 相同的事件格式；等待事件時不占用 thread。
+    """
+    since = stream_cursor(request)
+    subscriber = AsyncSubscriber(asyncio.get_running_loop(), IOT_STREAM_QUEUE_SIZE)
+    _, cursor = await run_blocking(iot_broadcaster.subscribe, subscriber)
+
+    async def generate():
+        try:
+            yield f"retry: {int(IOT_STREAM_HEARTBEAT_SECONDS * 1000)}\n\n".encode()
+
+            if since is not None and since < cursor:
+                event = await run_blocking(iot_broadcaster.catch_up, since, cursor)
+                if event is None:
+                    yield sse_message("reset", {"cursor": cursor}).encode()
+                    return
+                event.update(await run_blocking(current_health))
+                yield sse_message("iot", event, event["cursor"]).encode()
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), IOT_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if subscriber.overflowed:
+                        yield sse_message("reset", {"cursor": None}).encode()
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+
+                yield sse_message("iot", event, event["cursor"]).encode()
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield sse_message("reset", {"cursor": None}).encode()
+                    return
+        finally:
+            iot_broadcaster.unsubscribe(subscriber)
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # 長連線，不套用 RESPONSE_TIMEOUT
+    response.timeout = None
+    return response
+
+
+@async_dashboard_bp.route("/api/iot")
+async def api_iot_delta():
+    """
+    增量輪詢，參數同 Flask 版 /api/iot；查詢在 thread pool 執行。
+    """
+    try:
+        since, machine_id, limit = delta_args(request)
+    except ValueError as e:
+        return await _json({"error": str(e)}, status=400)
+
+    payload = await run_blocking(load_iot_delta, since, machine_id=machine_id, limit=limit)
+    return await _json(payload)
+
+
+@async_dashboard_bp.route("/metrics")
+async def metrics():
+    body = await run_blocking(render_metrics)
+    return Response(body, content_type=CONTENT_TYPE)
+
+
+def _system_view(handler):
+    async def view():
+        try:
+            payload = await run_blocking(handler, request.args)
+        except ValueError as e:
+            return await _json({"error": str(e)}, status=400)
+        return await _json(payload)
+    return view
+
+
+# /api/system/* 與 Flask 版共用 handler（routes/system_routes.py）
+for _rule, _methods, _handler in SYSTEM_ROUTES:
+    async_dashboard_bp.add_url_rule(_rule, _handler.__name__, _system_view(_handler), methods=list(_methods))
+
+
+@async_dashboard_bp.before_app_request
+async def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@async_dashboard_bp.after_app_request
+async def _observe_request(response):
+    observe_request(request, response, g.pop("request_started", None))
+    return response
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+圖表序列用的 columnar 二進位格式（JSON header + typed buffers），由 dashboard.js 以 TypedArray 解碼：
+
+    "MRPC" | uint32 header 長度 (LE) | header JSON (UTF-8) | 補 0 到 8 bytes 對齊 | buffers
+
+header = {"version": 1, "columns": [{"dtype", "offset", "length"}, ...], "payload": {...}}
+payload 中的 numpy 陣列被替換成 {"$col": i}，其餘欄位照常以 JSON 表示：
+
+- datetime64 -> int64 epoch milliseconds
+- 整數 -> int32
+- 浮點數 -> float32
+每個 buffer 的 offset（相對於 buffers 起點）都對齊 8 bytes，可直接建立 TypedArray view。
+"""
+import struct
+
+import numpy as np
+
+COLUMNAR_MIMETYPE = "application/vnd.mrp.columnar"
+COLUMNAR_MAGIC = b"MRPC"
+COLUMNAR_VERSION = 1
+
+
+def _align(n, size=8):
+    return (n + size - 1) // size * size
+
+
+def _column(value):
+    kind = value.dtype.kind
+    if kind == "M":
+        return "int64", value.astype("datetime64[ms]").astype("<i8")
+    if kind in "iub":
+        return "int32", value.astype("<i4")
+    if kind == "f":
+        return "float32", value.astype("<f4")
+    return None, None
+
+
+def split_columns(payload):
+    """
+    把 payload 中的 numpy 陣列抽成 buffers，回傳 (columns, buffers, 以 {"$col": i} 取代後的 payload)。
+    """
+    columns = []
+    buffers = []
+    offset = 0
+
+    def walk(value):
+        nonlocal offset
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [walk(item) for item in value]
+        if isinstance(value, np.ndarray) and value.ndim == 1:
+            dtype, data = _column(value)
+            if dtype is None:
+                return value.tolist()
+
+            raw = np.ascontiguousarray(data).tobytes()
+            columns.append({"dtype": dtype, "offset": offset, "length": int(len(data))})
+            buffers.append(raw)
+            padded = _align(len(raw))
+            if padded > len(raw):
+                buffers.append(b"\0" * (padded - len(raw)))
+            offset += padded
+            return {"$col": len(columns) - 1}
+        return value
+
+    return columns, buffers, walk(payload)
+
+
+def pack_columnar(columns, buffers, payload, dumps):
+    """
+    dumps: header JSON 的序列化函式（回傳 bytes），與 JSON 回應共用。
+    """
+    header = dumps({
+        "version": COLUMNAR_VERSION,
+        "columns": columns,
+        "payload": payload,
+    })
+
+    prefix_len = len(COLUMNAR_MAGIC) + 4 + len(header)
+    padding = b"\0" * (_align(prefix_len) - prefix_len)
+    return b"".join([COLUMNAR_MAGIC, struct.pack("<I", len(header)), header, padding, *buffers])
+
+
+def encode_columnar(payload, dumps):
+    return pack_columnar(*split_columns(payload), dumps)
\ No newline at end of file
@@ -1,9 +1,121 @@
-from flask import Blueprint, jsonify
-from services.dashboard_service import build_dashboard_data
+import numpy as np
+from flask import Blueprint
+from routes.responses import snapshot_response
+from services.dashboard_service import build_forecast_section, build_kpi, compose_dashboard
+from services.snapshot_service import iot_snapshot, plan_snapshot
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
 
+# 各 section 讀取共用的 snapshot（背景 worker / single-flight 重算）：
+# iot 每幾秒更新，plan（forecast / MRP）依 DASHBOARD_PLAN_REFRESH_SECONDS 低頻率更新。
+# 回應依 snapshot 快取序列化結果並帶 ETag，內容沒變時回 304。
+# iot / forecast 的圖表序列可用 columnar 二進位格式取得（見 routes/columnar.py）。
+def _kpi_section(plan, iot):
+    if "error" in plan:
+        return {"error": plan["error"]}
+    return {
+        "updated_at": iot["updated_at"],
+        "kpi": build_kpi(plan, iot),
+    }
+
+
+def _iot_section(iot):
+    return {
+        "updated_at": iot["updated_at"],
+        "health": iot["health"],
+        "machine_health": iot["machine_health"],
+        "machines": iot["machines"],
+        "machine_ids": iot["machine_ids"],
+        "cursor": iot["cursor"],
+        "lookback_hours": iot["lookback_hours"],
+        "warnings": iot["warnings"],
+    }
+
+
+def _forecast_section(plan, iot):
+    if "error" in plan:
+        return {"error": plan["error"]}
+    forecast = build_forecast_section(plan, iot)
+    return {
+        "updated_at": plan["updated_at"],
+        "compare": forecast["compare"],
+        "summary": forecast["summary"],
+    }
+
+
+def _forecast_section_columnar(plan, iot):
+    payload = _forecast_section(plan, iot)
+    if "error" in payload:
+        return payload
+
+    compare = payload["compare"]
+    payload["compare"] = {
+        "x": np.array(compare["x"], dtype="datetime64[ms]"),
+        "demand": np.asarray(compare["demand"], dtype="int32"),
+        "output": np.asarray(compare["output"], dtype="int32"),
+        "gap": np.asarray(compare["gap"], dtype="int32"),
+    }
+    return payload
+
+
+def _mrp_section(plan):
+    if "error" in plan:
+        return {"error": plan["error"]}
+    return {
+        "updated_at": plan["updated_at"],
+        "risk_parts": plan["risk_parts"],
+        "kpi": plan["kpi"],
+        "warnings": plan["warnings"],
+    }
+
+
+def _po_section(plan):
+    if "error" in plan:
+        return {"error": plan["error"]}
+    return {
+        "updated_at": plan["updated_at"],
+        "po": plan["po"],
+        "po_table": plan["po_table"],
+    }
+
+
+# endpoint 名稱 -> (來源 snapshots, build, columnar_build)；async 路由（routes/async_dashboard_routes.py）共用
+DASHBOARD_ENDPOINTS = {
+    "dashboard": ((plan_snapshot, iot_snapshot), compose_dashboard, None),
+    "kpi": ((plan_snapshot, iot_snapshot), _kpi_section, None),
+    "iot": ((iot_snapshot,), _iot_section, _iot_section),
+    "forecast": ((plan_snapshot, iot_snapshot), _forecast_section, _forecast_section_columnar),
+    "mrp": ((plan_snapshot,), _mrp_section, None),
+    "po": ((plan_snapshot,), _po_section, None),
+}
+
+
 @dashboard_bp.route("/api/dashboard")
 def api_dashboard():
-    return jsonify(build_dashboard_data())
\ No newline at end of file
+    return snapshot_response("dashboard", *DASHBOARD_ENDPOINTS["dashboard"])
+
+
+@dashboard_bp.route("/api/dashboard/kpi")
+def api_dashboard_kpi():
+    return snapshot_response("kpi", *DASHBOARD_ENDPOINTS["kpi"])
+
+
+@dashboard_bp.route("/api/dashboard/iot")
+def api_dashboard_iot():
+    return snapshot_response("iot", *DASHBOARD_ENDPOINTS["iot"])
+
+
+@dashboard_bp.route("/api/dashboard/forecast")
+def api_dashboard_forecast():
+    return snapshot_response("forecast", *DASHBOARD_ENDPOINTS["forecast"])
+
+
+@dashboard_bp.route("/api/dashboard/mrp")
+def api_dashboard_mrp():
+    return snapshot_response("mrp", *DASHBOARD_ENDPOINTS["mrp"])
+
+
+@dashboard_bp.route("/api/dashboard/po")
+def api_dashboard_po():
+    return snapshot_response("po", *DASHBOARD_ENDPOINTS["po"])
\ No newline at end of file
@@ -0,0 +1,117 @@
+import queue
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, request
+from config.settings import IOT_LOOKBACK_HOURS, IOT_STREAM_BATCH_LIMIT, IOT_STREAM_HEARTBEAT_SECONDS
+from routes.responses import dumps, json_response
+from services.iot_stream import current_health, iot_broadcaster, load_iot_delta
+
+iot_bp = Blueprint("iot", __name__)
+
+
+def sse_message(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {dumps(data).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_cursor(req):
+    # EventSource 自動重連時會帶 Last-Event-ID，優先於 URL 上的 since
+    value = req.headers.get("Last-Event-ID") or req.args.get("since")
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+@iot_bp.route("/api/iot/stream")
+def api_iot_stream():
+    """
+    Server-Sent Events：只推送新寫入的 IoT 點與最新的健康度。
+
+    - event: iot   -> {"from", "cursor", "machines", "health", "machine_health"}
+    - event: reset -> 落後太多，前端需重新載入 /api/dashboard/iot 後再連線
+    """
+    since = stream_cursor(request)
+    subscriber, cursor = iot_broadcaster.subscribe()
+
+    def generate():
+        try:
+            yield f"retry: {int(IOT_STREAM_HEARTBEAT_SECONDS * 1000)}\n\n"
+
+            if since is not None and since < cursor:
+                event = iot_broadcaster.catch_up(since, cursor)
+                if event is None:
+                    yield sse_message("reset", {"cursor": cursor})
+                    return
+                event.update(current_health())
+                yield sse_message("iot", event, event["cursor"])
+
+            while True:
+                try:
+                    event = subscriber.queue.get(timeout=IOT_STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    if subscriber.overflowed:
+                        yield sse_message("reset", {"cursor": None})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield sse_message("iot", event, event["cursor"])
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield sse_message("reset", {"cursor": None})
+                    return
+        finally:
+            iot_broadcaster.unsubscribe(subscriber)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _parse_since(value):
+    """
+    純數字視為 machine_data.id；"時間,id" 為 /api/iot 回傳的時間游標；
+    其餘以 ISO 時間解析（例如 2024-05-01T08:00:00）。
+    """
+    if value.isdigit():
+        return int(value)
+    if "," in value:
+        created_at, row_id = value.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    return datetime.fromisoformat(value)
+
+
+def delta_args(req):
+    """
+    解析 /api/iot 的參數，回傳 (since, machine_id, limit)；since 格式錯誤時 raise ValueError。
+    """
+    since = req.args.get("since", "").strip()
+    try:
+        since = _parse_since(since) if since else datetime.now() - timedelta(hours=IOT_LOOKBACK_HOURS)
+    except ValueError:
+        raise ValueError(f"invalid since: {since!r}")
+
+    limit = min(max(req.args.get("limit", IOT_STREAM_BATCH_LIMIT, type=int), 1), IOT_STREAM_BATCH_LIMIT)
+    machine_id = req.args.get("machine_id") or None
+    return since, machine_id, limit
+
+
+@iot_bp.route("/api/iot")
+def api_iot_delta():
+    """
+    增量輪詢：/api/iot?since=<id 或時間>[&machine_id=M-01][&limit=N]
+    回傳 since 之後的資料（格式同 charts.iot.machines）與下一次要帶的 cursor。
+    未指定 since 時從 IOT_LOOKBACK_HOURS 前開始。
+    """
+    try:
+        since, machine_id, limit = delta_args(request)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    return json_response(load_iot_delta(since, machine_id=machine_id, limit=limit))
\ No newline at end of file
@@ -0,0 +1,129 @@
+import time
+
+from flask import Blueprint, Response, g, request
+from observability.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY
+from repositories.query_cache import query_cache
+from routes.system_routes import existing_pool_stats
+from services.dashboard_service import DASHBOARD_PIPELINE
+from services.iot_stream import iot_broadcaster
+from services.snapshot_service import SNAPSHOTS
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _pool_metrics():
+    pools = existing_pool_stats()
+    return [
+        ("mrp_pool_connections", "gauge", "Pooled connections by state.", [
+            ({"pool": name, "state": state}, stats[state])
+            for name, stats in pools.items() for state in ("idle", "in_use")
+        ]),
+        ("mrp_pool_max_size", "gauge", "Maximum pool size.", [
+            ({"pool": name}, stats["max_size"]) for name, stats in pools.items()
+        ]),
+        ("mrp_pool_checkouts_total", "counter", "Connections checked out.", [
+            ({"pool": name}, stats["checkouts"]) for name, stats in pools.items()
+        ]),
+        ("mrp_pool_waits_total", "counter", "Checkouts that had to wait for a free connection.", [
+            ({"pool": name}, stats["waits"]) for name, stats in pools.items()
+        ]),
+        ("mrp_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.", [
+            ({"pool": name}, stats["wait_seconds_total"]) for name, stats in pools.items()
+        ]),
+        ("mrp_pool_timeouts_total", "counter", "Checkouts that timed out.", [
+            ({"pool": name}, stats["timeouts"]) for name, stats in pools.items()
+        ]),
+    ]
+
+
+def _cache_metrics():
+    keys = query_cache.stats()["keys"]
+    families = []
+    for field, documentation in (
+        ("hits", "Query cache hits."),
+        ("misses", "Query cache misses."),
+        ("evictions", "Query cache LRU evictions."),
+    ):
+        families.append((f"mrp_query_cache_{field}_total", "counter", documentation, [
+            ({"key": key}, counter[field]) for key, counter in keys.items()
+        ]))
+    families.append(("mrp_query_cache_hit_ratio", "gauge", "Query cache hit ratio since start.", [
+        ({"key": key}, counter["hit_ratio"]) for key, counter in keys.items()
+    ]))
+    return families
+
+
+def _pipeline_metrics():
+    stages = DASHBOARD_PIPELINE.stats()
+    return [
+        ("mrp_stage_cache_hits_total", "counter", "Pipeline stage outputs served from the memo.", [
+            ({"stage": name}, stats["hits"]) for name, stats in stages.items()
+        ]),
+        ("mrp_stage_cache_misses_total", "counter", "Pipeline stage recomputations.", [
+            ({"stage": name}, stats["runs"]) for name, stats in stages.items()
+        ]),
+    ]
+
+
+def _snapshot_metrics():
+    snapshots = {name: snapshot.stats() for name, snapshot in SNAPSHOTS.items()}
+    return [
+        ("mrp_snapshot_age_seconds", "gauge", "Age of the current dashboard snapshot.", [
+            ({"snapshot": name}, stats["age_seconds"]) for name, stats in snapshots.items()
+        ]),
+        ("mrp_snapshot_computations_total", "counter", "Snapshot recomputations in this process.", [
+            ({"snapshot": name}, stats["computations"]) for name, stats in snapshots.items()
+        ]),
+        ("mrp_snapshot_coalesced_total", "counter", "Requests that waited on an in-flight recomputation.", [
+            ({"snapshot": name}, stats["coalesced"]) for name, stats in snapshots.items()
+        ]),
+        ("mrp_snapshot_stale_served_total", "counter", "Requests served a stale snapshot.", [
+            ({"snapshot": name}, stats["stale_served"]) for name, stats in snapshots.items()
+        ]),
+    ]
+
+
+def _stream_metrics():
+    stats = iot_broadcaster.stats()
+    return [
+        ("mrp_iot_stream_subscribers", "gauge", "Connected IoT SSE clients.", [({}, stats["subscribers"])]),
+        ("mrp_iot_stream_events_total", "counter", "IoT events pushed.", [({}, stats["events"])]),
+        ("mrp_iot_stream_overflows_total", "counter", "Subscribers dropped for falling behind.", [({}, stats["overflows"])]),
+    ]
+
+
+for _collector in (_pool_metrics, _cache_metrics, _pipeline_metrics, _snapshot_metrics, _stream_metrics):
+    REGISTRY.register_collector(_collector)
+
+
+def observe_request(req, response, started):
+    """
+    Flask / Quart 共用：started 為 request 開始時的 perf_counter()。
+    """
+    if started is None:
+        return
+    # 以路由樣板作為 label，避免 label 數量隨 URL 無限增加
+    endpoint = req.url_rule.rule if req.url_rule is not None else "unmatched"
+    HTTP_REQUEST_SECONDS.labels(
+        endpoint=endpoint, method=req.method, status=response.status_code
+    ).observe(time.perf_counter() - started)
+
+
+@metrics_bp.before_app_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def _observe_request(response):
+    observe_request(request, response, g.pop("request_started", None))
+    return response
+
+
+def render_metrics():
+    return REGISTRY.render()
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+app.py（Flask）與 asgi.py（Quart）共用的路由註冊：兩個入口提供相同的 endpoint
+（dashboard sections、/api/iot、/api/iot/stream、/api/system/*、/metrics）與 request latency metrics。
+新增路由時兩邊的 blueprint 都要加上。
+"""
+
+
+def _flask_blueprints():
+    from routes.dashboard_routes import dashboard_bp
+    from routes.iot_routes import iot_bp
+    from routes.metrics_routes import metrics_bp
+    from routes.system_routes import system_bp
+
+    return (dashboard_bp, iot_bp, system_bp, metrics_bp)
+
+
+def _asgi_blueprints():
+    # quart 只有 ASGI 模式需要，延後 import
+    from routes.async_dashboard_routes import async_dashboard_bp
+
+    return (async_dashboard_bp,)
+
+
+def register_routes(app, asgi=False):
+    for blueprint in _asgi_blueprints() if asgi else _flask_blueprints():
+        app.register_blueprint(blueprint)
\ No newline at end of file
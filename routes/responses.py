@@ -0,0 +1,315 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+from flask import Response, request
+
+from observability.metrics import COMPRESS_SECONDS, PAYLOAD_BYTES, RENDER_CACHE, RESPONSE_BYTES, SERIALIZE_SECONDS
+from observability.tracing import add_span, current_trace, server_timing, span, start_trace
+from routes.columnar import COLUMNAR_MIMETYPE, pack_columnar, split_columns
+from config.settings import (
+    RESPONSE_COMPRESSION,
+    RESPONSE_COMPRESSION_MIN_BYTES,
+    GZIP_COMPRESS_LEVEL,
+    BROTLI_QUALITY,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 沒有 orjson 時退回標準函式庫
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+# 不影響內容是否變動的欄位，不列入 ETag（data_changed 只表示這次是否重新讀取，內容相同時也會變）
+VOLATILE_KEYS = ("updated_at", "snapshot", "data_changed")
+
+# endpoint -> (來源 snapshot 的 id, 來源值, _Rendered)
+_rendered = {}
+_rendered_lock = threading.Lock()
+
+
+def _default(value):
+    # orjson 已直接處理 numpy 陣列 / 純量，這裡只處理其餘型別與標準 json 的退路
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """
+    序列化成 UTF-8 bytes。有 orjson 時直接序列化 numpy 陣列，不需先 .tolist()。
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(req):
+    if not RESPONSE_COMPRESSION:
+        return None
+    accepted = req.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def wants_trace(req):
+    """
+    ?trace=1：回應 body 附上 trace（不快取、不帶 ETag）。
+    """
+    return req.args.get("trace") in ("1", "true")
+
+
+def wants_columnar(req):
+    """
+    client 以 Accept: application/vnd.mrp.columnar 或 ?format=columnar 要求二進位格式。
+    """
+    return (
+        req.args.get("format") == "columnar"
+        or req.accept_mimetypes[COLUMNAR_MIMETYPE] > req.accept_mimetypes["application/json"]
+    )
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+
+
+class _Rendered:
+    """
+    一份序列化結果與其壓縮版本；壓縮版本第一次被要求時才產生，之後重複使用。
+    """
+
+    def __init__(self, body, etag=None, serialize_seconds=0.0, mimetype="application/json"):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.serialize_seconds = serialize_seconds
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """
+        回傳 (body, 壓縮秒數)；不壓縮時回傳原始 body。
+        """
+        if encoding is None or len(self.body) < RESPONSE_COMPRESSION_MIN_BYTES:
+            return self.body, 0.0
+
+        with self._lock:
+            if encoding in self._encoded:
+                return self._encoded[encoding], 0.0
+
+            started = time.perf_counter()
+            body = _compress(self.body, encoding)
+            elapsed = time.perf_counter() - started
+            COMPRESS_SECONDS.labels(encoding=encoding).observe(elapsed)
+            add_span("compress", elapsed, encoding=encoding)
+            self._encoded[encoding] = body
+            return body, elapsed
+
+
+def build_response(rendered, cache_hit, req, response_class, status=200, metas=None):
+    """
+    依 Accept-Encoding / If-None-Match 產生回應；req / response_class 可以是 Flask 或 Quart 的，
+    同步與 async 路由共用。有 metas（snapshot 的 meta）時加上 Age / X-Snapshot-Stale。
+    """
+    encoding = negotiate_encoding(req)
+    body, compress_seconds = rendered.encoded(encoding)
+    compressed = body is not rendered.body
+
+    headers = {
+        "Vary": "Accept-Encoding",
+        "X-Serialize-Ms": f"{rendered.serialize_seconds * 1000:.3f}",
+        "X-Compress-Ms": f"{compress_seconds * 1000:.3f}",
+        "X-Uncompressed-Bytes": str(len(rendered.body)),
+        "X-Render-Cache": "hit" if cache_hit else "miss",
+    }
+
+    if metas is not None:
+        headers["Vary"] = "Accept, Accept-Encoding"
+        # 瀏覽器每次都要重新驗證，但可以用 ETag 拿到 304
+        headers["Cache-Control"] = "no-cache"
+        headers["Age"] = str(int(max(meta["age_seconds"] for meta in metas.values())))
+        headers["X-Snapshot-Stale"] = "true" if any(meta["stale"] for meta in metas.values()) else "false"
+
+        root = current_trace()
+        if root is not None:
+            # 這個請求本身的耗時 + 產生各 snapshot 的那次計算（查詢 / stage）的耗時
+            headers["Server-Timing"] = server_timing(
+                [("request", root.to_dict())] + [(source, meta.get("trace")) for source, meta in metas.items()]
+            )
+
+    etag = None
+    if rendered.etag is not None:
+        # 不同編碼是不同的 representation，各自有自己的 ETag
+        etag = f"{rendered.etag}-{encoding}" if compressed else rendered.etag
+        headers["ETag"] = f'"{etag}"'
+
+    # If-None-Match 以弱比較判斷（RFC 9110）：壓縮的 proxy 常把 ETag 改成 W/"..."；
+    # 壓縮前後內容相同，client 帶未壓縮版本的 ETag 也視為符合
+    if etag is not None and any(req.if_none_match.contains_weak(tag) for tag in {etag, rendered.etag}):
+        return response_class(b"", status=304, headers=headers)
+
+    if compressed:
+        headers["Content-Encoding"] = encoding
+    RESPONSE_BYTES.labels(encoding=encoding if compressed else "identity").observe(len(body))
+    return response_class(body, status=status, headers=headers, mimetype=rendered.mimetype)
+
+
+def render_payload(payload):
+    started = time.perf_counter()
+    body = dumps(payload)
+    return _Rendered(body, serialize_seconds=time.perf_counter() - started)
+
+
+def json_response(payload, status=200):
+    """
+    jsonify 的替代：orjson 序列化 + 依 Accept-Encoding 壓縮，並回報序列化時間與大小。
+    """
+    return build_response(render_payload(payload), False, request, Response, status)
+
+
+def _join_objects(first, second):
+    """
+    兩段序列化好的 JSON object 合併成一個（不重新序列化）：{...a} + {...b} -> {...a, ...b}。
+    """
+    if first == b"{}":
+        return second
+    if second == b"{}":
+        return first
+    return first[:-1] + b"," + second[1:]
+
+
+def _serialize(payload, columnar):
+    """
+    只序列化一次：扣除 VOLATILE_KEYS 的內容先序列化並以那份 bytes 計算 ETag，
+    volatile 欄位另外序列化（很小）後接上。回傳 (body, etag)。
+    """
+    content = {field: value for field, value in payload.items() if field not in VOLATILE_KEYS}
+    volatile = {field: payload[field] for field in VOLATILE_KEYS if field in payload}
+
+    if columnar:
+        # 陣列只轉成 buffer 一次；ETag 涵蓋 buffers 與不含 volatile 欄位的 header（header 不含陣列，很小）
+        columns, buffers, walked = split_columns(content)
+        digest = hashlib.blake2b(dumps({"columns": columns, "payload": walked}), digest_size=16)
+        for buffer in buffers:
+            digest.update(buffer)
+        body = pack_columnar(columns, buffers, {**walked, **volatile}, dumps)
+        return body, f"{digest.hexdigest()}-columnar"
+
+    content_body = dumps(content)
+    etag = hashlib.blake2b(content_body, digest_size=16).hexdigest()
+    return _join_objects(content_body, dumps(volatile)), etag
+
+
+def _render(name, values, metas, build, columnar=False):
+    """
+    同一組 snapshot 只序列化一次；snapshot 重算後才重新產生 body 與 ETag。
+    ETag 是扣除 VOLATILE_KEYS 後內容的 hash，資料沒變時即使重算過 ETag 也不變。
+    JSON 與 columnar 各自快取，ETag 也各自不同。
+    回傳 (_Rendered, 是否命中快取)。
+    """
+    key = (name, columnar)
+    source_ids = tuple(id(value) for value in values)
+    with _rendered_lock:
+        cached = _rendered.get(key)
+    if cached is not None and cached[0] == source_ids:
+        RENDER_CACHE.labels(endpoint=name, result="hit").inc()
+        return cached[2], True
+
+    RENDER_CACHE.labels(endpoint=name, result="miss").inc()
+
+    payload = build(*values)
+    payload["snapshot"] = {
+        source: {"generated_at": meta["generated_at"]} for source, meta in metas.items()
+    }
+    started = time.perf_counter()
+    body, etag = _serialize(payload, columnar)
+    rendered = _Rendered(
+        body, etag,
+        serialize_seconds=time.perf_counter() - started,
+        mimetype=COLUMNAR_MIMETYPE if columnar else "application/json",
+    )
+
+    fmt = "columnar" if columnar else "json"
+    SERIALIZE_SECONDS.labels(endpoint=name, format=fmt).observe(rendered.serialize_seconds)
+    PAYLOAD_BYTES.labels(endpoint=name, format=fmt).observe(len(rendered.body))
+
+    with _rendered_lock:
+        # 保留來源值的參照，避免 id 被重用
+        _rendered[key] = (source_ids, values, rendered)
+    return rendered, False
+
+
+def _render_traced(values, metas, build):
+    """
+    ?trace=1：body 多一個 trace 區塊，每次重新序列化，不進快取也不帶 ETag。
+    """
+    payload = build(*values)
+    payload["snapshot"] = {
+        source: {"generated_at": meta["generated_at"]} for source, meta in metas.items()
+    }
+    root = current_trace()
+    payload["trace"] = {
+        "request": root.to_dict() if root is not None else None,
+        "computed": {source: meta.get("trace") for source, meta in metas.items()},
+    }
+
+    started = time.perf_counter()
+    body = dumps(payload)
+    return _Rendered(body, serialize_seconds=time.perf_counter() - started)
+
+
+def render_snapshot(name, snapshots, build, columnar_build=None, columnar=False, trace=False):
+    """
+    讀取 snapshots 並取得（快取的）序列化結果，回傳 (_Rendered, 是否命中快取, metas)。
+    build(*snapshot_values) 回傳 payload dict；columnar=True 時改用 columnar_build 與二進位格式。
+    trace=True（JSON 才有效）時 body 附上 trace 區塊。
+    snapshot 過期時可能阻塞重算，async 路由應放到 executor 執行。
+    """
+    results = {}
+    for snapshot in snapshots:
+        with span(f"snapshot.{snapshot.name}"):
+            results[snapshot.name] = snapshot.get()
+    values = [value for value, _ in results.values()]
+    metas = {source: meta for source, (_, meta) in results.items()}
+
+    with span("render") as render_span:
+        if trace and not columnar:
+            return _render_traced(values, metas, build), False, metas
+
+        rendered, cache_hit = _render(name, values, metas, columnar_build if columnar else build, columnar)
+        render_span.set(cached=cache_hit)
+    return rendered, cache_hit, metas
+
+
+def snapshot_response(name, snapshots, build, columnar_build=None):
+    """
+    由一或多個 SnapshotCache 組出回應，支援 If-None-Match（內容沒變時回 304）。
+    有 columnar_build 的 endpoint 可依 wants_columnar() 改回傳 columnar 二進位格式。
+    snapshot 年齡放在 Age / X-Snapshot-Stale header，不影響 body 與 ETag。
+    序列化與壓縮結果都依 snapshot 快取，重複的請求不會重新序列化 / 壓縮。
+    Server-Timing 列出這個請求與產生 snapshot 的那次計算中各查詢 / stage 的耗時。
+    """
+    columnar = columnar_build is not None and wants_columnar(request)
+    with start_trace("request"):
+        rendered, cache_hit, metas = render_snapshot(
+            name, snapshots, build, columnar_build, columnar, trace=wants_trace(request)
+        )
+        return build_response(rendered, cache_hit, request, Response, metas=metas)
\ No newline at end of file
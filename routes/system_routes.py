@@ -0,0 +1,73 @@
+from flask import Blueprint, jsonify, request
+from db.mysql import peek_mysql_pool
+from db.postgres import peek_pg_pool
+from repositories.query_cache import query_cache
+from services.dashboard_service import DASHBOARD_PIPELINE
+from services.iot_stream import iot_broadcaster
+from services.snapshot_service import SNAPSHOTS
+
+system_bp = Blueprint("system", __name__)
+
+
+# 以下 handler 不依賴 Flask / Quart：參數為 request.args，回傳 JSON payload；
+# 參數錯誤時 raise ValueError（回應 400）。Flask 版在本檔註冊，ASGI 版由 async_dashboard_routes 註冊。
+def existing_pool_stats():
+    # 只回報已建立的連線池：查看狀態不應建立連線池（DATA_BACKEND=duckdb 時兩者都不會建立）
+    pools = {"mysql": peek_mysql_pool(), "postgres": peek_pg_pool()}
+    return {name: pool.stats() for name, pool in pools.items() if pool is not None}
+
+
+def api_pool_stats(args):
+    return existing_pool_stats()
+
+
+def api_cache_stats(args):
+    return query_cache.stats()
+
+
+def api_cache_invalidate(args):
+    keys = args.getlist("key")
+    return {"invalidated": query_cache.invalidate(*keys)}
+
+
+def api_snapshot_stats(args):
+    return {name: snapshot.stats() for name, snapshot in SNAPSHOTS.items()}
+
+
+def api_pipeline_stats(args):
+    return DASHBOARD_PIPELINE.stats()
+
+
+def api_pipeline_invalidate(args):
+    stage = args.get("stage") or None
+    DASHBOARD_PIPELINE.invalidate(stage)
+    return {"invalidated": [stage] if stage else list(DASHBOARD_PIPELINE.stages)}
+
+
+def api_stream_stats(args):
+    return {"iot": iot_broadcaster.stats()}
+
+
+# (rule, methods, handler)
+SYSTEM_ROUTES = (
+    ("/api/system/pools", ("GET",), api_pool_stats),
+    ("/api/system/cache", ("GET",), api_cache_stats),
+    ("/api/system/cache/invalidate", ("POST",), api_cache_invalidate),
+    ("/api/system/snapshots", ("GET",), api_snapshot_stats),
+    ("/api/system/pipeline", ("GET",), api_pipeline_stats),
+    ("/api/system/pipeline/invalidate", ("POST",), api_pipeline_invalidate),
+    ("/api/system/streams", ("GET",), api_stream_stats),
+)
+
+
+def _view(handler):
+    def view():
+        try:
+            return jsonify(handler(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return view
+
+
+for _rule, _methods, _handler in SYSTEM_ROUTES:
+    system_bp.add_url_rule(_rule, _handler.__name__, _view(_handler), methods=list(_methods))
\ No newline at end of file
@@ -3,299 +3,447 @@ from datetime import date
 import pandas as pd
 
 from config.settings import (
+    IOT_LOOKBACK_HOURS,
     LOOKBACK_DAYS,
     FORECAST_DAYS,
     DEFAULT_LEADTIME_DAYS,
-    TEMP_BASE,
-    VIB_BASE,
-    RPM_TARGET,
 )
-from db.mysql import get_mysql_conn
-from db.postgres import get_pg_conn
-from repositories.erp_repository import (
-    get_bom_df,
-    get_parts_df,
-    get_incoming_purchase_df,
-)
-from repositories.iot_repository import get_recent_iot_df
-from repositories.transaction_repository import get_order_history_df
-from services.health_service import compute_health_score
+from services.data_loader import load_dashboard_inputs
 from services.forecast_service import build_complete_history, build_forecast
 from services.mrp_service import simulate_inventory_and_mrp
+from services.pipeline import Pipeline, Stage, StageError
 
 
-def build_dashboard_data():
-    pg_conn = get_pg_conn()
-    mysql_conn = get_mysql_conn()
+REQUIRED_INPUTS = ("bom", "parts", "history")
+PLAN_INPUTS = ("bom", "parts", "incoming", "history")
+IOT_INPUTS = ("iot",)
 
-    try:
-        bom_df = get_bom_df(mysql_conn)
-        bom_df["product_id"] = pd.to_numeric(bom_df["product_id"], errors="coerce").astype("Int64")
-        bom_df = bom_df.dropna(subset=["product_id"]).copy()
-        bom_df["product_id"] = bom_df["product_id"].astype(int)
-        bom_df["bom_qty"] = pd.to_numeric(bom_df["bom_qty"], errors="coerce").fillna(0.0)
-
-        parts_df = get_parts_df(mysql_conn)
-        if parts_df.empty:
-            return {"error": "parts 資料表沒有資料，無法進行庫存模擬。"}
-        parts_df["stock_qty"] = pd.to_numeric(parts_df["stock_qty"], errors="coerce").fillna(0.0)
-        parts_df["safety_qty"] = pd.to_numeric(parts_df["safety_qty"], errors="coerce").fillna(0.0)
-
-        incoming_df = get_incoming_purchase_df(mysql_conn)
-        if not incoming_df.empty:
-            incoming_df["eta_date"] = pd.to_datetime(incoming_df["eta_date"]).dt.normalize()
-            incoming_df["incoming_qty"] = pd.to_numeric(
-                incoming_df["incoming_qty"], errors="coerce"
-            ).fillna(0.0)
-
-        iot_df = get_recent_iot_df(mysql_conn)
-
-        machine_iot = {}
-        machine_health_df = pd.DataFrame(columns=["machine_id", "machine_health"])
-        avg_health = 1.0
-        min_health = 1.0
-        capacity_factor = 1.0
-
-        if not iot_df.empty:
-            iot_df["created_at"] = pd.to_datetime(iot_df["created_at"])
-            iot_df["temperature"] = pd.to_numeric(iot_df["temperature"], errors="coerce").fillna(TEMP_BASE)
-            iot_df["vibration"] = pd.to_numeric(iot_df["vibration"], errors="coerce").fillna(VIB_BASE)
-            iot_df["rpm"] = pd.to_numeric(iot_df["rpm"], errors="coerce").fillna(RPM_TARGET)
-
-            iot_df = compute_health_score(iot_df)
-            iot_df = iot_df.sort_values(["machine_id", "created_at"]).reset_index(drop=True)
-
-            machine_health_df = (
-                iot_df.groupby("machine_id", as_index=False)["health_score"]
-                .mean()
-                .rename(columns={"health_score": "machine_health"})
-            )
-
-            if not machine_health_df.empty:
-                avg_health = float(machine_health_df["machine_health"].mean())
-                min_health = float(machine_health_df["machine_health"].min())
-                capacity_factor = max(0.0, min(1.0, 0.7 * avg_health + 0.3 * min_health))
-
-            for machine_id, g in iot_df.groupby("machine_id"):
-                g = g.sort_values("created_at").reset_index(drop=True)
-                machine_iot[machine_id] = {
-                    "x": g["created_at"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist(),
-                    "temperature": g["temperature"].astype(float).round(2).tolist(),
-                    "vibration": g["vibration"].astype(float).round(4).tolist(),
-                    "rpm": g["rpm"].astype(float).round(0).tolist(),
-                    "health_score": g["health_score"].astype(float).round(3).tolist(),
-                }
-
-        hist_df = get_order_history_df(pg_conn)
-
-        if hist_df.empty:
-            return {
-                "error": f"近 {LOOKBACK_DAYS} 天沒有訂單資料，請檢查 orders.created_at。"
-            }
-
-        hist_df["order_date"] = pd.to_datetime(hist_df["order_date"])
-        hist_df["product_id"] = pd.to_numeric(hist_df["product_id"], errors="coerce")
-        hist_df["qty"] = pd.to_numeric(hist_df["qty"], errors="coerce")
-
-        hist_df = hist_df.dropna(subset=["product_id", "qty"]).copy()
-        hist_df["product_id"] = hist_df["product_id"].astype(int)
-
-        hist_full = build_complete_history(hist_df, LOOKBACK_DAYS)
-        forecast_df = build_forecast(hist_full, FORECAST_DAYS)
-
-        forecast_df["capacity_factor"] = capacity_factor
-        forecast_df["expected_output_qty"] = (
-            forecast_df["forecast_demand_qty"] * forecast_df["capacity_factor"]
-        ).round().astype(int)
-
-        forecast_df["gap_qty"] = (
-            forecast_df["forecast_demand_qty"] - forecast_df["expected_output_qty"]
-        ).clip(lower=0)
-
-        future_bom = forecast_df.merge(bom_df, on="product_id", how="inner")
-
-        future_bom["part_demand_for_customer_demand"] = (
-            future_bom["forecast_demand_qty"] * future_bom["bom_qty"]
-        )
 
-        future_bom["part_demand_for_planned_output"] = (
-            future_bom["expected_output_qty"] * future_bom["bom_qty"]
-        )
+# ---- pipeline stages（宣告見 DASHBOARD_PIPELINE）----
+# bom / parts / incoming 由 data_loader 清理並快取，stage 輸出也會被共用，都不可就地修改
 
-        daily_part_demand = (
-            future_bom.groupby(["forecast_date", "part_no"], as_index=False)["part_demand_for_customer_demand"]
-            .sum()
-            .rename(columns={"part_demand_for_customer_demand": "part_demand"})
-        )
 
-        daily_part_output_need = (
-            future_bom.groupby(["forecast_date", "part_no"], as_index=False)["part_demand_for_planned_output"]
-            .sum()
-            .rename(columns={"part_demand_for_planned_output": "planned_output_part_demand"})
-        )
+def load_bom_stage(bom_df):
+    # 每個產品的零件用量合計；產出預估只需乘上這個值，不必每次重新 merge BOM
+    parts_per_unit = (
+        bom_df.groupby("product_id", as_index=False)["bom_qty"].sum()
+        .rename(columns={"bom_qty": "parts_per_unit"})
+    )
+    return {"bom": bom_df, "parts_per_unit": parts_per_unit}
 
-        if incoming_df.empty:
-            daily_incoming = pd.DataFrame(columns=["forecast_date", "part_no", "incoming_qty"])
-        else:
-            daily_incoming = (
-                incoming_df.rename(columns={"eta_date": "forecast_date"})
-                .groupby(["forecast_date", "part_no"], as_index=False)["incoming_qty"]
-                .sum()
-            )
-
-        future_dates_df = pd.DataFrame({
-            "forecast_date": pd.date_range(
-                start=pd.Timestamp(date.today()).normalize() + pd.Timedelta(days=1),
-                periods=FORECAST_DAYS,
-                freq="D",
-            )
-        })
-
-        parts_list = parts_df["part_no"].dropna().astype(str).unique()
-
-        sim_grid = (
-            future_dates_df.assign(key=1)
-            .merge(pd.DataFrame({"part_no": parts_list, "key": 1}), on="key")
-            .drop(columns=["key"])
-        )
 
-        sim = (
-            sim_grid.merge(daily_part_demand, on=["forecast_date", "part_no"], how="left")
-            .merge(daily_part_output_need, on=["forecast_date", "part_no"], how="left")
-            .merge(daily_incoming, on=["forecast_date", "part_no"], how="left")
-            .merge(parts_df, on="part_no", how="left")
-        )
+def load_parts_stage(parts_df, incoming_df):
+    if parts_df.empty:
+        raise StageError("parts 資料表沒有資料，無法進行庫存模擬。")
 
-        sim["part_demand"] = pd.to_numeric(sim["part_demand"], errors="coerce").fillna(0.0)
-        sim["planned_output_part_demand"] = pd.to_numeric(
-            sim["planned_output_part_demand"], errors="coerce"
-        ).fillna(0.0)
-        sim["incoming_qty"] = pd.to_numeric(sim["incoming_qty"], errors="coerce").fillna(0.0)
-        sim["stock_qty"] = pd.to_numeric(sim["stock_qty"], errors="coerce").fillna(0.0)
-        sim["safety_qty"] = pd.to_numeric(sim["safety_qty"], errors="coerce").fillna(0.0)
-
-        sim = simulate_inventory_and_mrp(sim, DEFAULT_LEADTIME_DAYS)
-
-        part_risk_summary = (
-            sim.groupby("part_no", as_index=False)
-            .agg(
-                days_below_safety=("below_safety", "sum"),
-                days_below_zero=("below_zero", "sum"),
-                min_available=("end_available", "min"),
-                max_shortage_qty=("shortage_qty", "max"),
-                total_recommended_qty=("recommended_po_qty", "sum"),
-            )
+    if incoming_df.empty:
+        daily_incoming = pd.DataFrame(columns=["forecast_date", "part_no", "incoming_qty"])
+    else:
+        daily_incoming = (
+            incoming_df.rename(columns={"eta_date": "forecast_date"})
+            .groupby(["forecast_date", "part_no"], as_index=False)["incoming_qty"]
+            .sum()
         )
 
-        risk_parts = (
-            part_risk_summary[
-                (part_risk_summary["days_below_safety"] > 0) |
-                (part_risk_summary["days_below_zero"] > 0)
-            ]
-            .sort_values(
-                ["days_below_zero", "days_below_safety", "max_shortage_qty"],
-                ascending=False,
-            )["part_no"]
-            .tolist()
+    return {
+        "parts": parts_df,
+        "parts_list": parts_df["part_no"].dropna().astype(str).unique(),
+        "daily_incoming": daily_incoming,
+    }
+
+
+def history_stage(hist_df):
+    # 已逐批彙總成 (order_date, product_id) 的需求量
+    if hist_df.empty:
+        raise StageError(f"近 {LOOKBACK_DAYS} 天沒有訂單資料，請檢查 orders.created_at。")
+    return build_complete_history(hist_df, LOOKBACK_DAYS)
+
+
+def forecast_stage(hist_full):
+    return build_forecast(hist_full, FORECAST_DAYS)
+
+
+def bom_explode_stage(forecast_df, bom):
+    """
+    需求展開，只用客戶需求（不受設備健康度影響）。
+    """
+    future_bom = forecast_df.merge(bom["bom"], on="product_id", how="inner")
+    future_bom["part_demand"] = future_bom["forecast_demand_qty"] * future_bom["bom_qty"]
+
+    daily_part_demand = (
+        future_bom.groupby(["forecast_date", "part_no"], as_index=False)["part_demand"]
+        .sum()
+    )
+
+    forecast_base = forecast_df.merge(bom["parts_per_unit"], on="product_id", how="left")
+    total_demand_part_qty = float(
+        (forecast_base["forecast_demand_qty"] * forecast_base["parts_per_unit"]).sum()
+    )
+
+    return {
+        "forecast_base": forecast_base,
+        "daily_part_demand": daily_part_demand,
+        "total_demand_part_qty": total_demand_part_qty,
+    }
+
+
+def build_mrp_input(explode, parts):
+    """
+    MRP 模擬的輸入：未來 FORECAST_DAYS 天 x 所有零件，合併需求、到貨與庫存。
+    """
+    future_dates_df = pd.DataFrame({
+        "forecast_date": pd.date_range(
+            start=pd.Timestamp(date.today()).normalize() + pd.Timedelta(days=1),
+            periods=FORECAST_DAYS,
+            freq="D",
         )
-
-        po_summary = (
-            sim[sim["recommended_po_qty"] > 0]
-            .groupby("part_no", as_index=False)
-            .agg(
-                total_recommended_qty=("recommended_po_qty", "sum"),
-                first_shortage_date=("forecast_date", "min"),
-                first_suggested_order_date=("suggested_order_date", "min"),
-                first_required_eta=("required_eta_date", "min"),
-                max_shortage_qty=("shortage_qty", "max"),
-            )
-            .sort_values("total_recommended_qty", ascending=False)
+    })
+
+    sim_grid = (
+        future_dates_df.assign(key=1)
+        .merge(pd.DataFrame({"part_no": parts["parts_list"], "key": 1}), on="key")
+        .drop(columns=["key"])
+    )
+
+    sim = (
+        sim_grid.merge(explode["daily_part_demand"], on=["forecast_date", "part_no"], how="left")
+        .merge(parts["daily_incoming"], on=["forecast_date", "part_no"], how="left")
+        .merge(parts["parts"], on="part_no", how="left")
+    )
+
+    sim["part_demand"] = pd.to_numeric(sim["part_demand"], errors="coerce").fillna(0.0)
+    sim["incoming_qty"] = pd.to_numeric(sim["incoming_qty"], errors="coerce").fillna(0.0)
+    sim["stock_qty"] = pd.to_numeric(sim["stock_qty"], errors="coerce").fillna(0.0)
+    sim["safety_qty"] = pd.to_numeric(sim["safety_qty"], errors="coerce").fillna(0.0)
+    return sim
+
+
+def mrp_stage(explode, parts):
+    """
+    庫存 / MRP 模擬：未來 FORECAST_DAYS 天 x 所有零件。
+    """
+    return simulate_inventory_and_mrp(build_mrp_input(explode, parts), DEFAULT_LEADTIME_DAYS)
+
+
+def rank_risk_parts(part_risk_summary):
+    """
+    低於安全庫存或缺料的零件，依缺料天數、低於安全庫存天數、最大缺料量排序。
+    """
+    return (
+        part_risk_summary[
+            (part_risk_summary["days_below_safety"] > 0) |
+            (part_risk_summary["days_below_zero"] > 0)
+        ]
+        .sort_values(
+            ["days_below_zero", "days_below_safety", "max_shortage_qty"],
+            ascending=False,
+        )["part_no"]
+        .tolist()
+    )
+
+
+def summaries_stage(sim):
+    part_risk_summary = (
+        sim.groupby("part_no", as_index=False)
+        .agg(
+            days_below_safety=("below_safety", "sum"),
+            days_below_zero=("below_zero", "sum"),
+            min_available=("end_available", "min"),
+            max_shortage_qty=("shortage_qty", "max"),
+            total_recommended_qty=("recommended_po_qty", "sum"),
         )
-
-        po_summary = po_summary.merge(
-            part_risk_summary[["part_no", "days_below_safety", "days_below_zero", "min_available"]],
-            on="part_no",
-            how="left",
+    )
+
+    risk_parts = rank_risk_parts(part_risk_summary)
+
+    po_summary = (
+        sim[sim["recommended_po_qty"] > 0]
+        .groupby("part_no", as_index=False)
+        .agg(
+            total_recommended_qty=("recommended_po_qty", "sum"),
+            first_shortage_date=("forecast_date", "min"),
+            first_suggested_order_date=("suggested_order_date", "min"),
+            first_required_eta=("required_eta_date", "min"),
+            max_shortage_qty=("shortage_qty", "max"),
         )
+        .sort_values("total_recommended_qty", ascending=False)
+    )
+
+    po_summary = po_summary.merge(
+        part_risk_summary[["part_no", "days_below_safety", "days_below_zero", "min_available"]],
+        on="part_no",
+        how="left",
+    )
+
+    return {
+        "part_risk_summary": part_risk_summary,
+        "risk_parts": risk_parts,
+        "po_summary": po_summary,
+    }
+
+
+def format_stage(summaries, explode):
+    """
+    plan section 的輸出格式。forecast_base 是 DataFrame，只供 build_forecast_section 使用，不直接輸出。
+    """
+    part_risk_summary = summaries["part_risk_summary"]
+    risk_parts = summaries["risk_parts"]
+    po_summary = summaries["po_summary"]
+
+    po_labels = []
+    po_values = []
+    if not po_summary.empty:
+        top_po = po_summary.head(10).copy()
+        po_labels = top_po["part_no"].astype(str).tolist()
+        po_values = top_po["total_recommended_qty"].astype(float).round(2).tolist()
+
+    po_table = []
+    if not po_summary.empty:
+        table_df = po_summary.head(15).copy()
+        for col in ["first_shortage_date", "first_suggested_order_date", "first_required_eta"]:
+            table_df[col] = pd.to_datetime(table_df[col]).dt.strftime("%Y-%m-%d")
+
+        for col in ["total_recommended_qty", "max_shortage_qty", "min_available"]:
+            table_df[col] = table_df[col].astype(float).round(2)
+
+        po_table = table_df.to_dict(orient="records")
+
+    return {
+        "forecast_base": explode["forecast_base"],
+        "kpi": {
+            "risk_count": int(len(risk_parts)),
+            "total_po_qty": int(po_summary["total_recommended_qty"].sum()) if not po_summary.empty else 0,
+            "days_below_zero_parts": int((part_risk_summary["days_below_zero"] > 0).sum()) if not part_risk_summary.empty else 0,
+        },
+        "risk_parts": risk_parts[:20],
+        "summary": {
+            "lookback_days": LOOKBACK_DAYS,
+            "forecast_days": FORECAST_DAYS,
+            "po_count": int(len(po_summary)),
+            "logic_note": "Demand forecast and executable output are modeled separately. MRP suggestions are backward-scheduled from shortage date using lead time.",
+            "total_demand_part_qty": round(explode["total_demand_part_qty"], 2),
+        },
+        "po": {
+            "labels": po_labels,
+            "values": po_values,
+        },
+        "po_table": po_table,
+    }
+
+
+def format_machine_series(iot_df):
+    """
+    含 health_score 的 IoT 明細 -> 每台設備一組圖表序列（charts.iot.machines 的格式）。
+    數值欄位保留為 float64、時間保留為 datetime64[ms] numpy 陣列，不逐點 strftime：
+    JSON 由 routes.responses.dumps（orjson）直接序列化（時間為 ISO 8601 字串），
+    columnar 格式則直接寫出 float32 / int64 epoch ms buffer。
+    """
+    machine_iot = {}
+    if iot_df.empty:
+        return machine_iot
+
+    for machine_id, g in iot_df.groupby("machine_id"):
+        g = g.sort_values("created_at")
+        machine_iot[machine_id] = {
+            "x": g["created_at"].to_numpy(dtype="datetime64[ms]"),
+            "temperature": g["temperature"].to_numpy(dtype="float64").round(2),
+            "vibration": g["vibration"].to_numpy(dtype="float64").round(4),
+            "rpm": g["rpm"].to_numpy(dtype="float64").round(0),
+            "health_score": g["health_score"].to_numpy(dtype="float64").round(3),
+        }
 
-        compare = (
-            forecast_df.groupby("forecast_date", as_index=False)[
-                ["forecast_demand_qty", "expected_output_qty", "gap_qty"]
-            ]
-            .sum()
-        )
-
-        compare_x = compare["forecast_date"].dt.strftime("%Y-%m-%d").tolist()
-        compare_demand = compare["forecast_demand_qty"].astype(int).tolist()
-        compare_output = compare["expected_output_qty"].astype(int).tolist()
-        compare_gap = compare["gap_qty"].astype(int).tolist()
-
-        po_labels = []
-        po_values = []
-        if not po_summary.empty:
-            top_po = po_summary.head(10).copy()
-            po_labels = top_po["part_no"].astype(str).tolist()
-            po_values = top_po["total_recommended_qty"].astype(float).round(2).tolist()
-
-        po_table = []
-        if not po_summary.empty:
-            table_df = po_summary.head(15).copy()
-            for col in ["first_shortage_date", "first_suggested_order_date", "first_required_eta"]:
-                table_df[col] = pd.to_datetime(table_df[col]).dt.strftime("%Y-%m-%d")
-
-            for col in ["total_recommended_qty", "max_shortage_qty", "min_available"]:
-                table_df[col] = table_df[col].astype(float).round(2)
-
-            po_table = table_df.to_dict(orient="records")
+    return machine_iot
+
+
+def iot_health_stage(iot):
+    """
+    設備健康度 / 產能係數與 IoT 曲線。健康度已在讀取時逐批計算（services.health_service.summarize_health_chunks）。
+    """
+    machine_health_df, iot_df = iot
+
+    avg_health = 1.0
+    min_health = 1.0
+    capacity_factor = 1.0
+
+    if not machine_health_df.empty:
+        avg_health = float(machine_health_df["machine_health"].mean())
+        min_health = float(machine_health_df["machine_health"].min())
+        capacity_factor = max(0.0, min(1.0, 0.7 * avg_health + 0.3 * min_health))
+
+    machine_iot = format_machine_series(iot_df)
+
+    return {
+        "health": {
+            "avg_health": round(avg_health, 3),
+            "min_health": round(min_health, 3),
+            "capacity_factor": round(capacity_factor, 3),
+        },
+        # 未四捨五入的值，供產出預估使用
+        "capacity_factor": capacity_factor,
+        "machine_health": {
+            str(row.machine_id): round(float(row.machine_health), 3)
+            for row in machine_health_df.itertuples(index=False)
+        },
+        "machines": machine_iot,
+        "machine_ids": list(machine_iot.keys()),
+        # 目前資料的最大 machine_data.id，/api/iot/stream 從這裡接續推送
+        "cursor": int(iot_df["id"].max()) if not iot_df.empty else None,
+        "lookback_hours": IOT_LOOKBACK_HOURS,
+    }
+
+
+def build_iot_section(inputs=None):
+    """
+    設備健康度 / IoT 曲線：每次都重新讀取，更新頻率最高。
+    """
+    inputs = load_dashboard_inputs(IOT_INPUTS) if inputs is None else inputs
+    warnings = [f"{name}: {inputs.errors[name]}" for name in IOT_INPUTS if name in inputs.errors]
+
+    outputs = DASHBOARD_PIPELINE.run(["iot_health"], inputs.data, inputs.watermarks)
+    return {
+        "updated_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **outputs["iot_health"],
+        "warnings": warnings,
+        "data_changed": {name: inputs.changed[name] for name in IOT_INPUTS},
+    }
+
+
+def build_plan_section(inputs=None):
+    """
+    需求預測 + BOM 展開 + MRP：只在訂單 / 庫存 / 採購異動時改變，可以低頻率重算。
+    輸入的 watermark 沒變時各 stage 直接沿用上次的結果（見 DASHBOARD_PIPELINE）。
+    """
+    inputs = load_dashboard_inputs(PLAN_INPUTS) if inputs is None else inputs
+
+    failed_required = [name for name in REQUIRED_INPUTS if inputs.failed(name)]
+    if failed_required:
+        details = "; ".join(f"{name}: {inputs.errors[name]}" for name in failed_required)
+        return {"error": f"資料讀取失敗，無法進行庫存模擬。({details})"}
+
+    warnings = [f"{name}: {inputs.errors[name]}" for name in PLAN_INPUTS if name in inputs.errors]
 
-        total_demand_part_qty = (
-            float(future_bom["part_demand_for_customer_demand"].sum()) if not future_bom.empty else 0.0
-        )
-        total_output_part_qty = (
-            float(future_bom["part_demand_for_planned_output"].sum()) if not future_bom.empty else 0.0
-        )
-
-        return {
-            "updated_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "kpi": {
-                "avg_health": round(avg_health, 3),
-                "min_health": round(min_health, 3),
-                "capacity_factor": round(capacity_factor, 3),
-                "total_forecast_demand": int(forecast_df["forecast_demand_qty"].sum()) if not forecast_df.empty else 0,
-                "total_expected_output": int(forecast_df["expected_output_qty"].sum()) if not forecast_df.empty else 0,
-                "total_gap_qty": int(forecast_df["gap_qty"].sum()) if not forecast_df.empty else 0,
-                "risk_count": int(len(risk_parts)),
-                "total_po_qty": int(po_summary["total_recommended_qty"].sum()) if not po_summary.empty else 0,
-                "days_below_zero_parts": int((part_risk_summary["days_below_zero"] > 0).sum()) if not part_risk_summary.empty else 0,
-            },
-            "risk_parts": risk_parts[:20],
-            "summary": {
-                "lookback_days": LOOKBACK_DAYS,
-                "forecast_days": FORECAST_DAYS,
-                "po_count": int(len(po_summary)),
-                "logic_note": "Demand forecast and executable output are modeled separately. MRP suggestions are backward-scheduled from shortage date using lead time.",
-                "total_demand_part_qty": round(total_demand_part_qty, 2),
-                "total_output_part_qty": round(total_output_part_qty, 2),
-            },
-            "charts": {
-                "compare": {
-                    "x": compare_x,
-                    "demand": compare_demand,
-                    "output": compare_output,
-                    "gap": compare_gap,
-                },
-                "iot": {
-                    "machines": machine_iot,
-                    "machine_ids": list(machine_iot.keys()),
-                },
-                "po": {
-                    "labels": po_labels,
-                    "values": po_values,
-                },
+    try:
+        outputs = DASHBOARD_PIPELINE.run(["format"], inputs.data, inputs.watermarks)
+    except StageError as e:
+        return {"error": str(e)}
+
+    return {
+        "updated_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **outputs["format"],
+        "warnings": warnings,
+        "data_changed": {name: inputs.changed[name] for name in PLAN_INPUTS},
+    }
+
+
+def build_forecast_section(plan, iot):
+    """
+    依目前的產能修正係數計算預估產出；只涉及未來 FORECAST_DAYS 天 x 產品數的資料，成本很低。
+    """
+    forecast_df = plan["forecast_base"].copy()
+    forecast_df["capacity_factor"] = iot["capacity_factor"]
+    forecast_df["expected_output_qty"] = (
+        forecast_df["forecast_demand_qty"] * forecast_df["capacity_factor"]
+    ).round().astype(int)
+
+    forecast_df["gap_qty"] = (
+        forecast_df["forecast_demand_qty"] - forecast_df["expected_output_qty"]
+    ).clip(lower=0)
+
+    total_output_part_qty = float(
+        (forecast_df["expected_output_qty"] * forecast_df["parts_per_unit"]).sum()
+    )
+
+    compare = (
+        forecast_df.groupby("forecast_date", as_index=False)[
+            ["forecast_demand_qty", "expected_output_qty", "gap_qty"]
+        ]
+        .sum()
+    )
+
+    return {
+        "kpi": {
+            "total_forecast_demand": int(forecast_df["forecast_demand_qty"].sum()) if not forecast_df.empty else 0,
+            "total_expected_output": int(forecast_df["expected_output_qty"].sum()) if not forecast_df.empty else 0,
+            "total_gap_qty": int(forecast_df["gap_qty"].sum()) if not forecast_df.empty else 0,
+        },
+        "summary": {
+            **plan["summary"],
+            "total_output_part_qty": round(total_output_part_qty, 2),
+        },
+        "compare": {
+            "x": compare["forecast_date"].dt.strftime("%Y-%m-%d").tolist(),
+            "demand": compare["forecast_demand_qty"].astype(int).tolist(),
+            "output": compare["expected_output_qty"].astype(int).tolist(),
+            "gap": compare["gap_qty"].astype(int).tolist(),
+        },
+    }
+
+
+def build_kpi(plan, iot, forecast=None):
+    forecast = build_forecast_section(plan, iot) if forecast is None else forecast
+    health = iot["health"]
+    return {
+        "avg_health": health["avg_health"],
+        "min_health": health["min_health"],
+        "capacity_factor": health["capacity_factor"],
+        **forecast["kpi"],
+        **plan["kpi"],
+    }
+
+
+def compose_dashboard(plan, iot, forecast=None):
+    """
+    把各 section 組回原本 /api/dashboard 的完整格式。
+    """
+    if "error" in plan:
+        return {"error": plan["error"]}
+
+    forecast = build_forecast_section(plan, iot) if forecast is None else forecast
+    return {
+        "updated_at": iot["updated_at"],
+        "kpi": build_kpi(plan, iot, forecast),
+        "risk_parts": plan["risk_parts"],
+        "summary": forecast["summary"],
+        "charts": {
+            "compare": forecast["compare"],
+            "iot": {
+                "machines": iot["machines"],
+                "machine_ids": iot["machine_ids"],
             },
-            "po_table": po_table,
-        }
+            "po": plan["po"],
+        },
+        "po_table": plan["po_table"],
+        "warnings": plan["warnings"] + iot["warnings"],
+        "data_changed": {**plan["data_changed"], **iot["data_changed"]},
+    }
+
 
-    finally:
-        pg_conn.close()
-        mysql_conn.close()
\ No newline at end of file
+def build_dashboard_data():
+    """
+    一次讀取所有輸入並跑完整條 pipeline（不經 snapshot）。
+    """
+    inputs = load_dashboard_inputs(PLAN_INPUTS + IOT_INPUTS)
+    plan = build_plan_section(inputs)
+    iot = build_iot_section(inputs)
+    if "error" in plan:
+        return compose_dashboard(plan, iot)
+
+    forecast = DASHBOARD_PIPELINE.run(["capacity"], inputs.data, inputs.watermarks)["capacity"]
+    return compose_dashboard(plan, iot, forecast)
+
+
+# 輸入來源（data_loader）-> stage。IoT 變動只會重算 iot_health 與依賴產能係數的 capacity，
+# 訂單 / BOM / 庫存沒變時 history ~ format 都直接沿用快取。
+# iot 沒有 watermark，且每次刷新都有新資料：宣告為 volatile，不對整段 24 小時資料做內容 hash。
+DASHBOARD_PIPELINE = Pipeline([
+    Stage("load_bom", load_bom_stage, inputs=("bom",)),
+    Stage("load_parts", load_parts_stage, inputs=("parts", "incoming")),
+    Stage("history", history_stage, inputs=("history",), daily=True),
+    Stage("forecast", forecast_stage, deps=("history",), daily=True),
+    Stage("bom_explode", bom_explode_stage, deps=("forecast", "load_bom")),
+    Stage("mrp", mrp_stage, deps=("bom_explode", "load_parts"), daily=True),
+    Stage("summaries", summaries_stage, deps=("mrp",)),
+    Stage("format", format_stage, deps=("summaries", "bom_explode")),
+    Stage("iot_health", iot_health_stage, inputs=("iot",)),
+    Stage("capacity", build_forecast_section, deps=("format", "iot_health")),
+], volatile_sources=IOT_INPUTS)
\ No newline at end of file
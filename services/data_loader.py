@@ -0,0 +1,223 @@
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from config.settings import (
+    DATA_LOAD_WORKERS,
+    DATA_LOAD_TIMEOUT_SECONDS,
+    ORDER_HISTORY_FETCH_MODE,
+    BOM_CACHE_TTL_SECONDS,
+    PARTS_CACHE_TTL_SECONDS,
+    WATERMARK_CACHE_MAX_AGE_SECONDS,
+    ERP_CHECKSUM_VERIFY_SECONDS,
+)
+from repositories.backend import get_backend
+from repositories.erp_repository import (
+    BOM_SCHEMA,
+    PARTS_SCHEMA,
+    INCOMING_SCHEMA,
+    clean_bom_df,
+    clean_parts_df,
+    clean_incoming_df,
+)
+from repositories.query_cache import query_cache
+from repositories.typed_fetch import empty_frame
+from observability.tracing import propagate, span
+from services.forecast_service import accumulate_order_history
+from services.health_service import summarize_health_chunks
+
+
+# DATA_BACKEND：MySQL + PostgreSQL，或 DuckDB over Parquet（見 repositories.backend）
+backend = get_backend()
+
+
+def load_bom(erp_conn):
+    return clean_bom_df(backend.get_bom_df(erp_conn))
+
+
+def load_parts(erp_conn):
+    return clean_parts_df(backend.get_parts_df(erp_conn))
+
+
+def load_incoming(erp_conn):
+    return clean_incoming_df(backend.get_incoming_purchase_df(erp_conn))
+
+
+def load_iot_health(iot_conn):
+    return summarize_health_chunks(backend.iter_recent_iot_chunks(iot_conn))
+
+
+def load_order_history(orders_conn):
+    if ORDER_HISTORY_FETCH_MODE == "stream":
+        return accumulate_order_history(backend.iter_order_history_chunks(orders_conn))
+    return accumulate_order_history([backend.get_order_history_df(orders_conn)])
+
+
+# name -> (connection factory, 查詢函式, 失敗時的替代值, 快取 TTL 秒數或 None)
+# iot / history 以 streaming cursor 逐批消化，連線只在消化期間被占用
+# bom / parts 一天只變動幾次，快取清理後的 DataFrame（命中時不借連線）
+# 有 watermark 的查詢（見 QUERY_WATERMARKS）另外以 watermark 判斷是否需要重讀
+DASHBOARD_QUERIES = {
+    "bom": (backend.erp_connection, load_bom, lambda: clean_bom_df(empty_frame(BOM_SCHEMA)), BOM_CACHE_TTL_SECONDS),
+    "parts": (backend.erp_connection, load_parts, lambda: clean_parts_df(empty_frame(PARTS_SCHEMA)), PARTS_CACHE_TTL_SECONDS),
+    "incoming": (backend.erp_connection, load_incoming, lambda: empty_frame(INCOMING_SCHEMA), None),
+    "iot": (backend.iot_connection, load_iot_health, lambda: summarize_health_chunks([]), None),
+    "history": (backend.orders_connection, load_order_history, lambda: accumulate_order_history([]), None),
+}
+
+
+def probe_erp(erp_conn):
+    """
+    COUNT(*) / MAX(updated_at) 的 watermark，再附上最近一次全表 checksum（每 ERP_CHECKSUM_VERIFY_SECONDS 才重算），
+    updated_at 看不到的變更最晚在下一次驗證時被發現。
+    """
+    marks = backend.probe_erp_watermarks(erp_conn)
+    checksums, _ = query_cache.fetch(
+        "erp_checksums", ERP_CHECKSUM_VERIFY_SECONDS, lambda: backend.verify_erp_checksums(erp_conn)
+    )
+    return {table: (mark, checksums.get(table)) for table, mark in marks.items()}
+
+
+# 每個 DB 一個 probe，一次 round trip 取回所有資料表的 watermark
+WATERMARK_PROBES = {
+    "erp": (backend.erp_connection, probe_erp),
+    "orders": (backend.orders_connection, backend.probe_order_watermarks),
+}
+
+# query name -> (probe, 依賴的資料表)；watermark 不變時跳過完整讀取
+QUERY_WATERMARKS = {
+    "bom": ("erp", ("bom_header", "bom_detail")),
+    "parts": ("erp", ("parts",)),
+    "incoming": ("erp", ("purchase",)),
+    "history": ("orders", ("daily_product_demand",)),
+}
+
+_executor = ThreadPoolExecutor(max_workers=DATA_LOAD_WORKERS, thread_name_prefix="dashboard-load")
+
+
+class LoadResult:
+    def __init__(self):
+        self.data = {}
+        self.errors = {}
+        self.timings = {}
+        # name -> watermark（無法 probe 時為 None）
+        self.watermarks = {}
+        # name -> 這次是否實際重新讀取（False 代表資料沒變、沿用快取）
+        self.changed = {}
+
+    def failed(self, name):
+        return name in self.errors
+
+    def version(self, *names):
+        """
+        下游 stage 的快取 key：任一來源無 watermark 時回傳 None（不可快取）。
+        """
+        watermarks = tuple(self.watermarks.get(name) for name in names)
+        if any(w is None for w in watermarks):
+            return None
+        return watermarks
+
+
+def _query(connection, query):
+    with connection() as conn:
+        return query(conn)
+
+
+def _probe(name):
+    connection, probe = WATERMARK_PROBES[name]
+    return _query(connection, probe)
+
+
+def _query_watermark(name, probe_futures, deadline):
+    if name not in QUERY_WATERMARKS:
+        return None
+
+    probe_name, tables = QUERY_WATERMARKS[name]
+    future = probe_futures.get(probe_name)
+    if future is None:
+        return None
+
+    try:
+        table_marks = future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except Exception:
+        return None
+
+    watermark = tuple(table_marks.get(table) for table in tables)
+    if name == "history":
+        # 查詢區間以 NOW() 為基準，跨日後即使資料沒變也需要重讀
+        watermark += (date.today().isoformat(),)
+    return watermark
+
+
+def _run_query(name, probe_futures, deadline):
+    connection, query, _, cache_ttl = DASHBOARD_QUERIES[name]
+    started = time.perf_counter()
+
+    with span(f"load.{name}") as load_span:
+        watermark = _query_watermark(name, probe_futures, deadline)
+
+        def load():
+            return _query(connection, query)
+
+        if watermark is not None:
+            value, loaded = query_cache.fetch(name, WATERMARK_CACHE_MAX_AGE_SECONDS, load, watermark)
+        elif cache_ttl:
+            value, loaded = query_cache.fetch(name, cache_ttl, load)
+        else:
+            value, loaded = load(), True
+        load_span.set(cached=not loaded)
+
+    return value, loaded, watermark, time.perf_counter() - started
+
+
+def load_dashboard_inputs(names=None, timeout=DATA_LOAD_TIMEOUT_SECONDS):
+    """
+    每個查詢各自向連線池借連線，在 thread pool 中同時執行。
+
+    - 總延遲約等於最慢的那一個查詢
+    - 每個查詢有自己的 timeout（從送出時起算）
+    - 單一查詢失敗或逾時不影響其他查詢：失敗者記錄在 errors，data 放替代的空結果
+    - 先送出 watermark probe；資料表沒變的查詢直接沿用快取，不做完整讀取
+    """
+    names = list(DASHBOARD_QUERIES) if names is None else list(names)
+    submitted_at = time.monotonic()
+    deadline = submitted_at + timeout
+
+    needed_probes = {QUERY_WATERMARKS[name][0] for name in names if name in QUERY_WATERMARKS}
+    # probe 先送出，確保 executor 會先執行它們，查詢 task 才不會互相卡住
+    # propagate：查詢在 thread pool 執行，span 仍掛在呼叫端的 trace 下
+    probe_futures = {probe: _executor.submit(propagate(_probe, probe)) for probe in needed_probes}
+
+    futures = {
+        name: _executor.submit(propagate(_run_query, name, probe_futures, deadline))
+        for name in names
+    }
+
+    result = LoadResult()
+    for name, future in futures.items():
+        remaining = max(0.0, timeout - (time.monotonic() - submitted_at))
+
+        try:
+            value, loaded, watermark, elapsed = future.result(timeout=remaining)
+            result.data[name] = value
+            result.changed[name] = loaded
+            result.watermarks[name] = watermark
+            result.timings[name] = elapsed
+        except FutureTimeoutError:
+            # 執行中的查詢無法中斷；完成後連線會自動歸還連線池
+            future.cancel()
+            result.errors[name] = f"timed out after {timeout}s"
+        except Exception as e:
+            result.errors[name] = f"{type(e).__name__}: {e}"
+
+        if name in result.errors:
+            result.data[name] = DASHBOARD_QUERIES[name][2]()
+            result.changed[name] = True
+            result.watermarks[name] = None
+            print(f"⚠️ Dashboard query '{name}' failed: {result.errors[name]}", flush=True)
+
+    for probe, future in probe_futures.items():
+        if future.done() and future.exception() is not None:
+            print(f"⚠️ Watermark probe '{probe}' failed: {future.exception()}", flush=True)
+
+    return result
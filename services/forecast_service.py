@@ -85,4 +85,37 @@ def build_forecast(hist_full, forecast_days):
         .astype(int)
     )
 
-    return forecast_df
\ No newline at end of file
+    return forecast_df
+
+
+def accumulate_order_history(chunks):
+    """
+    逐批累加 (order_date, product_id) 的需求量。
+    累計結果最多 lookback 天數 x 產品數筆，與原始明細筆數無關。
+    """
+    totals = None
+
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=["product_id", "qty"])
+        if chunk.empty:
+            continue
+
+        part = chunk.groupby(["order_date", "product_id"], as_index=False)["qty"].sum()
+        if totals is None:
+            totals = part
+        else:
+            totals = (
+                pd.concat([totals, part], ignore_index=True)
+                .groupby(["order_date", "product_id"], as_index=False)["qty"]
+                .sum()
+            )
+
+    if totals is None:
+        return pd.DataFrame({
+            "order_date": pd.Series(dtype="datetime64[ns]"),
+            "product_id": pd.Series(dtype="int64"),
+            "qty": pd.Series(dtype="float64"),
+        })
+
+    totals["product_id"] = totals["product_id"].astype(int)
+    return totals.sort_values("order_date", kind="stable").reset_index(drop=True)
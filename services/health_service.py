@@ -1,7 +1,10 @@
+import time
+
 import pandas as pd
 import numpy as np
 
 from config.settings import (
+    IOT_CHART_MAX_POINTS,
     TEMP_BASE,
     TEMP_WORST,
     VIB_BASE,
@@ -9,6 +12,8 @@ from config.settings import (
     RPM_TARGET,
     RPM_TOLERANCE,
 )
+from observability.metrics import observe_stage
+from observability.tracing import add_span
 
 
 def normalize_score(series, base, worst):
@@ -24,22 +29,110 @@ def normalize_score(series, base, worst):
     return penalty.clip(lower=0.0, upper=1.0)
 
 
-def compute_health_score(iot_df):
+def health_score_values(temperature, vibration, rpm):
     """
     連續式設備健康度:
     - 溫度越高越差
     - 震動越高越差
     - rpm 偏離 target 越多越差
     """
-    df = iot_df.copy()
-
-    temp_penalty = normalize_score(df["temperature"], TEMP_BASE, TEMP_WORST) * 0.35
-    vib_penalty = normalize_score(df["vibration"], VIB_BASE, VIB_WORST) * 0.45
+    temp_penalty = normalize_score(temperature, TEMP_BASE, TEMP_WORST) * 0.35
+    vib_penalty = normalize_score(vibration, VIB_BASE, VIB_WORST) * 0.45
     rpm_penalty = (
-        (df["rpm"] - RPM_TARGET).abs() / RPM_TOLERANCE
+        (rpm - RPM_TARGET).abs() / RPM_TOLERANCE
     ).clip(lower=0.0, upper=1.0) * 0.20
 
-    df["health_score"] = 1.0 - temp_penalty - vib_penalty - rpm_penalty
-    df["health_score"] = df["health_score"].clip(lower=0.0, upper=1.0)
+    return (1.0 - temp_penalty - vib_penalty - rpm_penalty).clip(lower=0.0, upper=1.0)
+
+
+def compute_health_score(iot_df):
+    df = iot_df.copy()
+    df["health_score"] = health_score_values(df["temperature"], df["vibration"], df["rpm"])
+    return df
+
+
+def _tail_per_machine(iot_df, max_points):
+    return (
+        iot_df.sort_values(["machine_id", "created_at"], kind="stable")
+        .groupby("machine_id", sort=False)
+        .tail(max_points)
+    )
+
+
+def summarize_health_chunks(chunks, max_points=IOT_CHART_MAX_POINTS):
+    """
+    逐批計算健康度，以每台設備的 running sum / count 累計平均健康度，
+    不需要先把整段 IoT 歷史讀進記憶體；傳入的 chunk 不會被修改。
+
+    回傳 (machine_health_df, iot_df)：
+    - machine_health_df: machine_id, machine_health
+    - iot_df: 含 health_score 的明細（給圖表用）。每台設備只留最新 max_points 點，
+      所以記憶體不隨 lookback 視窗成長；max_points=None 保留全部（呼叫端已限制筆數時），
+      0 代表不需要曲線、回傳空表
+    """
+    health_sum = {}
+    health_count = {}
+    series = []
+    kept = 0
+    # 只計入健康度計算本身，不含逐批讀取的時間
+    elapsed = 0.0
+    rows = 0
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+
+        started = time.perf_counter()
+        rows += len(chunk)
+        temperature = chunk["temperature"].fillna(TEMP_BASE)
+        vibration = chunk["vibration"].fillna(VIB_BASE)
+        rpm = chunk["rpm"].fillna(RPM_TARGET)
+        health_score = health_score_values(temperature, vibration, rpm)
+
+        # category 欄位各 chunk 的 categories 不同，先轉回字串再累計
+        machine_id = chunk["machine_id"].astype(str)
+
+        agg = health_score.groupby(machine_id).agg(["sum", "count"])
+        for key, row in agg.iterrows():
+            health_sum[key] = health_sum.get(key, 0.0) + float(row["sum"])
+            health_count[key] = health_count.get(key, 0) + int(row["count"])
+
+        if max_points != 0:
+            scored = pd.DataFrame({
+                "id": chunk["id"],
+                "machine_id": machine_id,
+                "temperature": temperature,
+                "vibration": vibration,
+                "rpm": rpm,
+                "created_at": chunk["created_at"],
+                "health_score": health_score,
+            })
+            series.append(scored)
+            kept += len(scored)
+            # 累積超過上限的兩倍才裁切一次，攤平 groupby 的成本；峰值約為 2 x max_points x 設備數
+            if max_points is not None and kept > 2 * max_points * len(health_sum):
+                series = [_tail_per_machine(pd.concat(series, ignore_index=True), max_points)]
+                kept = len(series[0])
+        elapsed += time.perf_counter() - started
+
+    machine_ids = sorted(health_sum)
+    machine_health_df = pd.DataFrame({
+        "machine_id": machine_ids,
+        "machine_health": [health_sum[m] / health_count[m] for m in machine_ids],
+    })
+
+    if rows:
+        observe_stage("health", elapsed, rows)
+        add_span("stage.health", elapsed, rows_in=rows, rows_out=len(machine_ids))
+
+    if series:
+        iot_df = pd.concat(series, ignore_index=True)
+        if max_points is not None:
+            iot_df = _tail_per_machine(iot_df, max_points)
+        iot_df = iot_df.sort_values(["machine_id", "created_at"], kind="stable").reset_index(drop=True)
+    else:
+        iot_df = pd.DataFrame(
+            columns=["id", "machine_id", "temperature", "vibration", "rpm", "created_at", "health_score"]
+        )
 
-    return df
\ No newline at end of file
+    return machine_health_df, iot_df
\ No newline at end of file
@@ -0,0 +1,268 @@
+import asyncio
+import queue
+import threading
+import time
+
+from config.settings import (
+    IOT_STREAM_POLL_SECONDS,
+    IOT_STREAM_BATCH_LIMIT,
+    IOT_STREAM_QUEUE_SIZE,
+)
+from repositories.backend import get_backend
+from services.dashboard_service import format_machine_series
+from services.health_service import summarize_health_chunks
+from services.snapshot_service import iot_snapshot
+
+backend = get_backend()
+
+
+def build_iot_event(iot_df, after_id):
+    """
+    新的 machine_data 明細 -> 推送事件：只含 after_id 之後的點，格式與 charts.iot.machines 相同。
+    """
+    _, scored_df = summarize_health_chunks([iot_df], max_points=None)
+    return {
+        "from": after_id,
+        "cursor": int(iot_df["id"].max()),
+        "rows": int(len(iot_df)),
+        "machines": format_machine_series(scored_df),
+    }
+
+
+def _time_cursor(created_at, row_id=None):
+    text = created_at.strftime("%Y-%m-%d %H:%M:%S")
+    return text if row_id is None else f"{text},{row_id}"
+
+
+def load_iot_delta(since, machine_id=None, limit=IOT_STREAM_BATCH_LIMIT):
+    """
+    給無法維持長連線的 client 輪詢用：只回傳 since 之後的資料。
+
+    - since 為 int：machine_data.id 游標（主鍵範圍查詢，建議用於持續輪詢）
+    - since 為 datetime：created_at 起點（指定 machine_id 時走複合索引）
+    - since 為 (datetime, id)：上一次回傳的時間游標，依 (created_at, id) 接續
+    回傳的 cursor 與 since 同型別（時間游標為 "YYYY-MM-DD HH:MM:SS,id"）；
+    has_more=True 代表受 limit 限制，應立即再查一次。
+    兩種游標都假設 machine_data 只有單一寫入者（見 iot_repository.get_iot_since_id）。
+    """
+    if isinstance(since, int):
+        with backend.iot_connection() as conn:
+            iot_df = backend.get_iot_since_id(conn, since, limit=limit, machine_id=machine_id)
+        cursor = int(iot_df["id"].max()) if not iot_df.empty else since
+    else:
+        # created_at 只到秒，同一秒有多台設備的資料；以 id 區分才不會在 limit 切開時漏掉同一秒的其他筆
+        after_time, after_id = since if isinstance(since, tuple) else (since, None)
+        with backend.iot_connection() as conn:
+            iot_df = backend.get_iot_since_time(conn, after_time, after_id=after_id, limit=limit, machine_id=machine_id)
+        if iot_df.empty:
+            cursor = _time_cursor(after_time, after_id)
+        else:
+            cursor = _time_cursor(iot_df["created_at"].iloc[-1], int(iot_df["id"].iloc[-1]))
+
+    has_more = len(iot_df) >= limit
+
+    machines = {}
+    if not iot_df.empty:
+        _, scored_df = summarize_health_chunks([iot_df], max_points=None)
+        machines = format_machine_series(scored_df)
+
+    return {
+        "machines": machines,
+        "machine_ids": list(machines.keys()),
+        "cursor": cursor,
+        "rows": int(len(iot_df)),
+        "has_more": has_more,
+    }
+
+
+def current_health():
+    """
+    整段 IoT 視窗的健康度 / 產能係數，取自 iot snapshot（不額外查詢）。
+    """
+    iot, _ = iot_snapshot.get()
+    return {
+        "health": iot["health"],
+        "machine_health": iot["machine_health"],
+    }
+
+
+class _Subscriber:
+    """
+    同步（thread）訂閱者：SSE generator 以 queue.get(timeout) 等待事件。
+    """
+
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        # 消化太慢、佇列滿了之後不再推送，由前端重新載入整段資料
+        self.overflowed = False
+
+    def deliver(self, event):
+        """
+        由 polling thread 呼叫；佇列滿時回傳 False。
+        """
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+
+class AsyncSubscriber:
+    """
+    asyncio 訂閱者（ASGI 模式）：事件經 call_soon_threadsafe 放進 event loop 上的 asyncio.Queue，
+    等待事件的連線不占用 thread。
+    """
+
+    def __init__(self, loop, queue_size):
+        self._loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # full() 是跨 thread 的近似判斷；真的放不下時由 _put 標記溢位
+        if self.queue.full():
+            return False
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # event loop 已關閉
+            return False
+        return True
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class IotBroadcaster:
+    """
+    所有 SSE 連線共用一個 polling thread：
+
+    - 每 poll_seconds 以 id 游標讀取新的 machine_data（主鍵範圍查詢，成本只與新資料筆數有關；
+      假設單一寫入者，見 iot_repository.get_iot_since_id）
+    - 計算健康度並組成事件後，推送到每個訂閱者的佇列；連線數不影響 DB 負載
+    - 沒有訂閱者時 polling thread 自動結束，下次有人訂閱再啟動
+    """
+
+    def __init__(self, connection, poll_seconds, batch_limit, queue_size):
+        self._connection = connection
+        self.poll_seconds = poll_seconds
+        self.batch_limit = batch_limit
+        self.queue_size = queue_size
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._cursor = None
+        self._worker = None
+
+        self.polls = 0
+        self.events = 0
+        self.rows = 0
+        self.overflows = 0
+        self.last_error = None
+
+    def subscribe(self, subscriber=None):
+        """
+        回傳 (subscriber, cursor)：cursor 之後的資料都會交給 subscriber.deliver()。
+        未指定 subscriber 時建立同步的 _Subscriber。
+        """
+        with self._lock:
+            if self._cursor is None:
+                with self._connection() as conn:
+                    self._cursor = backend.get_latest_iot_id(conn)
+
+            if subscriber is None:
+                subscriber = _Subscriber(self.queue_size)
+            self._subscribers.add(subscriber)
+
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._loop, name="iot-stream", daemon=True)
+                self._worker.start()
+
+            return subscriber, self._cursor
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def catch_up(self, since, cursor):
+        """
+        補齊 (since, cursor] 之間的資料；超過 batch_limit 筆時回傳 None，由前端整段重新載入。
+        """
+        with self._connection() as conn:
+            iot_df = backend.get_iot_since_id(conn, since, upto_id=cursor, limit=self.batch_limit + 1)
+
+        if len(iot_df) > self.batch_limit:
+            return None
+        if iot_df.empty:
+            return {"from": since, "cursor": cursor, "rows": 0, "machines": {}}
+        return build_iot_event(iot_df, since)
+
+    def _poll_once(self):
+        with self._lock:
+            cursor = self._cursor
+
+        with self._connection() as conn:
+            iot_df = backend.get_iot_since_id(conn, cursor, limit=self.batch_limit)
+
+        self.polls += 1
+        if iot_df.empty:
+            return
+
+        event = build_iot_event(iot_df, cursor)
+        event.update(current_health())
+
+        with self._lock:
+            self._cursor = event["cursor"]
+            subscribers = list(self._subscribers)
+
+        self.events += 1
+        self.rows += event["rows"]
+
+        for subscriber in subscribers:
+            if not subscriber.deliver(event):
+                subscriber.overflowed = True
+                self.overflows += 1
+                self.unsubscribe(subscriber)
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._worker = None
+                    # 沒有人訂閱期間的資料由下一個訂閱者自行補齊
+                    self._cursor = None
+                    return
+
+            try:
+                self._poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ IoT stream poll failed: {e}", flush=True)
+
+            time.sleep(self.poll_seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "cursor": self._cursor,
+                "running": self._worker is not None,
+                "poll_seconds": self.poll_seconds,
+                "polls": self.polls,
+                "events": self.events,
+                "rows": self.rows,
+                "overflows": self.overflows,
+                "last_error": self.last_error,
+            }
+
+
+iot_broadcaster = IotBroadcaster(
+    backend.iot_connection,
+    poll_seconds=IOT_STREAM_POLL_SECONDS,
+    batch_limit=IOT_STREAM_BATCH_LIMIT,
+    queue_size=IOT_STREAM_QUEUE_SIZE,
+)
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+宣告式 stage DAG：每個 stage 宣告讀取的輸入來源（data_loader 的查詢名稱）與上游 stage，
+輸出依「輸入的 hash」memoize：
+
+- 來源的 key 是 data_loader 的 watermark；沒有 watermark 時改用內容 hash
+- volatile_sources（每次讀取都會變的來源，例如 IoT）不做內容 hash，只以物件身分區分
+- stage 的 key = hash(stage 名稱, 來源 key, 上游 stage 的 key)，不需要 hash 中間結果本身
+- daily=True 的 stage（依賴今天日期）另外把日期列入 key，跨日自動重算
+- key 沒變的 stage 直接沿用上次的輸出，例如 IoT 變動時只重算依賴產能係數的 stage
+
+stage 輸出會被之後的執行共用，不可就地修改。
+"""
+import hashlib
+import pickle
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+from observability.metrics import observe_stage, output_rows
+from observability.tracing import add_span, tracing_active
+
+
+class StageError(Exception):
+    """
+    stage 判定無法繼續（例如必要資料為空）；訊息直接顯示給使用者，不會被快取。
+    """
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), deps=(), daily=False):
+        """
+        func(*輸入來源的值, *上游 stage 的輸出)，依 inputs、deps 宣告的順序傳入。
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.deps = tuple(deps)
+        self.daily = daily
+
+
+def _update_hash(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(repr(list(zip(value.columns, map(str, value.dtypes)))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (tuple, list)):
+        h.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update_hash(h, item)
+    else:
+        h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def content_hash(value):
+    h = hashlib.blake2b(digest_size=16)
+    _update_hash(h, value)
+    return h.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, stages, volatile_sources=()):
+        self.stages = {}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                # 依宣告順序登錄，上游必須先宣告，因此不會有循環
+                raise ValueError(f"stage '{stage.name}' depends on undeclared stages: {missing}")
+            self.stages[stage.name] = stage
+
+        # stage 名稱 -> (key, 輸出)；每個 stage 只保留最近一次的結果
+        self._memo = {}
+        self._locks = {name: threading.Lock() for name in self.stages}
+        self.volatile_sources = frozenset(volatile_sources)
+        # 來源名稱 -> (值, 內容 hash)；同一個物件不重複 hash
+        self._source_hashes = {}
+        self._generation = 0
+        self._source_lock = threading.Lock()
+        self._stats = {name: {"runs": 0, "hits": 0, "last_seconds": None, "total_seconds": 0.0} for name in self.stages}
+
+    def closure(self, targets):
+        """
+        targets 及其所有上游，依執行順序（宣告順序）排列。
+        """
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def _source_key(self, name, value, watermark):
+        if watermark is not None:
+            return repr(watermark)
+
+        with self._source_lock:
+            cached = self._source_hashes.get(name)
+            if cached is not None and cached[0] is value:
+                return cached[1]
+            if name in self.volatile_sources:
+                # 新讀取的內容幾乎一定不同，hash 整份資料只是多一次全表掃描；直接給新的 key
+                self._generation += 1
+                key = f"{name}#{self._generation}"
+                self._source_hashes[name] = (value, key)
+                return key
+
+        key = content_hash(value)
+        with self._source_lock:
+            self._source_hashes[name] = (value, key)
+        return key
+
+    def _stage_key(self, stage, source_keys, keys):
+        parts = [stage.name]
+        if stage.daily:
+            parts.append(date.today().isoformat())
+        parts.extend(source_keys[name] for name in stage.inputs)
+        parts.extend(keys[name] for name in stage.deps)
+        return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+    def run(self, targets, sources, watermarks=None):
+        """
+        sources: 來源名稱 -> 值；watermarks: 來源名稱 -> watermark（None 或缺少時改用內容 hash）。
+        回傳 {stage 名稱: 輸出}，包含 targets 及其所有上游。
+        """
+        watermarks = watermarks or {}
+        order = self.closure(targets)
+
+        source_names = {name for stage_name in order for name in self.stages[stage_name].inputs}
+        source_keys = {
+            name: self._source_key(name, sources[name], watermarks.get(name))
+            for name in source_names
+        }
+
+        keys = {}
+        outputs = {}
+        for name in order:
+            stage = self.stages[name]
+            key = self._stage_key(stage, source_keys, keys)
+            keys[name] = key
+            stats = self._stats[name]
+
+            args = [sources[source] for source in stage.inputs]
+            args.extend(outputs[dep] for dep in stage.deps)
+            traced = tracing_active()
+
+            # 同一個 stage 同時只計算一次，其他 thread 等待後直接取用結果
+            with self._locks[name]:
+                cached = self._memo.get(name)
+                if cached is not None and cached[0] == key:
+                    stats["hits"] += 1
+                    outputs[name] = cached[1]
+                    if traced:
+                        add_span(f"stage.{name}", 0.0, cached=True, rows_out=output_rows(cached[1]))
+                    continue
+
+                started = time.perf_counter()
+                value = stage.func(*args)
+                elapsed = time.perf_counter() - started
+
+                rows_out = output_rows(value)
+                observe_stage(name, elapsed, rows_out)
+                if traced:
+                    rows_in = [output_rows(arg) for arg in args]
+                    add_span(
+                        f"stage.{name}", elapsed,
+                        cached=False,
+                        rows_in=sum(rows for rows in rows_in if rows is not None),
+                        rows_out=rows_out,
+                    )
+                self._memo[name] = (key, value)
+                stats["runs"] += 1
+                stats["last_seconds"] = round(elapsed, 4)
+                stats["total_seconds"] += elapsed
+                outputs[name] = value
+
+        return outputs
+
+    def invalidate(self, name=None):
+        if name is not None and name not in self.stages:
+            raise ValueError(f"unknown stage: {name}")
+        names = [name] if name is not None else list(self.stages)
+        for stage_name in names:
+            with self._locks[stage_name]:
+                self._memo.pop(stage_name, None)
+
+    def stats(self):
+        return {
+            name: {
+                "inputs": list(stage.inputs),
+                "deps": list(stage.deps),
+                "cached": name in self._memo,
+                **self._stats[name],
+                "total_seconds": round(self._stats[name]["total_seconds"], 4),
+            }
+            for name, stage in self.stages.items()
+        }
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+排程 planning run：定期計算 forecast / BOM 展開 / MRP，整批寫入 PostgreSQL 的結果表（postgres/planning_runs.sql）。
+DASHBOARD_PLAN_SOURCE=runs 時 plan snapshot 只讀取最新一次完成的 run，重的計算完全不在 app 內進行。
+
+    python -m services.planning_run              # 每 PLANNING_RUN_INTERVAL_SECONDS 執行一次
+    python -m services.planning_run --once       # 執行一次後結束（例如交給 cron）
+
+- 輸入的 watermark 與最新一次 run 相同時跳過（訂單彙總的 watermark 含日期，每天至少重算一次）
+- 一次 run 的所有結果在同一個交易中寫入，讀取端不會看到寫到一半的 run
+"""
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from config.settings import PLANNING_RUN_INTERVAL_SECONDS, PLANNING_RUN_KEEP, WATERMARK_CACHE_MAX_AGE_SECONDS
+from db.postgres import pg_connection
+from observability.metrics import PLANNING_RUN_SECONDS
+from repositories.planning_repository import (
+    get_latest_planning_run,
+    get_run_forecast_df,
+    get_run_part_risk_df,
+    get_run_po_summary_df,
+    insert_failed_planning_run,
+    insert_planning_run,
+    prune_planning_runs,
+)
+from repositories.query_cache import query_cache
+from services.dashboard_service import (
+    DASHBOARD_PIPELINE,
+    PLAN_INPUTS,
+    REQUIRED_INPUTS,
+    format_stage,
+    rank_risk_parts,
+)
+from services.data_loader import load_dashboard_inputs
+from services.pipeline import StageError
+
+FORECAST_COLUMNS = ["forecast_date", "product_id", "forecast_demand_qty", "parts_per_unit"]
+
+
+def execute_planning_run(force=False):
+    """
+    回傳 {"status": completed / skipped / failed, ...}。
+    """
+    started_at = datetime.now()
+    started = time.perf_counter()
+
+    inputs = load_dashboard_inputs(PLAN_INPUTS)
+    version = inputs.version(*PLAN_INPUTS)
+    input_version = repr(version) if version is not None else None
+
+    try:
+        if not force and input_version is not None:
+            with pg_connection() as conn:
+                latest = get_latest_planning_run(conn)
+            if latest is not None and latest["input_version"] == input_version:
+                return {"status": "skipped", "run_id": latest["run_id"]}
+
+        failed_required = [name for name in REQUIRED_INPUTS if inputs.failed(name)]
+        if failed_required:
+            raise StageError("; ".join(f"{name}: {inputs.errors[name]}" for name in failed_required))
+
+        outputs = DASHBOARD_PIPELINE.run(["summaries", "bom_explode"], inputs.data, inputs.watermarks)
+        sim = outputs["mrp"]
+        po_summary = outputs["summaries"]["po_summary"]
+        forecast = outputs["bom_explode"]["forecast_base"][FORECAST_COLUMNS]
+
+        with pg_connection() as conn:
+            run_id = insert_planning_run(
+                conn, started_at, input_version, sim, po_summary, forecast,
+                round(time.perf_counter() - started, 4),
+            )
+            pruned = prune_planning_runs(conn, PLANNING_RUN_KEEP)
+            conn.commit()
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        PLANNING_RUN_SECONDS.labels(status="failed").observe(elapsed)
+        error = f"{type(e).__name__}: {e}"
+        try:
+            with pg_connection() as conn:
+                insert_failed_planning_run(conn, started_at, input_version, error, round(elapsed, 4))
+                conn.commit()
+        except Exception as log_error:
+            print(f"⚠️ Could not record failed planning run: {log_error}", flush=True)
+        return {"status": "failed", "error": error}
+
+    elapsed = time.perf_counter() - started
+    PLANNING_RUN_SECONDS.labels(status="completed").observe(elapsed)
+    return {
+        "status": "completed",
+        "run_id": run_id,
+        "sim_rows": len(sim),
+        "po_rows": len(po_summary),
+        "pruned": pruned,
+        "seconds": round(elapsed, 4),
+    }
+
+
+def _load_run(run):
+    run_id = run["run_id"]
+    with pg_connection() as conn:
+        part_risk_summary = get_run_part_risk_df(conn, run_id)
+        po_summary = get_run_po_summary_df(conn, run_id)
+        forecast_base = get_run_forecast_df(conn, run_id)
+
+    summaries = {
+        "part_risk_summary": part_risk_summary,
+        "risk_parts": rank_risk_parts(part_risk_summary),
+        "po_summary": po_summary,
+    }
+    explode = {
+        "forecast_base": forecast_base,
+        "total_demand_part_qty": float((forecast_base["forecast_demand_qty"] * forecast_base["parts_per_unit"]).sum()),
+    }
+    return {
+        "updated_at": pd.Timestamp(run["finished_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+        **format_stage(summaries, explode),
+        "warnings": [],
+        "planning_run": {
+            "run_id": run_id,
+            "started_at": pd.Timestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_seconds": run["duration_seconds"],
+            "sim_rows": run["sim_rows"],
+        },
+    }
+
+
+def load_plan_from_run():
+    """
+    plan section（與 build_plan_section 相同格式），取自最新一次完成的 planning run。
+    每次只查最新的 run_id；run 沒變時沿用快取，不重讀結果表。
+    """
+    with pg_connection() as conn:
+        run = get_latest_planning_run(conn)
+
+    if run is None:
+        return {"error": "尚未有完成的 planning run，請確認排程工作（python -m services.planning_run）已執行。"}
+
+    section, loaded = query_cache.fetch(
+        "planning_run", WATERMARK_CACHE_MAX_AGE_SECONDS, lambda: _load_run(run), run["run_id"]
+    )
+    return {**section, "data_changed": {"planning_run": loaded}}
+
+
+def run_scheduler(interval_seconds=PLANNING_RUN_INTERVAL_SECONDS, force=False):
+    print(f"🚀 Planning run scheduler started (every {interval_seconds}s)", flush=True)
+    while True:
+        try:
+            _log(execute_planning_run(force=force))
+        except Exception as e:
+            # 單次失敗（例如 DB 暫時無法連線）不應讓排程停止
+            print(f"❌ Planning run crashed: {type(e).__name__}: {e}", flush=True)
+        force = False
+        time.sleep(interval_seconds)
+
+
+def _log(result):
+    if result["status"] == "completed":
+        print(
+            f"✅ Planning run {result['run_id']}: {result['sim_rows']} sim rows, "
+            f"{result['po_rows']} PO rows in {result['seconds']}s",
+            flush=True,
+        )
+    elif result["status"] == "skipped":
+        print(f"⏭️ Inputs unchanged since planning run {result['run_id']}, skipped", flush=True)
+    else:
+        print(f"❌ Planning run failed: {result['error']}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute forecast / MRP and persist the results as a planning run")
+    parser.add_argument("--once", action="store_true", help="run once and exit")
+    parser.add_argument("--force", action="store_true", help="run even if the inputs are unchanged")
+    parser.add_argument("--interval", type=float, default=PLANNING_RUN_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    if args.once:
+        result = execute_planning_run(force=args.force)
+        _log(result)
+        raise SystemExit(1 if result["status"] == "failed" else 0)
+
+    run_scheduler(args.interval, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
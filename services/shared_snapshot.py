@@ -0,0 +1,168 @@
+"""
+多 worker（pre-fork）部署時共用 dashboard snapshot：
+
+- 各 worker 以 fcntl.flock 競爭同一個 lock 檔，取得 lock 的 worker 成為 leader，
+  只有 leader 執行背景重算（DB 負載不會隨 worker 數增加）
+- leader 每次重算後把結果 pickle 寫入 mmap 檔；其他 worker 讀 mmap，序號變了才反序列化
+- leader 結束時 OS 釋放 lock，其他 worker 下一次選舉即接手
+
+mmap 檔的 header（little-endian）：
+
+    seq (uint64) | length (uint64) | generated_at (float64, epoch) | last_access (float64, epoch)
+
+seq 為 seqlock：寫入期間為奇數，讀者讀到奇數或前後不一致就重讀。
+"""
+import fcntl
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+
+HEADER = struct.Struct("<QQdd")
+HEADER_SIZE = 64
+_LAST_ACCESS_OFFSET = 24
+
+
+class SnapshotTooLarge(Exception):
+    pass
+
+
+class SharedSnapshotStore:
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # sparse file：只有實際寫入的頁面占用記憶體 / 磁碟
+            if os.fstat(fd).st_size < HEADER_SIZE + capacity:
+                os.ftruncate(fd, HEADER_SIZE + capacity)
+            self._mm = mmap.mmap(fd, HEADER_SIZE + capacity)
+        finally:
+            os.close(fd)
+
+        self._write_lock = threading.Lock()
+        self.publishes = 0
+        self.loads = 0
+        self.retries = 0
+
+    def _header(self):
+        return HEADER.unpack_from(self._mm, 0)
+
+    def seq(self):
+        return self._header()[0]
+
+    def publish(self, value, generated_at):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.capacity:
+            raise SnapshotTooLarge(f"{len(data)} bytes > SHARED_SNAPSHOT_MAX_BYTES ({self.capacity})")
+
+        with self._write_lock:
+            seq, _, _, last_access = self._header()
+            seq += 1 if seq % 2 == 0 else 0
+            HEADER.pack_into(self._mm, 0, seq, 0, 0.0, last_access)  # 奇數：寫入中
+            self._mm[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+            HEADER.pack_into(self._mm, 0, seq + 1, len(data), generated_at, last_access)
+            self.publishes += 1
+
+    def load(self, known_seq=None, attempts=100):
+        """
+        回傳 (seq, value, generated_at)；尚未發佈過時 value 為 None。
+        seq 與 known_seq 相同時不反序列化，value 回傳 None。
+        """
+        for _ in range(attempts):
+            seq, length, generated_at, _ = self._header()
+            if seq % 2 == 1:
+                self.retries += 1
+                time.sleep(0.001)
+                continue
+            if seq == 0 or seq == known_seq:
+                return seq, None, generated_at
+
+            data = self._mm[HEADER_SIZE:HEADER_SIZE + length]
+            if self.seq() != seq:
+                self.retries += 1
+                continue
+
+            self.loads += 1
+            return seq, pickle.loads(data), generated_at
+
+        raise TimeoutError(f"shared snapshot {self.path} kept changing while reading")
+
+    def touch(self):
+        # 各 worker 的讀取時間，leader 用來判斷是否閒置；寫入競爭無妨（只取最近值）
+        struct.pack_into("<d", self._mm, _LAST_ACCESS_OFFSET, time.time())
+
+    def last_access(self):
+        return struct.unpack_from("<d", self._mm, _LAST_ACCESS_OFFSET)[0]
+
+    def stats(self):
+        seq, length, generated_at, last_access = self._header()
+        return {
+            "path": self.path,
+            "seq": seq,
+            "bytes": length,
+            "capacity": self.capacity,
+            "generated_at": generated_at or None,
+            "last_access": last_access or None,
+            "publishes": self.publishes,
+            "loads": self.loads,
+            "retries": self.retries,
+        }
+
+
+class LeaderElection:
+    """
+    以 flock 選出 leader：非阻塞地嘗試取得 lock，取得後持有到 process 結束。
+    """
+
+    def __init__(self, lock_path, interval_seconds, on_elected):
+        self.lock_path = lock_path
+        self.interval_seconds = interval_seconds
+        self._on_elected = on_elected
+        self._fd = None
+        self._thread = None
+        self.elected_at = None
+
+    @property
+    def is_leader(self):
+        return self._fd is not None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self.elected_at = time.time()
+        print(f"👑 Worker {os.getpid()} elected snapshot leader", flush=True)
+        self._on_elected()
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self.try_acquire():
+                time.sleep(self.interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="snapshot-election", daemon=True)
+        self._thread.start()
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "is_leader": self.is_leader,
+            "elected_at": self.elected_at,
+        }
\ No newline at end of file
@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+
+from config.settings import (
+    DASHBOARD_SNAPSHOT_REFRESH_SECONDS,
+    DASHBOARD_SNAPSHOT_MAX_STALE_SECONDS,
+    DASHBOARD_SNAPSHOT_IDLE_SECONDS,
+    DASHBOARD_PLAN_REFRESH_SECONDS,
+    DASHBOARD_PLAN_MAX_STALE_SECONDS,
+    DASHBOARD_PLAN_SOURCE,
+    DASHBOARD_SNAPSHOT_BACKGROUND,
+    SHARED_SNAPSHOT_DIR,
+    SHARED_SNAPSHOT_MAX_BYTES,
+    SHARED_SNAPSHOT_ELECTION_SECONDS,
+    SHARED_SNAPSHOT_WAIT_SECONDS,
+)
+from observability.tracing import start_trace
+from services.dashboard_service import build_iot_section, build_plan_section
+from services.planning_run import load_plan_from_run
+from services.shared_snapshot import LeaderElection, SharedSnapshotStore
+
+
+class SnapshotCache:
+    """
+    共用的預先計算結果：
+
+    - refresh_seconds 內視為新鮮，直接回傳
+    - 超過 refresh_seconds 但未超過 max_stale_seconds：回傳舊值，同時在背景重算（stale-while-revalidate）
+    - 沒有值或超過 max_stale_seconds：同步重算
+    - 同一時間只會有一個重算在進行（single-flight），其他請求等待並共用結果
+    - 背景 worker 依 refresh_seconds 定期重算；超過 idle_seconds 沒有人讀取時暫停
+    - attach_store 後為多 worker 模式：只有 leader 重算並發佈到共用 mmap，其他 worker 只讀取
+    """
+
+    def __init__(self, name, compute, refresh_seconds, max_stale_seconds, idle_seconds=None):
+        self.name = name
+        self._compute = compute
+        self.refresh_seconds = refresh_seconds
+        self.max_stale_seconds = max(max_stale_seconds, refresh_seconds)
+        self.idle_seconds = idle_seconds
+
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._value = None
+        self._computed_at = None        # time.monotonic()
+        self._computed_wall = None      # time.time()
+        # 產生目前 value 的那次計算的 trace（observability.tracing），回應的 Server-Timing 使用
+        self._trace = None
+        self._last_access = time.monotonic()
+        self._revalidating = False
+        self._worker = None
+
+        # 多 worker 模式（見 services/shared_snapshot.py）
+        self._store = None
+        self._election = None
+        self._store_seq = None
+
+        self.computations = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.last_error = None
+        self.last_duration_seconds = None
+
+    def _current(self):
+        with self._lock:
+            return self._value, self._computed_at, self._computed_wall
+
+    def _age(self, computed_at):
+        return None if computed_at is None else time.monotonic() - computed_at
+
+    def refresh(self, newer_than=None):
+        """
+        single-flight 重算。newer_than: 等到鎖之後若已有比這個時間更新的結果就直接使用。
+        """
+        with self._compute_lock:
+            value, computed_at, _ = self._current()
+            if value is not None and newer_than is not None and computed_at > newer_than:
+                with self._lock:
+                    self.coalesced += 1
+                return value
+
+            started = time.monotonic()
+            try:
+                with start_trace(self.name) as root:
+                    value = self._compute()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            trace = root.to_dict()
+
+            with self._lock:
+                self._value = value
+                self._trace = trace
+                self._computed_at = time.monotonic()
+                self._computed_wall = time.time()
+                self.computations += 1
+                self.last_error = None
+                self.last_duration_seconds = self._computed_at - started
+                computed_wall = self._computed_wall
+
+            if self._store is not None and self._election.is_leader:
+                try:
+                    self._store.publish((value, trace), computed_wall)
+                except Exception as e:
+                    print(f"⚠️ Snapshot '{self.name}' publish failed: {e}", flush=True)
+
+            return value
+
+    def _revalidate_in_background(self):
+        with self._lock:
+            if self._revalidating:
+                return
+            self._revalidating = True
+
+        def run():
+            try:
+                self.refresh(newer_than=time.monotonic() - self.refresh_seconds)
+            except Exception as e:
+                print(f"⚠️ Snapshot '{self.name}' refresh failed: {e}", flush=True)
+            finally:
+                with self._lock:
+                    self._revalidating = False
+
+        threading.Thread(target=run, name=f"{self.name}-revalidate", daemon=True).start()
+
+    def attach_store(self, store, election):
+        self._store = store
+        self._election = election
+
+    def _is_follower(self):
+        return self._store is not None and not self._election.is_leader
+
+    def _sync_from_store(self):
+        seq, published, generated_at = self._store.load(self._store_seq)
+        if published is None:
+            return
+        value, trace = published
+        with self._lock:
+            self._value = value
+            self._trace = trace
+            self._computed_wall = generated_at
+            self._computed_at = time.monotonic() - max(0.0, time.time() - generated_at)
+            self._store_seq = seq
+
+    def _get_shared(self, requested_at):
+        """
+        follower：讀取 leader 發佈的結果。leader 尚未發佈時最多等 SHARED_SNAPSHOT_WAIT_SECONDS；
+        結果超過 max_stale_seconds（leader 卡住）時才自行重算。
+        """
+        self._store.touch()
+        deadline = requested_at + SHARED_SNAPSHOT_WAIT_SECONDS
+        while True:
+            self._sync_from_store()
+            value, computed_at, _ = self._current()
+            if value is not None or time.monotonic() >= deadline or not self._is_follower():
+                break
+            time.sleep(0.05)
+
+        if value is None or self._age(computed_at) > self.max_stale_seconds:
+            try:
+                self.refresh(newer_than=requested_at)
+            except Exception:
+                if value is None:
+                    raise
+
+    def get(self):
+        """
+        回傳 (value, meta)；meta 包含 snapshot 的產生時間與年齡。
+        """
+        requested_at = time.monotonic()
+        with self._lock:
+            self._last_access = requested_at
+
+        if self._is_follower():
+            self._get_shared(requested_at)
+            return self._value_with_meta()
+
+        value, computed_at, _ = self._current()
+        age = self._age(computed_at)
+
+        if value is None or age > self.max_stale_seconds:
+            try:
+                self.refresh(newer_than=requested_at)
+            except Exception:
+                if value is None:
+                    raise
+                # 重算失敗時，寧可回傳過期資料
+        elif age > self.refresh_seconds:
+            self._revalidate_in_background()
+            with self._lock:
+                self.stale_served += 1
+
+        return self._value_with_meta()
+
+    def _value_with_meta(self):
+        value, computed_at, computed_wall = self._current()
+        age = self._age(computed_at)
+        with self._lock:
+            trace = self._trace
+        return value, {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(computed_wall)),
+            "age_seconds": round(age, 3),
+            "stale": age > self.refresh_seconds,
+            "trace": trace,
+        }
+
+    def start_background_refresh(self):
+        if self._worker is not None:
+            return
+
+        def loop():
+            while True:
+                with self._lock:
+                    idle_for = time.monotonic() - self._last_access
+                if self._store is not None:
+                    # 其他 worker 的讀取也算
+                    idle_for = min(idle_for, time.time() - self._store.last_access())
+
+                if self.idle_seconds is None or idle_for <= self.idle_seconds:
+                    try:
+                        self.refresh(newer_than=time.monotonic() - self.refresh_seconds / 2)
+                    except Exception as e:
+                        print(f"⚠️ Snapshot '{self.name}' refresh failed: {e}", flush=True)
+
+                time.sleep(self.refresh_seconds)
+
+        self._worker = threading.Thread(target=loop, name=f"{self.name}-refresher", daemon=True)
+        self._worker.start()
+
+    def stats(self):
+        value, computed_at, _ = self._current()
+        with self._lock:
+            return {
+                "has_value": value is not None,
+                "age_seconds": round(self._age(computed_at), 3) if computed_at is not None else None,
+                "refresh_seconds": self.refresh_seconds,
+                "max_stale_seconds": self.max_stale_seconds,
+                "computations": self.computations,
+                "coalesced": self.coalesced,
+                "stale_served": self.stale_served,
+                "last_duration_seconds": (
+                    round(self.last_duration_seconds, 6) if self.last_duration_seconds is not None else None
+                ),
+                "last_error": self.last_error,
+                "shared": None if self._store is None else {
+                    **self._store.stats(),
+                    "role": "leader" if self._election.is_leader else "follower",
+                },
+            }
+
+
+# IoT / 健康度變化快，forecast / MRP 只在訂單、庫存、採購異動時改變，各自用不同的重算頻率
+iot_snapshot = SnapshotCache(
+    "iot",
+    build_iot_section,
+    refresh_seconds=DASHBOARD_SNAPSHOT_REFRESH_SECONDS,
+    max_stale_seconds=DASHBOARD_SNAPSHOT_MAX_STALE_SECONDS,
+    idle_seconds=DASHBOARD_SNAPSHOT_IDLE_SECONDS,
+)
+
+plan_snapshot = SnapshotCache(
+    "plan",
+    # runs：只讀取排程 planning run 的最新結果，app 內不做 forecast / MRP 計算
+    load_plan_from_run if DASHBOARD_PLAN_SOURCE == "runs" else build_plan_section,
+    refresh_seconds=DASHBOARD_PLAN_REFRESH_SECONDS,
+    max_stale_seconds=DASHBOARD_PLAN_MAX_STALE_SECONDS,
+    idle_seconds=DASHBOARD_SNAPSHOT_IDLE_SECONDS,
+)
+
+SNAPSHOTS = {
+    "iot": iot_snapshot,
+    "plan": plan_snapshot,
+}
+
+
+def start_background_refresh():
+    for snapshot in SNAPSHOTS.values():
+        snapshot.start_background_refresh()
+
+
+def start_shared_snapshots(directory):
+    """
+    多 worker 模式：所有 worker 共用 directory 下的 mmap 檔與 leader lock。
+    只有選上 leader 的 worker 啟動背景重算。
+    """
+    os.makedirs(directory, exist_ok=True)
+    election = LeaderElection(
+        os.path.join(directory, "leader.lock"),
+        SHARED_SNAPSHOT_ELECTION_SECONDS,
+        on_elected=start_background_refresh,
+    )
+    for name, snapshot in SNAPSHOTS.items():
+        store = SharedSnapshotStore(os.path.join(directory, f"{name}.snap"), SHARED_SNAPSHOT_MAX_BYTES)
+        snapshot.attach_store(store, election)
+
+    election.start()
+    return election
+
+
+def start_snapshots():
+    """
+    依設定啟動 snapshot 重算（app.py / asgi.py 共用）。
+    """
+    if SHARED_SNAPSHOT_DIR:
+        # gunicorn 多 worker：只有 leader worker 重算（見 gunicorn.conf.py）
+        return start_shared_snapshots(SHARED_SNAPSHOT_DIR)
+    if DASHBOARD_SNAPSHOT_BACKGROUND:
+        start_background_refresh()
+    return None
\ No newline at end of file
@@ -1,3 +1,4 @@
+import argparse
 import random
 import time
 from datetime import datetime
@@ -9,7 +10,10 @@ from config.settings import (
     SIMULATOR_SLEEP_SECONDS,
     SIMULATOR_CLEANUP_EVERY,
     SIMULATOR_CLEANUP_MINUTES,
+    SIMULATOR_SEED,
+    SIMULATOR_RECORD_PATH,
 )
+from simulators.recording import encode_machine_id, open_recording_writer, write_records
 
 
 machine_states = {
@@ -22,30 +26,30 @@ def clamp(value, min_value, max_value):
     return max(min_value, min(value, max_value))
 
 
-def update_machine_state(state):
+def update_machine_state(state, rng=random):
     state["temperature"] = clamp(
-        state["temperature"] + random.uniform(-0.6, 0.9), 60, 95
+        state["temperature"] + rng.uniform(-0.6, 0.9), 60, 95
     )
     state["vibration"] = clamp(
-        state["vibration"] + random.uniform(-0.0025, 0.0035), 0.01, 0.10
+        state["vibration"] + rng.uniform(-0.0025, 0.0035), 0.01, 0.10
     )
     state["rpm"] = int(clamp(
-        state["rpm"] + random.randint(-12, 15), 1000, 1600
+        state["rpm"] + rng.randint(-12, 15), 1000, 1600
     ))
 
-    if random.random() < 0.08:
+    if rng.random() < 0.08:
         state["temperature"] = clamp(
-            state["temperature"] + random.uniform(2.0, 5.0), 60, 95
+            state["temperature"] + rng.uniform(2.0, 5.0), 60, 95
         )
         state["vibration"] = clamp(
-            state["vibration"] + random.uniform(0.008, 0.02), 0.01, 0.10
+            state["vibration"] + rng.uniform(0.008, 0.02), 0.01, 0.10
         )
         state["rpm"] = int(clamp(
-            state["rpm"] + random.randint(20, 50), 1000, 1600
+            state["rpm"] + rng.randint(20, 50), 1000, 1600
         ))
 
 
-def insert_machine_data(cursor, machine_id, state):
+def insert_machine_data(cursor, machine_id, state, created_at=None):
     sql = """
     INSERT INTO machine_data
     (machine_id, temperature, vibration, rpm, created_at)
@@ -57,7 +61,7 @@ def insert_machine_data(cursor, machine_id, state):
         round(state["temperature"], 2),
         round(state["vibration"], 4),
         state["rpm"],
-        datetime.now(),
+        created_at or datetime.now(),
     )
 
     cursor.execute(sql, data)
@@ -73,22 +77,45 @@ def cleanup_old_data(cursor):
     print(f"🧹 Cleaned records older than {SIMULATOR_CLEANUP_MINUTES} minutes", flush=True)
 
 
-def run_simulator():
+def run_simulator(seed=SIMULATOR_SEED, record_path=SIMULATOR_RECORD_PATH):
+    """
+    seed: 固定亂數種子，讓同一組參數產生完全相同的資料序列
+    record_path: 指定時把每一輪讀值寫入錄製檔，之後可用 simulators.replay 重播
+    """
+    rng = random.Random(seed)
+
     conn = get_mysql_conn_with_retry(
         retries=SIMULATOR_RETRIES,
         delay=SIMULATOR_RETRY_DELAY,
     )
     cursor = conn.cursor()
+    record_file = None
+    if record_path:
+        # 先檢查所有 machine_id 放得進錄製檔，避免寫了 DB 才在錄製時失敗
+        for machine_id in machine_states:
+            encode_machine_id(machine_id)
+        record_file = open_recording_writer(record_path)
 
-    print("🚀 IoT Simulator started...", flush=True)
+    print(f"🚀 IoT Simulator started (seed={seed})...", flush=True)
+    if record_file:
+        print(f"⏺️ Recording readings to {record_path}", flush=True)
 
     loop_count = 0
 
     try:
         while True:
+            now = datetime.now()
+
             for machine_id, state in machine_states.items():
-                update_machine_state(state)
-                insert_machine_data(cursor, machine_id, state)
+                update_machine_state(state, rng)
+                insert_machine_data(cursor, machine_id, state, created_at=now)
+
+            if record_file:
+                write_records(
+                    record_file,
+                    int(now.timestamp() * 1000),
+                    list(machine_states.items()),
+                )
 
             loop_count += 1
             if loop_count % SIMULATOR_CLEANUP_EVERY == 0:
@@ -100,10 +127,21 @@ def run_simulator():
         print("\n🛑 Simulator stopped by user.", flush=True)
 
     finally:
+        if record_file:
+            record_file.close()
         cursor.close()
         conn.close()
         print("✅ MySQL connection closed.", flush=True)
 
 
+def main():
+    parser = argparse.ArgumentParser(description="IoT machine data simulator")
+    parser.add_argument("--seed", type=int, default=SIMULATOR_SEED)
+    parser.add_argument("--record", default=SIMULATOR_RECORD_PATH, help="錄製檔路徑")
+    args = parser.parse_args()
+
+    run_simulator(seed=args.seed, record_path=args.record)
+
+
 if __name__ == "__main__":
-    run_simulator()
\ No newline at end of file
+    main()
\ No newline at end of file
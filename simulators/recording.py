@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+
+RECORD_MAGIC = b"MRPIOT01"
+RECORD_HEADER_SIZE = len(RECORD_MAGIC)
+
+# Fixed-width little-endian record, one per generated reading.
+RECORD_DTYPE = np.dtype([
+    ("ts_ms", "<i8"),
+    ("machine_id", "S8"),
+    ("temperature", "<f4"),
+    ("vibration", "<f4"),
+    ("rpm", "<i4"),
+])
+MACHINE_ID_BYTES = RECORD_DTYPE["machine_id"].itemsize
+
+
+def open_recording_writer(path):
+    """
+    以附加模式開啟錄製檔；新檔案先寫入 magic header。
+    """
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    f = open(path, "ab")
+
+    if is_new:
+        f.write(RECORD_MAGIC)
+    else:
+        _check_header(path)
+
+    return f
+
+
+def encode_machine_id(machine_id):
+    """
+    machine_id 以 UTF-8 存成固定寬度欄位；超過寬度時 numpy 會靜默截斷，因此直接拒絕。
+    """
+    encoded = machine_id.encode("utf-8")
+    if len(encoded) > MACHINE_ID_BYTES:
+        raise ValueError(
+            f"machine_id {machine_id!r} is {len(encoded)} bytes; recordings store at most {MACHINE_ID_BYTES}"
+        )
+    return encoded
+
+
+def write_records(f, ts_ms, readings):
+    """
+    readings: [(machine_id, state), ...]，同一輪寫入同一個 timestamp。
+    """
+    batch = np.zeros(len(readings), dtype=RECORD_DTYPE)
+
+    for i, (machine_id, state) in enumerate(readings):
+        batch[i] = (
+            ts_ms,
+            encode_machine_id(machine_id),
+            round(state["temperature"], 2),
+            round(state["vibration"], 4),
+            int(state["rpm"]),
+        )
+
+    f.write(batch.tobytes())
+    f.flush()
+
+
+def load_recording(path):
+    """
+    以 numpy.memmap 開啟錄製檔，不會把整個檔案讀進記憶體。
+    """
+    _check_header(path)
+
+    payload_size = os.path.getsize(path) - RECORD_HEADER_SIZE
+    if payload_size % RECORD_DTYPE.itemsize != 0:
+        raise ValueError(
+            f"{path}: truncated recording ({payload_size} bytes is not a multiple of "
+            f"{RECORD_DTYPE.itemsize})"
+        )
+
+    if payload_size == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=RECORD_HEADER_SIZE)
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        magic = f.read(RECORD_HEADER_SIZE)
+
+    if magic != RECORD_MAGIC:
+        raise ValueError(f"{path}: not an IoT recording (bad magic {magic!r})")
@@ -0,0 +1,131 @@
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from db.mysql import get_mysql_conn_with_retry
+from config.settings import (
+    SIMULATOR_RETRIES,
+    SIMULATOR_RETRY_DELAY,
+    SIMULATOR_REPLAY_BATCH_SIZE,
+)
+from simulators.recording import load_recording
+
+
+INSERT_SQL = """
+INSERT INTO machine_data
+(machine_id, temperature, vibration, rpm, created_at)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def parse_speed(value):
+    """
+    "1" / "10" / "10x" -> 倍速；"max" -> None（不等待，盡快寫入）
+    """
+    value = str(value).strip().lower()
+    if value == "max":
+        return None
+
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0 or 'max'")
+    return speed
+
+
+def _to_rows(records, created_at_ms):
+    created_at = [datetime.fromtimestamp(ms / 1000.0) for ms in created_at_ms.tolist()]
+
+    return list(zip(
+        np.char.decode(records["machine_id"], "utf-8").tolist(),
+        np.round(records["temperature"].astype(float), 2).tolist(),
+        np.round(records["vibration"].astype(float), 4).tolist(),
+        records["rpm"].tolist(),
+        created_at,
+    ))
+
+
+def replay_recording(records, sink, speed=1.0, batch_size=SIMULATOR_REPLAY_BATCH_SIZE):
+    """
+    依錄製的時間間隔重播讀值。
+
+    - speed=1.0 / 10.0: 依原始間隔（除以倍速）排程，created_at 為實際寫入時間
+    - speed=None (max): 不等待，created_at 以原始間隔重新對齊到「現在」為止
+    sink(rows) 接收 [(machine_id, temperature, vibration, rpm, created_at), ...]
+    """
+    if len(records) == 0:
+        return 0
+
+    ts_ms = np.asarray(records["ts_ms"], dtype=np.int64)
+    first_ts = int(ts_ms[0])
+    start_ms = int(time.time() * 1000)
+
+    if speed is None:
+        created_at_ms = ts_ms - int(ts_ms[-1]) + start_ms
+        for start in range(0, len(records), batch_size):
+            stop = start + batch_size
+            sink(_to_rows(records[start:stop], created_at_ms[start:stop]))
+        return len(records)
+
+    scheduled_ms = start_ms + ((ts_ms - first_ts) / speed).astype(np.int64)
+
+    # 同一個錄製 timestamp 的讀值一起寫入
+    boundaries = np.flatnonzero(np.diff(ts_ms)) + 1
+    for group in np.split(np.arange(len(records)), boundaries):
+        due_ms = int(scheduled_ms[group[0]])
+        wait = (due_ms - time.time() * 1000) / 1000.0
+        if wait > 0:
+            time.sleep(wait)
+
+        sink(_to_rows(records[group], scheduled_ms[group]))
+
+    return len(records)
+
+
+def mysql_sink(cursor):
+    def sink(rows):
+        cursor.executemany(INSERT_SQL, rows)
+        print(f"▶️ Replayed {len(rows)} readings (last at {rows[-1][4]})", flush=True)
+
+    return sink
+
+
+def run_replay(path, speed=1.0, loop=False):
+    records = load_recording(path)
+    print(f"📼 Loaded {len(records)} readings from {path}", flush=True)
+
+    conn = get_mysql_conn_with_retry(
+        retries=SIMULATOR_RETRIES,
+        delay=SIMULATOR_RETRY_DELAY,
+    )
+    cursor = conn.cursor()
+    sink = mysql_sink(cursor)
+
+    try:
+        while True:
+            replay_recording(records, sink, speed=speed)
+            if not loop:
+                break
+
+    except KeyboardInterrupt:
+        print("\n🛑 Replay stopped by user.", flush=True)
+
+    finally:
+        cursor.close()
+        conn.close()
+        print("✅ MySQL connection closed.", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded IoT session into MySQL")
+    parser.add_argument("path", help="simulators.iot_simulator --record 產生的錄製檔")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10, 10x 或 max")
+    parser.add_argument("--loop", action="store_true", help="播完後從頭重播")
+    args = parser.parse_args()
+
+    run_replay(args.path, speed=args.speed, loop=args.loop)
+
+
+if __name__ == "__main__":
+    main()
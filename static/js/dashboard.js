@@ -1,7 +1,26 @@
 let LANG = "en";
-let dashboardData = null;
 let selectedMachine = null;
 
+// 各 section 各自輪詢：IoT / KPI 變化快，forecast / MRP / 採購建議只在資料異動時改變
+const sections = {
+    kpi: null,
+    iot: null,
+    forecast: null,
+    mrp: null,
+    po: null
+};
+
+// 每個 section 最後一次收到的 ETag；內容沒變時伺服器回 304，不必重新解析與重繪
+const etags = {};
+
+const POLL_INTERVALS = {
+    kpi: 2000,
+    iot: 2000,
+    forecast: 10000,
+    mrp: 30000,
+    po: 30000
+};
+
 const TEXT = {
     zh: {
         title: "智慧製造即時監控 Dashboard",
@@ -96,24 +115,25 @@ function applyLang() {
 }
 
 function renderCompareChart() {
-    if (!dashboardData) return;
+    if (!sections.forecast) return;
+    const compare = sections.forecast.compare;
 
     Plotly.react("compare_chart", [
         {
-            x: dashboardData.charts.compare.x,
-            y: dashboardData.charts.compare.demand,
+            x: compare.x,
+            y: compare.demand,
             type: "bar",
             name: TEXT[LANG].original_demand_legend
         },
         {
-            x: dashboardData.charts.compare.x,
-            y: dashboardData.charts.compare.output,
+            x: compare.x,
+            y: compare.output,
             type: "bar",
             name: TEXT[LANG].adjusted_demand_legend
         },
         {
-            x: dashboardData.charts.compare.x,
-            y: dashboardData.charts.compare.gap,
+            x: compare.x,
+            y: compare.gap,
             type: "scatter",
             mode: "lines+markers",
             name: TEXT[LANG].gap_legend
@@ -125,15 +145,17 @@ function renderCompareChart() {
         height: 350,
         margin: { t: 50, l: 50, r: 20, b: 50 },
         paper_bgcolor: "#0f1b33",
-        plot_bgcolor: "#0f1b33"
+        plot_bgcolor: "#0f1b33",
+        // columnar 格式的 x 是 epoch ms，需明確指定為日期軸
+        xaxis: { type: "date" }
     }, { responsive: true });
 }
 
 function renderIotChart() {
-    if (!dashboardData || !dashboardData.charts || !dashboardData.charts.iot) return;
+    if (!sections.iot) return;
 
-    const machines = dashboardData.charts.iot.machines || {};
-    const machineIds = dashboardData.charts.iot.machine_ids || [];
+    const machines = sections.iot.machines || {};
+    const machineIds = sections.iot.machine_ids || [];
 
     if (!selectedMachine && machineIds.length > 0) {
         selectedMachine = machineIds[0];
@@ -153,24 +175,24 @@ function renderIotChart() {
 
     Plotly.react("iot_chart", [
         {
-            x: current.x,
-            y: current.temperature,
+            x: current.x.slice(),
+            y: current.temperature.slice(),
             type: "scatter",
             mode: "lines+markers",
             name: TEXT[LANG].temperature,
             yaxis: "y"
         },
         {
-            x: current.x,
-            y: current.vibration,
+            x: current.x.slice(),
+            y: current.vibration.slice(),
             type: "scatter",
             mode: "lines+markers",
             name: TEXT[LANG].vibration,
             yaxis: "y2"
         },
         {
-            x: current.x,
-            y: current.health_score,
+            x: current.x.slice(),
+            y: current.health_score.slice(),
             type: "scatter",
             mode: "lines+markers",
             name: TEXT[LANG].health_score,
@@ -183,6 +205,7 @@ function renderIotChart() {
         margin: { t: 50, l: 50, r: 60, b: 50 },
         paper_bgcolor: "#0f1b33",
         plot_bgcolor: "#0f1b33",
+        xaxis: { type: "date" },
         yaxis: { title: TEXT[LANG].temperature },
         yaxis2: {
             title: TEXT[LANG].vibration,
@@ -200,12 +223,12 @@ function renderIotChart() {
 }
 
 function renderPoChart() {
-    if (!dashboardData) return;
+    if (!sections.po) return;
 
     Plotly.react("po_chart", [
         {
-            x: dashboardData.charts.po.labels,
-            y: dashboardData.charts.po.values,
+            x: sections.po.po.labels,
+            y: sections.po.po.values,
             type: "bar",
             name: TEXT[LANG].suggested_po_legend
         }
@@ -223,18 +246,17 @@ function setLang(lang) {
     LANG = lang;
     applyLang();
 
-    if (dashboardData) {
-        renderCompareChart();
-        renderIotChart();
-        renderPoChart();
-        renderSummary();
-        renderPoTable();
-        renderRiskParts();
-    }
+    renderCompareChart();
+    renderIotChart();
+    renderPoChart();
+    renderSummary();
+    renderPoTable();
+    renderRiskParts();
 }
 
 function renderRiskParts() {
-    const data = dashboardData;
+    const data = sections.mrp;
+    if (!data) return;
     const riskBox = document.getElementById("risk_parts");
     if (data.risk_parts.length > 0) {
         riskBox.innerHTML = data.risk_parts.map(x => `<span class="tag danger">${x}</span>`).join("");
@@ -244,7 +266,8 @@ function renderRiskParts() {
 }
 
 function renderSummary() {
-    const data = dashboardData;
+    const data = sections.forecast;
+    if (!data) return;
     if (LANG === "zh") {
         document.getElementById("summary_block").innerHTML = `
             <p>近 ${data.summary.lookback_days} 天歷史資料已補齊無訂單日後再進行需求預測，降低平均值高估風險。</p>
@@ -265,7 +288,8 @@ function renderSummary() {
 }
 
 function renderPoTable() {
-    const data = dashboardData;
+    const data = sections.po;
+    if (!data) return;
     const tableRows = data.po_table.length > 0
         ? `
             <table class="data-table">
@@ -304,55 +328,227 @@ function renderPoTable() {
     document.getElementById("po_table").innerHTML = tableRows;
 }
 
-async function loadDashboard() {
-    const status = document.getElementById("status_text");
-    status.textContent = TEXT[LANG].loading;
+function renderKpi() {
+    const data = sections.kpi;
+    if (!data) return;
 
-    try {
-        const res = await fetch("/api/dashboard?t=" + new Date().getTime());
-        const data = await res.json();
+    document.getElementById("updated_at").textContent = data.updated_at;
+    document.getElementById("avg_health").textContent = data.kpi.avg_health.toFixed(3);
+    document.getElementById("min_health").textContent = data.kpi.min_health.toFixed(3);
+    document.getElementById("capacity_factor").textContent = data.kpi.capacity_factor.toFixed(3);
+    document.getElementById("total_original_qty").textContent = data.kpi.total_forecast_demand;
+    document.getElementById("total_forecast_qty").textContent = data.kpi.total_expected_output;
+    document.getElementById("risk_po").textContent = `${data.kpi.risk_count} / ${data.kpi.total_po_qty}`;
+}
 
-        if (data.error) {
-            document.body.innerHTML = `
-                <div style="padding:40px;color:white;background:#081224;font-family:Arial;">
-                    <h1>智慧製造 Dashboard</h1>
-                    <p>${data.error}</p>
-                </div>
-            `;
-            return;
+function renderMachineSelector() {
+    const selector = document.getElementById("machine_selector");
+    const machineIds = sections.iot.machine_ids || [];
+
+    selector.innerHTML = machineIds.map(id => `<option value="${id}">${id}</option>`).join("");
+
+    if (!selectedMachine || !machineIds.includes(selectedMachine)) {
+        selectedMachine = machineIds.length > 0 ? machineIds[0] : null;
+    }
+
+    selector.value = selectedMachine || "";
+    selector.onchange = function () {
+        selectedMachine = this.value;
+        renderIotChart();
+    };
+}
+
+const SECTION_RENDERERS = {
+    kpi: [renderKpi],
+    iot: [renderMachineSelector, renderIotChart, openIotStream],
+    forecast: [renderCompareChart, renderSummary],
+    mrp: [renderRiskParts],
+    po: [renderPoChart, renderPoTable]
+};
+
+function showError(message) {
+    document.body.innerHTML = `
+        <div style="padding:40px;color:white;background:#081224;font-family:Arial;">
+            <h1>智慧製造 Dashboard</h1>
+            <p>${message}</p>
+        </div>
+    `;
+}
+
+const SERIES_KEYS = ["x", "temperature", "vibration", "rpm", "health_score"];
+
+// IoT 曲線改由 /api/iot/stream（SSE）推送新點；連線中時不再輪詢整段 /api/dashboard/iot
+let iotStream = null;
+
+function iotStreaming() {
+    // 連線中斷時 EventSource 會自動以 Last-Event-ID 重連並補齊缺口，期間不需要輪詢
+    return iotStream !== null;
+}
+
+// 伺服器時間沒有時區；一律當作 UTC 解析，與 columnar 格式的 epoch ms 一致（Plotly 以 UTC 顯示）
+function parseServerTime(value) {
+    if (typeof value === "number") return value;
+    return Date.parse(value.replace(" ", "T") + "Z");
+}
+
+// ===== columnar 二進位格式（見 routes/columnar.py）=====
+const COLUMNAR_MIMETYPE = "application/vnd.mrp.columnar";
+const COLUMNAR_SECTIONS = ["iot", "forecast"];
+const COLUMNAR_SUPPORTED = typeof TextDecoder !== "undefined" && typeof BigInt64Array !== "undefined";
+
+function decodeColumnar(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== "MRPC") throw new Error("invalid columnar payload");
+
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const dataStart = Math.ceil((8 + headerLength) / 8) * 8;
+
+    const columns = header.columns.map(col => {
+        const offset = dataStart + col.offset;
+        if (col.dtype === "float32") return new Float32Array(buffer, offset, col.length);
+        if (col.dtype === "int32") return new Int32Array(buffer, offset, col.length);
+        // int64 epoch ms -> Float64Array（ms 在 2^53 內可精確表示）
+        const ints = new BigInt64Array(buffer, offset, col.length);
+        const out = new Float64Array(col.length);
+        for (let i = 0; i < col.length; i++) out[i] = Number(ints[i]);
+        return out;
+    });
+
+    const revive = value => {
+        if (Array.isArray(value)) return value.map(revive);
+        if (value && typeof value === "object") {
+            if ("$col" in value) return columns[value.$col];
+            const out = {};
+            Object.entries(value).forEach(([key, item]) => { out[key] = revive(item); });
+            return out;
         }
+        return value;
+    };
 
-        dashboardData = data;
+    return revive(header.payload);
+}
 
-        document.getElementById("updated_at").textContent = data.updated_at;
-        document.getElementById("avg_health").textContent = data.kpi.avg_health.toFixed(3);
-        document.getElementById("min_health").textContent = data.kpi.min_health.toFixed(3);
-        document.getElementById("capacity_factor").textContent = data.kpi.capacity_factor.toFixed(3);
-        document.getElementById("total_original_qty").textContent = data.kpi.total_forecast_demand;
-        document.getElementById("total_forecast_qty").textContent = data.kpi.total_expected_output;
-        document.getElementById("risk_po").textContent = `${data.kpi.risk_count} / ${data.kpi.total_po_qty}`;
+function renderHealthKpi(health) {
+    document.getElementById("avg_health").textContent = health.avg_health.toFixed(3);
+    document.getElementById("min_health").textContent = health.min_health.toFixed(3);
+    document.getElementById("capacity_factor").textContent = health.capacity_factor.toFixed(3);
+}
 
-        const selector = document.getElementById("machine_selector");
-        const machineIds = data.charts.iot.machine_ids || [];
+function applyIotEvent(event) {
+    const iot = sections.iot;
+    if (!iot || (iot.cursor !== null && event.cursor <= iot.cursor)) return;
 
-        selector.innerHTML = machineIds.map(id => `<option value="${id}">${id}</option>`).join("");
+    let newMachine = false;
 
-        if (!selectedMachine || !machineIds.includes(selectedMachine)) {
-            selectedMachine = machineIds.length > 0 ? machineIds[0] : null;
+    Object.entries(event.machines).forEach(([machineId, points]) => {
+        const series = iot.machines[machineId];
+        if (!series) {
+            iot.machines[machineId] = points;
+            iot.machine_ids.push(machineId);
+            newMachine = true;
+            return;
         }
 
-        selector.value = selectedMachine || "";
-        selector.onchange = function () {
-            selectedMachine = this.value;
-            renderIotChart();
-        };
+        // columnar 載入的序列是 TypedArray / epoch ms，第一次追加時轉成一般陣列並統一時間格式
+        SERIES_KEYS.forEach(key => {
+            if (!Array.isArray(series[key])) series[key] = Array.from(series[key]);
+        });
+        if (typeof series.x[0] === "number") {
+            points.x = points.x.map(parseServerTime);
+        }
+        SERIES_KEYS.forEach(key => series[key].push(...points[key]));
+
+        // 只保留 lookback_hours 內的點（以最新一點的伺服器時間為基準）
+        const cutoff = parseServerTime(series.x[series.x.length - 1]) - iot.lookback_hours * 3600 * 1000;
+        let drop = 0;
+        while (drop < series.x.length && parseServerTime(series.x[drop]) < cutoff) drop++;
+        if (drop > 0) SERIES_KEYS.forEach(key => series[key].splice(0, drop));
+
+        if (machineId === selectedMachine) {
+            Plotly.extendTraces("iot_chart", {
+                x: [points.x, points.x, points.x],
+                y: [points.temperature, points.vibration, points.health_score]
+            }, [0, 1, 2], series.x.length);
+        }
+    });
+
+    iot.cursor = event.cursor;
+
+    if (event.health) {
+        iot.health = event.health;
+        iot.machine_health = event.machine_health;
+        renderHealthKpi(event.health);
+    }
 
-        renderRiskParts();
-        renderSummary();
-        renderPoTable();
-        renderCompareChart();
+    if (newMachine) {
+        renderMachineSelector();
         renderIotChart();
-        renderPoChart();
+    }
+}
+
+function closeIotStream() {
+    if (iotStream) {
+        iotStream.close();
+        iotStream = null;
+    }
+}
+
+function openIotStream() {
+    if (!window.EventSource || !sections.iot || iotStream) return;
+
+    const since = sections.iot.cursor;
+    iotStream = new EventSource("/api/iot/stream" + (since !== null ? `?since=${since}` : ""));
+
+    iotStream.addEventListener("iot", e => applyIotEvent(JSON.parse(e.data)));
+
+    // 放棄重連（例如伺服器回傳錯誤）時改回輪詢
+    iotStream.onerror = () => {
+        if (iotStream && iotStream.readyState === EventSource.CLOSED) {
+            iotStream = null;
+        }
+    };
+
+    // 落後太多：重新載入整段資料後再連線
+    iotStream.addEventListener("reset", () => {
+        closeIotStream();
+        etags.iot = null;
+        loadSection("iot").then(openIotStream);
+    });
+}
+
+async function loadSection(name) {
+    const status = document.getElementById("status_text");
+    if (!status) return;
+    if (name === "iot" && iotStreaming()) return;
+    status.textContent = TEXT[LANG].loading;
+
+    try {
+        const headers = etags[name] ? { "If-None-Match": etags[name] } : {};
+        if (COLUMNAR_SUPPORTED && COLUMNAR_SECTIONS.includes(name)) {
+            headers.Accept = `${COLUMNAR_MIMETYPE}, application/json;q=0.5`;
+        }
+        const res = await fetch(`/api/dashboard/${name}`, { headers, cache: "no-store" });
+
+        if (res.status === 304) {
+            status.textContent = TEXT[LANG].updated;
+            return;
+        }
+
+        const contentType = res.headers.get("Content-Type") || "";
+        const data = contentType.startsWith(COLUMNAR_MIMETYPE)
+            ? decodeColumnar(await res.arrayBuffer())
+            : await res.json();
+
+        if (data.error) {
+            showError(data.error);
+            return;
+        }
+
+        etags[name] = res.headers.get("ETag");
+        sections[name] = data;
+        SECTION_RENDERERS[name].forEach(render => render());
 
         status.textContent = TEXT[LANG].updated;
     } catch (err) {
@@ -362,5 +558,7 @@ async function loadDashboard() {
 }
 
 applyLang();
-loadDashboard();
-setInterval(loadDashboard, 1000);
\ No newline at end of file
+Object.keys(POLL_INTERVALS).forEach(name => {
+    loadSection(name);
+    setInterval(() => loadSection(name), POLL_INTERVALS[name]);
+});
\ No newline at end of file
@@ -0,0 +1,67 @@
+import contextlib
+from datetime import datetime
+
+import pandas as pd
+
+from routes.iot_routes import _parse_since
+import services.iot_stream as iot_stream
+
+
+class _TimeCursorBackend:
+    """
+    以 DataFrame 模擬 get_iot_since_time 的 (created_at, id) 游標語意。
+    """
+
+    def __init__(self, iot_df):
+        self.iot_df = iot_df
+
+    @contextlib.contextmanager
+    def iot_connection(self):
+        yield None
+
+    def get_iot_since_time(self, conn, after_time, after_id=None, limit=None, machine_id=None):
+        df = self.iot_df
+        if after_id is None:
+            df = df[df["created_at"] > after_time]
+        else:
+            df = df[(df["created_at"] > after_time) | ((df["created_at"] == after_time) & (df["id"] > after_id))]
+        return df.sort_values(["created_at", "id"]).head(limit).reset_index(drop=True)
+
+
+def test_time_cursor_pages_through_rows_sharing_one_second(monkeypatch):
+    # 模擬器每次以同一個 now 寫入所有設備：整頁都落在同一秒
+    now = datetime(2024, 5, 1, 8, 0, 0)
+    iot_df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "machine_id": pd.Categorical(["M-01", "M-02", "M-03", "M-01"]),
+        "temperature": [60.0, 61.0, 62.0, 63.0],
+        "vibration": [0.01, 0.02, 0.03, 0.04],
+        "rpm": [1500.0, 1500.0, 1500.0, 1500.0],
+        "created_at": [now, now, now, datetime(2024, 5, 1, 8, 0, 5)],
+    })
+    monkeypatch.setattr(iot_stream, "backend", _TimeCursorBackend(iot_df))
+
+    since = datetime(2024, 5, 1, 7, 59, 0)
+    seen = []
+    for _ in range(10):
+        page = iot_stream.load_iot_delta(since, limit=1)
+        seen.extend(page["machine_ids"])
+        # 游標以字串回傳，經過 /api/iot 的解析後再帶回來
+        since = _parse_since(page["cursor"])
+        if not page["has_more"]:
+            break
+
+    assert seen == ["M-01", "M-02", "M-03", "M-01"]
+    assert page["cursor"] == "2024-05-01 08:00:05,4"
+
+
+def test_time_cursor_without_new_rows_is_unchanged(monkeypatch):
+    monkeypatch.setattr(iot_stream, "backend", _TimeCursorBackend(pd.DataFrame({
+        "id": pd.Series([], dtype="int64"),
+        "created_at": pd.Series([], dtype="datetime64[ns]"),
+    })))
+
+    page = iot_stream.load_iot_delta((datetime(2024, 5, 1, 8, 0, 0), 7), limit=5)
+
+    assert page["rows"] == 0
+    assert page["cursor"] == "2024-05-01 08:00:00,7"
@@ -0,0 +1,124 @@
+import struct
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from repositories.pg_copy import PGCOPY_SIGNATURE, copy_query_binary
+
+
+SCHEMA = (
+    ("product_id", "int"),
+    ("qty", "float"),
+    ("order_date", "date"),
+    ("created_at", "datetime"),
+)
+
+PG_EPOCH = datetime(2000, 1, 1)
+
+
+def _field(fmt, value):
+    data = struct.pack(fmt, value)
+    return struct.pack(">i", len(data)) + data
+
+
+def _pgcopy(rows, header_extension=b""):
+    """
+    依 PostgreSQL binary COPY 格式組出 buffer：signature、flags、header extension、各 tuple、結尾 -1。
+    rows 的每個欄位為已編碼的 field（長度 + 內容），NULL 以長度 -1 表示。
+    """
+    buf = PGCOPY_SIGNATURE + struct.pack(">ii", 0, len(header_extension)) + header_extension
+    for fields in rows:
+        buf += struct.pack(">h", len(fields)) + b"".join(fields)
+    return buf + struct.pack(">h", -1)
+
+
+def _row(product_id, qty, order_date, created_at):
+    return [
+        _field(">q", product_id),
+        _field(">d", qty),
+        _field(">i", (datetime.combine(order_date, datetime.min.time()) - PG_EPOCH).days),
+        _field(">q", (created_at - PG_EPOCH) // pd.Timedelta(microseconds=1)),
+    ]
+
+
+class _CopyCursor:
+    def __init__(self, data):
+        self.data = data
+        self.sql = None
+
+    def copy_expert(self, sql, buf):
+        self.sql = sql
+        buf.write(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class _CopyConnection:
+    def __init__(self, data):
+        self.cur = _CopyCursor(data)
+
+    def cursor(self):
+        return self.cur
+
+
+def test_parses_fixed_width_fields():
+    data = _pgcopy([
+        _row(1001, 6.5, date(2024, 5, 1), datetime(2024, 5, 1, 8, 30, 15, 250)),
+        _row(1002, -2.0, date(1999, 12, 31), datetime(1999, 12, 31, 23, 59, 59)),
+    ], header_extension=b"\x00" * 6)
+    conn = _CopyConnection(data)
+
+    df = copy_query_binary(conn, "SELECT product_id, qty, order_date, created_at FROM orders;", SCHEMA)
+
+    assert conn.cur.sql == (
+        "COPY (SELECT product_id, qty, order_date, created_at FROM orders) TO STDOUT WITH (FORMAT binary)"
+    )
+    assert list(df.columns) == [name for name, _ in SCHEMA]
+    assert df["product_id"].tolist() == [1001, 1002]
+    assert df["qty"].tolist() == [6.5, -2.0]
+    assert df["order_date"].tolist() == [pd.Timestamp("2024-05-01"), pd.Timestamp("1999-12-31")]
+    assert df["created_at"].tolist() == [
+        pd.Timestamp("2024-05-01 08:30:15.000250"),
+        pd.Timestamp("1999-12-31 23:59:59"),
+    ]
+    assert str(df["product_id"].dtype) == "int64"
+    assert str(df["qty"].dtype) == "float64"
+    assert str(df["order_date"].dtype) == "datetime64[ns]"
+    assert str(df["created_at"].dtype) == "datetime64[ns]"
+
+
+def test_empty_result_keeps_schema():
+    df = copy_query_binary(_CopyConnection(_pgcopy([])), "SELECT 1", SCHEMA)
+
+    assert len(df) == 0
+    assert list(df.columns) == [name for name, _ in SCHEMA]
+
+
+def test_rejects_null_fields():
+    row = _row(1001, 6.5, date(2024, 5, 1), datetime(2024, 5, 1))
+    row[1] = struct.pack(">i", -1)
+
+    with pytest.raises(ValueError):
+        copy_query_binary(_CopyConnection(_pgcopy([row] * 4)), "SELECT 1", SCHEMA)
+
+
+def test_rejects_variable_width_values():
+    # 兩筆長度不同的 tuple：不是固定寬度
+    row = _row(1001, 6.5, date(2024, 5, 1), datetime(2024, 5, 1))
+    row[0] = _field(">i", 1001)
+
+    with pytest.raises(ValueError):
+        copy_query_binary(_CopyConnection(_pgcopy([row])), "SELECT 1", SCHEMA)
+
+
+def test_rejects_variable_width_kinds_and_bad_signature():
+    with pytest.raises(ValueError):
+        copy_query_binary(_CopyConnection(_pgcopy([])), "SELECT 1", (("part_no", "str"),))
+
+    with pytest.raises(ValueError):
+        copy_query_binary(_CopyConnection(b"COPY" + _pgcopy([])[4:]), "SELECT 1", SCHEMA)
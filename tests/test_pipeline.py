@@ -0,0 +1,144 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import services.pipeline as pipeline
+from services.pipeline import Pipeline, Stage
+
+
+class _Recorder:
+    """
+    記錄每個 stage 實際執行的次數。
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def stage(self, name, func):
+        def run(*args):
+            self.calls.append(name)
+            return func(*args)
+        return run
+
+
+def _pipeline(recorder, volatile_sources=()):
+    # orders -> demand -> plan <- stock；sensors -> health
+    return Pipeline([
+        Stage("demand", recorder.stage("demand", lambda orders: orders["qty"].sum()), inputs=("orders",)),
+        Stage("stock", recorder.stage("stock", lambda stock: stock["qty"].sum()), inputs=("stock",)),
+        Stage("plan", recorder.stage("plan", lambda demand, stock: stock - demand), deps=("demand", "stock")),
+        Stage("health", recorder.stage("health", lambda sensors: len(sensors)), inputs=("sensors",)),
+    ], volatile_sources=volatile_sources)
+
+
+def _sources(orders=(1, 2), stock=(10,), sensors=(1, 2, 3)):
+    return {
+        "orders": pd.DataFrame({"qty": list(orders)}),
+        "stock": pd.DataFrame({"qty": list(stock)}),
+        "sensors": pd.DataFrame({"value": list(sensors)}),
+    }
+
+
+def test_unchanged_watermark_reuses_stage_output():
+    recorder = _Recorder()
+    p = _pipeline(recorder)
+    watermarks = {"orders": 1, "stock": 1}
+
+    first = p.run(["plan"], _sources(), watermarks)
+    # 新讀取的物件，但 watermark 相同：不重算
+    second = p.run(["plan"], _sources(), watermarks)
+
+    assert first["plan"] == second["plan"] == 7
+    assert recorder.calls == ["demand", "stock", "plan"]
+    assert p.stats()["plan"]["hits"] == 1
+
+
+def test_changed_input_reruns_only_downstream_stages():
+    recorder = _Recorder()
+    p = _pipeline(recorder)
+
+    p.run(["plan"], _sources(), {"orders": 1, "stock": 1})
+    recorder.calls.clear()
+
+    outputs = p.run(["plan"], _sources(orders=(1, 2, 3)), {"orders": 2, "stock": 1})
+
+    assert outputs["plan"] == 4
+    assert recorder.calls == ["demand", "plan"]
+
+
+def test_missing_watermark_falls_back_to_content_hash():
+    recorder = _Recorder()
+    p = _pipeline(recorder)
+
+    p.run(["demand"], _sources())
+    p.run(["demand"], _sources())
+    p.run(["demand"], _sources(orders=(5,)))
+
+    assert recorder.calls == ["demand", "demand"]
+
+
+def test_volatile_sources_are_never_hashed(monkeypatch):
+    recorder = _Recorder()
+    p = _pipeline(recorder, volatile_sources=("sensors",))
+    hashed = []
+    content_hash = pipeline.content_hash
+
+    def counting_hash(value):
+        hashed.append(value)
+        return content_hash(value)
+
+    monkeypatch.setattr(pipeline, "content_hash", counting_hash)
+
+    sources = _sources()
+    p.run(["health"], sources)
+    # 同一個物件沿用上次的 key
+    p.run(["health"], sources)
+    # 內容相同的新物件仍視為新資料
+    p.run(["health"], _sources())
+
+    assert hashed == []
+    assert recorder.calls == ["health", "health"]
+
+
+def test_daily_stage_reruns_when_the_date_changes(monkeypatch):
+    class _Today:
+        value = date(2024, 5, 1)
+
+        @classmethod
+        def today(cls):
+            return cls.value
+
+    monkeypatch.setattr(pipeline, "date", _Today)
+    recorder = _Recorder()
+    p = Pipeline([
+        Stage("forecast", recorder.stage("forecast", lambda orders: len(orders)), inputs=("orders",), daily=True),
+        Stage("static", recorder.stage("static", lambda orders: len(orders)), inputs=("orders",)),
+    ])
+    watermarks = {"orders": 1}
+
+    p.run(["forecast", "static"], _sources(), watermarks)
+    p.run(["forecast", "static"], _sources(), watermarks)
+    _Today.value = date(2024, 5, 2)
+    p.run(["forecast", "static"], _sources(), watermarks)
+
+    assert recorder.calls == ["forecast", "static", "forecast"]
+
+
+def test_invalidate_forces_a_rerun_and_rejects_unknown_stages():
+    recorder = _Recorder()
+    p = _pipeline(recorder)
+    watermarks = {"orders": 1, "stock": 1}
+
+    p.run(["plan"], _sources(), watermarks)
+    p.invalidate("plan")
+    p.run(["plan"], _sources(), watermarks)
+
+    assert recorder.calls == ["demand", "stock", "plan", "plan"]
+    with pytest.raises(ValueError):
+        p.invalidate("missing")
+
+
+def test_stage_must_declare_upstream_first():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("plan", lambda demand: demand, deps=("demand",))])
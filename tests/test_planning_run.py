@@ -0,0 +1,277 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import dashboard_sources, generate_dataset
+import repositories.planning_repository as planning_repository
+from repositories.planning_repository import (
+    FORECAST_SCHEMA,
+    PART_RISK_SCHEMA,
+    PO_SUMMARY_SCHEMA,
+    SIM_COLUMNS,
+)
+from repositories.query_cache import query_cache
+from services.dashboard_service import DASHBOARD_PIPELINE, PLAN_INPUTS, build_plan_section
+from services.data_loader import LoadResult
+import services.planning_run as planning_run
+
+
+def _inputs(seed=1):
+    dataset = generate_dataset(
+        products=3, parts=6, bom_fanout=2, order_lines_per_day=5, machines=2, iot_rows_per_machine=5, seed=seed
+    )
+    inputs = LoadResult()
+    inputs.data = dashboard_sources(dataset)
+    for name in PLAN_INPUTS:
+        inputs.watermarks[name] = (name, seed)
+        inputs.changed[name] = True
+    return inputs
+
+
+class _CopyCursor:
+    """
+    記錄 COPY ... FROM STDIN 的 CSV 內容；SELECT 回傳預先放入的 rows。
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        if "RETURNING run_id" in sql:
+            self.rows = [(self.conn.run_id,)]
+        else:
+            self.rows = list(self.conn.select_rows)
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+    def fetchmany(self, n):
+        out, self.rows = self.rows[:n], self.rows[n:]
+        return out
+
+    def copy_expert(self, sql, buf):
+        table = sql.split()[1]
+        columns = sql[sql.index("(") + 1:sql.index(")")].split(", ")
+        self.conn.copies[table] = (columns, buf.read())
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _CopyConnection:
+    def __init__(self, run_id=1):
+        self.run_id = run_id
+        self.copies = {}
+        self.select_rows = []
+
+    def cursor(self, *args, **kwargs):
+        return _CopyCursor(self)
+
+    def commit(self):
+        pass
+
+
+def _copied_frame(conn, table, schema):
+    columns, data = conn.copies[table]
+    df = pd.read_csv(io.StringIO(data), names=columns, header=None)
+    for name, kind in schema:
+        if kind == "date":
+            df[name] = pd.to_datetime(df[name]).dt.date
+    return df
+
+
+def test_insert_planning_run_writes_schema_columns_and_reads_them_back():
+    inputs = _inputs()
+    outputs = DASHBOARD_PIPELINE.run(["summaries", "bom_explode"], inputs.data, inputs.watermarks)
+    sim = outputs["mrp"]
+    po_summary = outputs["summaries"]["po_summary"]
+    forecast = outputs["bom_explode"]["forecast_base"][planning_run.FORECAST_COLUMNS]
+
+    conn = _CopyConnection(run_id=42)
+    run_id = planning_repository.insert_planning_run(conn, pd.Timestamp.now(), "v", sim, po_summary, forecast, 0.1)
+
+    assert run_id == 42
+    sim_columns, _ = conn.copies["planning_run_sim"]
+    assert tuple(sim_columns) == ("run_id",) + SIM_COLUMNS
+    assert set(sim.columns) == set(SIM_COLUMNS)
+
+    # 讀取端以相同的 schema 解碼寫入的內容
+    for table, schema, reader, frame in (
+        ("planning_run_po_summary", PO_SUMMARY_SCHEMA, planning_repository.get_run_po_summary_df, po_summary),
+        ("planning_run_forecast", FORECAST_SCHEMA, planning_repository.get_run_forecast_df, forecast),
+    ):
+        copied = _copied_frame(conn, table, schema)
+        assert (copied["run_id"] == 42).all()
+        names = [name for name, _ in schema]
+        conn.select_rows = list(copied[names].itertuples(index=False, name=None))
+
+        result = reader(conn, 42)
+
+        assert list(result.columns) == names
+        assert len(result) == len(frame)
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True),
+            frame[names].reset_index(drop=True),
+            check_dtype=False,
+            check_exact=False,
+        )
+
+    assert [name for name, _ in PART_RISK_SCHEMA] == list(outputs["summaries"]["part_risk_summary"].columns)
+
+
+class _FakeRuns:
+    """
+    以記憶體模擬 planning_runs 的最新一筆與寫入動作。
+    """
+
+    def __init__(self, latest=None):
+        self.latest = latest
+        self.inserted = []
+        self.failed = []
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield _CopyConnection()
+
+    def install(self, monkeypatch, inputs):
+        monkeypatch.setattr(planning_run, "load_dashboard_inputs", lambda names: inputs)
+        monkeypatch.setattr(planning_run, "pg_connection", self.connection)
+        monkeypatch.setattr(planning_run, "get_latest_planning_run", lambda conn: self.latest)
+        monkeypatch.setattr(planning_run, "insert_planning_run", self.insert)
+        monkeypatch.setattr(planning_run, "insert_failed_planning_run", self.insert_failed)
+        monkeypatch.setattr(planning_run, "prune_planning_runs", lambda conn, keep: 0)
+
+    def insert(self, conn, started_at, input_version, sim, po_summary, forecast, duration_seconds):
+        self.inserted.append(input_version)
+        return len(self.inserted) + 100
+
+    def insert_failed(self, conn, started_at, input_version, error, duration_seconds):
+        self.failed.append(error)
+
+
+def test_unchanged_input_version_skips_unless_forced(monkeypatch):
+    inputs = _inputs()
+    input_version = repr(inputs.version(*PLAN_INPUTS))
+    runs = _FakeRuns(latest={"run_id": 7, "input_version": input_version})
+    runs.install(monkeypatch, inputs)
+
+    assert planning_run.execute_planning_run() == {"status": "skipped", "run_id": 7}
+    assert runs.inserted == []
+
+    result = planning_run.execute_planning_run(force=True)
+
+    assert result["status"] == "completed"
+    assert result["run_id"] == 101
+    assert runs.inserted == [input_version]
+
+
+def test_changed_input_version_runs(monkeypatch):
+    runs = _FakeRuns(latest={"run_id": 7, "input_version": "older"})
+    runs.install(monkeypatch, _inputs())
+
+    assert planning_run.execute_planning_run()["status"] == "completed"
+    assert len(runs.inserted) == 1
+
+
+def test_unreachable_postgres_reports_a_failed_run(monkeypatch):
+    runs = _FakeRuns()
+    runs.install(monkeypatch, _inputs())
+
+    def unavailable():
+        raise ConnectionError("postgres is down")
+
+    monkeypatch.setattr(planning_run, "pg_connection", unavailable)
+
+    result = planning_run.execute_planning_run()
+
+    assert result == {"status": "failed", "error": "ConnectionError: postgres is down"}
+
+
+def test_failed_skip_check_is_recorded_as_a_failed_run(monkeypatch):
+    runs = _FakeRuns()
+    runs.install(monkeypatch, _inputs())
+
+    def timeout(conn):
+        raise TimeoutError("statement timeout")
+
+    monkeypatch.setattr(planning_run, "get_latest_planning_run", timeout)
+
+    assert planning_run.execute_planning_run()["status"] == "failed"
+    assert runs.failed == ["TimeoutError: statement timeout"]
+    assert runs.inserted == []
+
+
+def test_scheduler_keeps_running_after_a_crash(monkeypatch):
+    calls = []
+
+    def crash(force=False):
+        calls.append(force)
+        raise RuntimeError("boom")
+
+    class Stop(BaseException):
+        pass
+
+    def sleep(seconds):
+        if len(calls) >= 2:
+            raise Stop()
+
+    monkeypatch.setattr(planning_run, "execute_planning_run", crash)
+    monkeypatch.setattr(planning_run.time, "sleep", sleep)
+
+    with pytest.raises(Stop):
+        planning_run.run_scheduler(interval_seconds=0, force=True)
+
+    assert calls == [True, False]
+
+
+def test_load_plan_from_run_matches_build_plan_section(monkeypatch):
+    inputs = _inputs(seed=2)
+    outputs = DASHBOARD_PIPELINE.run(["summaries", "bom_explode"], inputs.data, inputs.watermarks)
+    run = {
+        "run_id": 9,
+        "started_at": pd.Timestamp("2024-05-01 08:00:00"),
+        "finished_at": pd.Timestamp("2024-05-01 08:00:05"),
+        "input_version": "v",
+        "sim_rows": len(outputs["mrp"]),
+        "po_rows": len(outputs["summaries"]["po_summary"]),
+        "duration_seconds": 5.0,
+    }
+    runs = _FakeRuns(latest=run)
+    runs.install(monkeypatch, inputs)
+    monkeypatch.setattr(planning_run, "get_run_part_risk_df", lambda conn, run_id: outputs["summaries"]["part_risk_summary"])
+    monkeypatch.setattr(planning_run, "get_run_po_summary_df", lambda conn, run_id: outputs["summaries"]["po_summary"])
+    monkeypatch.setattr(
+        planning_run, "get_run_forecast_df",
+        lambda conn, run_id: outputs["bom_explode"]["forecast_base"][planning_run.FORECAST_COLUMNS],
+    )
+    query_cache.invalidate("planning_run")
+
+    section = build_plan_section(inputs)
+    plan = planning_run.load_plan_from_run()
+
+    assert set(plan) - {"planning_run"} == set(section)
+    assert plan["kpi"] == section["kpi"]
+    assert plan["updated_at"] == "2024-05-01 08:00:05"
+    assert plan["data_changed"] == {"planning_run": True}
+    assert plan["planning_run"]["run_id"] == 9
+
+    assert planning_run.load_plan_from_run()["data_changed"] == {"planning_run": False}
+    query_cache.invalidate("planning_run")
+
+
+def test_load_plan_without_completed_run_is_an_error(monkeypatch):
+    _FakeRuns(latest=None).install(monkeypatch, _inputs())
+
+    plan = planning_run.load_plan_from_run()
+
+    assert set(plan) == {"error"}
+    assert "planning run" in plan["error"]
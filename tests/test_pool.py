@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+
+import db.pool
+from db.pool import ConnectionPool, PoolTimeout
+
+
+class _FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        self.pings = 0
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeDriver:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.opened = []
+
+    def connect(self):
+        if self.fail:
+            raise ConnectionError("database is down")
+        conn = _FakeConnection(len(self.opened) + 1)
+        self.opened.append(conn)
+        return conn
+
+    def ping(self, conn):
+        conn.pings += 1
+        if not conn.alive:
+            raise ConnectionError("server has gone away")
+
+    def reset(self, conn):
+        pass
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _pool(driver, **kwargs):
+    return ConnectionPool("test", connect=driver.connect, health_check=driver.ping, reset=driver.reset, **kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(db.pool, "time", clock)
+    return clock
+
+
+def test_prefill_opens_min_size_connections():
+    driver = _FakeDriver()
+    pool = _pool(driver, min_size=3, max_size=5)
+
+    assert len(driver.opened) == 3
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"], stats["created"]) == (3, 3, 0, 3)
+
+    with pool.connection() as conn:
+        assert conn in driver.opened
+    assert len(driver.opened) == 3
+
+
+def test_prefill_failure_falls_back_to_on_demand():
+    driver = _FakeDriver(fail=True)
+    pool = _pool(driver, min_size=2, max_size=5)
+
+    assert pool.stats()["size"] == 0
+
+    driver.fail = False
+    with pool.connection():
+        pass
+    assert pool.stats()["created"] == 1
+
+
+def test_checkout_blocks_at_max_size_and_times_out():
+    pool = _pool(_FakeDriver(), min_size=0, max_size=1, checkout_timeout=0.05)
+    conn = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["utilization"] == 1.0
+
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_waiter_gets_the_released_connection():
+    pool = _pool(_FakeDriver(), min_size=0, max_size=1, checkout_timeout=5)
+    conn = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert acquired == []
+
+    pool.release(conn)
+    waiter.join(timeout=5)
+
+    assert acquired == [conn]
+    assert pool.stats()["waits"] == 1
+
+
+def test_health_check_only_after_idle(clock):
+    driver = _FakeDriver()
+    pool = _pool(driver, min_size=1, max_size=2, ping_after_idle_seconds=30)
+    first = driver.opened[0]
+
+    with pool.connection():
+        pass
+    assert first.pings == 0
+
+    clock.now += 31
+    with pool.connection() as conn:
+        assert conn is first
+    assert first.pings == 1
+
+    # health check 失敗的連線被丟棄，改借出新連線
+    clock.now += 31
+    first.alive = False
+    with pool.connection() as conn:
+        assert conn is not first
+    assert first.closed
+    stats = pool.stats()
+    assert stats["health_check_failures"] == 1
+    assert stats["closed"] == 1
+
+
+def test_expired_connection_is_closed_on_release(clock):
+    driver = _FakeDriver()
+    pool = _pool(driver, min_size=0, max_size=2, max_lifetime_seconds=60)
+
+    conn = pool.acquire()
+    clock.now += 61
+    pool.release(conn)
+
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_idle_eviction_keeps_min_size(clock):
+    driver = _FakeDriver()
+    pool = _pool(driver, min_size=1, max_size=3, max_idle_seconds=300, max_lifetime_seconds=10000)
+    conns = [pool.acquire() for _ in range(3)]
+    for conn in conns:
+        pool.release(conn)
+
+    clock.now += 301
+    with pool.connection():
+        pass
+
+    closed = [conn for conn in conns if conn.closed]
+    assert len(closed) == 2
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["closed"]) == (1, 1, 2)
+
+
+def test_stats_counts_checkouts_and_rejects_foreign_connections():
+    driver = _FakeDriver()
+    pool = _pool(driver, min_size=0, max_size=2)
+
+    for _ in range(3):
+        with pool.connection():
+            pass
+    conn = pool.acquire()
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 4
+    assert stats["in_use"] == 1
+    assert stats["size"] == 1
+    assert stats["created"] == 1
+    assert stats["waits"] == 0
+
+    with pytest.raises(ValueError):
+        pool.release(_FakeConnection(99))
+    pool.release(conn, discard=True)
+    assert pool.stats()["closed"] == 1
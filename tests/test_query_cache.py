@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+import repositories.query_cache
+from repositories.query_cache import QueryCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(repositories.query_cache, "time", clock)
+    return clock
+
+
+def _loader(calls, value="rows"):
+    def load():
+        calls.append(value)
+        return value
+    return load
+
+
+def test_concurrent_callers_share_one_load():
+    cache = QueryCache(max_entries=4)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "rows"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.fetch("bom", 60, slow_load)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert sorted(results, key=lambda r: r[1]) == [("rows", False)] * 7 + [("rows", True)]
+
+
+def test_ttl_expiry_reloads(clock):
+    cache = QueryCache(max_entries=4)
+    calls = []
+
+    assert cache.fetch("parts", 60, _loader(calls)) == ("rows", True)
+    clock.now += 59
+    assert cache.fetch("parts", 60, _loader(calls)) == ("rows", False)
+    clock.now += 2
+    assert cache.fetch("parts", 60, _loader(calls)) == ("rows", True)
+
+    assert len(calls) == 2
+
+
+def test_watermark_change_reloads(clock):
+    cache = QueryCache(max_entries=4)
+    calls = []
+
+    cache.fetch("bom", 60, _loader(calls, "v1"), watermark=(1, 10))
+    assert cache.fetch("bom", 60, _loader(calls, "v1"), watermark=(1, 10)) == ("v1", False)
+    assert cache.fetch("bom", 60, _loader(calls, "v2"), watermark=(2, 11)) == ("v2", True)
+
+    assert calls == ["v1", "v2"]
+    assert cache.stats()["keys"]["bom"]["watermark"] == "(2, 11)"
+
+
+def test_lru_eviction_honours_max_entries():
+    cache = QueryCache(max_entries=2)
+    calls = []
+
+    cache.fetch("a", 60, _loader(calls, "a"))
+    cache.fetch("b", 60, _loader(calls, "b"))
+    # 讀取 a 讓 b 成為最久未使用
+    cache.fetch("a", 60, _loader(calls, "a"))
+    cache.fetch("c", 60, _loader(calls, "c"))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["keys"]["b"]["evictions"] == 1
+    assert cache.fetch("a", 60, _loader(calls, "a"))[1] is False
+    assert cache.fetch("b", 60, _loader(calls, "b"))[1] is True
+
+
+def test_loader_exception_is_not_cached():
+    cache = QueryCache(max_entries=2)
+
+    def fail():
+        raise ConnectionError("mysql is down")
+
+    with pytest.raises(ConnectionError):
+        cache.fetch("parts", 60, fail)
+
+    assert cache.stats()["entries"] == 0
+    assert cache.fetch("parts", 60, lambda: "rows") == ("rows", True)
+
+
+def test_invalidate_drops_selected_keys():
+    cache = QueryCache(max_entries=4)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+
+    assert cache.invalidate("a", "missing") == ["a"]
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, 2)
@@ -0,0 +1,126 @@
+import json
+
+from flask import Flask, Response, request
+import pytest
+
+import routes.responses as responses
+from routes.responses import VOLATILE_KEYS, _Rendered, _serialize, build_response, render_snapshot
+
+
+app = Flask(__name__)
+
+
+def _payload(**overrides):
+    payload = {
+        "kpi": {"risk_count": 3},
+        "po_chart": {"labels": ["PART-A"] * 200, "values": [1.5] * 200},
+        "updated_at": "2024-05-01 08:00:00",
+        "snapshot": {"plan": {"generated_at": 1.0}},
+        "data_changed": {"bom": True},
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_etag_ignores_volatile_keys():
+    body, etag = _serialize(_payload(), columnar=False)
+    refreshed_body, refreshed_etag = _serialize(_payload(
+        updated_at="2024-05-01 08:05:00",
+        snapshot={"plan": {"generated_at": 2.0}},
+        data_changed={"bom": False},
+    ), columnar=False)
+
+    assert set(VOLATILE_KEYS) == {"updated_at", "snapshot", "data_changed"}
+    assert refreshed_etag == etag
+    assert refreshed_body != body
+    # volatile 欄位仍在 body 裡
+    assert json.loads(refreshed_body) == _payload(
+        updated_at="2024-05-01 08:05:00",
+        snapshot={"plan": {"generated_at": 2.0}},
+        data_changed={"bom": False},
+    )
+
+    _, changed_etag = _serialize(_payload(kpi={"risk_count": 4}), columnar=False)
+    assert changed_etag != etag
+
+
+def test_etag_of_payload_with_only_volatile_keys():
+    body, etag = _serialize({"updated_at": "now"}, columnar=False)
+
+    assert json.loads(body) == {"updated_at": "now"}
+    assert etag == _serialize({"updated_at": "later"}, columnar=False)[1]
+
+
+def _respond(rendered, headers):
+    with app.test_request_context("/api/dashboard", headers=headers):
+        return build_response(rendered, True, request, Response)
+
+
+@pytest.mark.parametrize("if_none_match, accept_encoding", [
+    ('"abc"', ""),
+    ('"abc-gzip"', "gzip"),
+    ('W/"abc-gzip"', "gzip"),
+    ('W/"abc-br"', "br"),
+    ('W/"abc"', "gzip"),
+    ('"other", "abc"', ""),
+])
+def test_if_none_match_returns_304(monkeypatch, if_none_match, accept_encoding):
+    monkeypatch.setattr(responses, "brotli", type("brotli", (), {"compress": staticmethod(lambda body, quality: body[::-1])}))
+    rendered = _Rendered(b"x" * 4096, "abc")
+
+    response = _respond(rendered, {"If-None-Match": if_none_match, "Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_etag_mismatch_returns_body():
+    rendered = _Rendered(b"x" * 4096, "abc")
+
+    response = _respond(rendered, {"If-None-Match": '"stale"', "Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"abc-gzip"'
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+class _Snapshot:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def get(self):
+        return self.value, {"generated_at": 1.0, "age_seconds": 0.0, "stale": False}
+
+
+def test_snapshot_is_serialized_once_across_requests(monkeypatch):
+    builds = []
+    dumps_calls = []
+    dumps = responses.dumps
+
+    def build(plan):
+        builds.append(plan)
+        return {"kpi": plan, "updated_at": "now"}
+
+    def counting_dumps(payload):
+        dumps_calls.append(payload)
+        return dumps(payload)
+
+    monkeypatch.setattr(responses, "dumps", counting_dumps)
+    snapshot = _Snapshot("plan", {"risk_count": 3})
+
+    first, first_hit, _ = render_snapshot("test_serialize_once", [snapshot], build)
+    serialized = len(dumps_calls)
+    second, second_hit, _ = render_snapshot("test_serialize_once", [snapshot], build)
+
+    assert (first_hit, second_hit) == (False, True)
+    assert second is first
+    assert len(builds) == 1
+    # 內容與 volatile 欄位各序列化一次，重複的請求不再序列化
+    assert serialized == 2
+    assert len(dumps_calls) == serialized
+
+    snapshot.value = {"risk_count": 4}
+    third, third_hit, _ = render_snapshot("test_serialize_once", [snapshot], build)
+    assert third_hit is False
+    assert third.etag != first.etag
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from services.shared_snapshot import HEADER, HEADER_SIZE, LeaderElection, SharedSnapshotStore, SnapshotTooLarge
+
+
+def test_publish_and_load_between_stores(tmp_path):
+    path = str(tmp_path / "snapshot.mmap")
+    writer = SharedSnapshotStore(path, 4096)
+    # 另一個 worker 以自己的 mmap 開啟同一個檔案
+    reader = SharedSnapshotStore(path, 4096)
+
+    assert reader.load() == (0, None, 0.0)
+
+    writer.publish({"kpi": {"risk_count": 3}}, 1714550400.0)
+    seq, value, generated_at = reader.load()
+
+    assert seq == 2
+    assert value == {"kpi": {"risk_count": 3}}
+    assert generated_at == 1714550400.0
+    # 序號沒變時不反序列化
+    assert reader.load(known_seq=seq) == (seq, None, 1714550400.0)
+    assert reader.stats()["loads"] == 1
+
+
+def _begin_write(store, garbage):
+    """
+    模擬寫到一半的 writer：序號為奇數，資料區只寫了一部分。
+    """
+    seq, length, generated_at, last_access = HEADER.unpack_from(store._mm, 0)
+    HEADER.pack_into(store._mm, 0, seq + 1, length, generated_at, last_access)
+    store._mm[HEADER_SIZE:HEADER_SIZE + len(garbage)] = garbage
+    return seq + 1
+
+
+def test_reader_never_returns_a_torn_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.mmap")
+    writer = SharedSnapshotStore(path, 4096)
+    reader = SharedSnapshotStore(path, 4096)
+    writer.publish(["complete", 1], 1.0)
+
+    _begin_write(writer, b"\x80\x05torn")
+
+    with pytest.raises(TimeoutError):
+        reader.load(attempts=5)
+    assert reader.stats()["retries"] == 5
+    assert reader.stats()["loads"] == 0
+
+
+def test_reader_waits_for_the_writer_to_finish(tmp_path):
+    path = str(tmp_path / "snapshot.mmap")
+    writer = SharedSnapshotStore(path, 4096)
+    reader = SharedSnapshotStore(path, 4096)
+    writer.publish(["complete", 1], 1.0)
+    _begin_write(writer, b"\x80\x05torn")
+
+    def finish():
+        time.sleep(0.02)
+        # publish 會沿用奇數序號完成這次寫入
+        writer.publish(["complete", 2], 2.0)
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    seq, value, generated_at = reader.load()
+    thread.join()
+
+    assert seq % 2 == 0
+    assert value == ["complete", 2]
+    assert generated_at == 2.0
+    assert reader.stats()["retries"] > 0
+
+
+def test_reader_retries_when_the_sequence_changes_while_copying(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.mmap")
+    store = SharedSnapshotStore(path, 4096)
+    store.publish("first", 1.0)
+    seq = store.seq()
+
+    changed = iter([seq + 2])
+    original_seq = store.seq
+    monkeypatch.setattr(store, "seq", lambda: next(changed, None) or original_seq())
+
+    assert store.load()[1] == "first"
+    assert store.retries == 1
+
+
+def test_publish_rejects_values_larger_than_capacity(tmp_path):
+    store = SharedSnapshotStore(str(tmp_path / "snapshot.mmap"), 64)
+
+    with pytest.raises(SnapshotTooLarge):
+        store.publish("x" * 1000, 1.0)
+    assert store.seq() == 0
+
+
+def test_only_one_election_holds_the_lock(tmp_path):
+    lock_path = str(tmp_path / "leader.lock")
+    elected = []
+    first = LeaderElection(lock_path, 0.01, lambda: elected.append("first"))
+    second = LeaderElection(lock_path, 0.01, lambda: elected.append("second"))
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.try_acquire()
+    assert elected == ["first"]
+
+    # leader 結束時 OS 釋放 lock
+    os.close(first._fd)
+    first._fd = None
+
+    assert second.try_acquire()
+    assert elected == ["first", "second"]
+    os.close(second._fd)
+
+
+def test_lock_held_by_another_process_blocks_election(tmp_path):
+    lock_path = str(tmp_path / "leader.lock")
+    holder = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import fcntl, os, sys\n"
+            f"fd = os.open({lock_path!r}, os.O_RDWR | os.O_CREAT)\n"
+            "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+            "print('locked', flush=True)\n"
+            "sys.stdin.read()\n"
+        )],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        election = LeaderElection(lock_path, 0.01, lambda: None)
+
+        assert not election.try_acquire()
+    finally:
+        holder.stdin.close()
+        holder.wait(5)
+
+    assert election.try_acquire()
+    assert int(open(lock_path).read()) == os.getpid()
+    os.close(election._fd)
@@ -0,0 +1,123 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from repositories.typed_fetch import empty_frame, fetch_typed, iter_typed_chunks
+
+
+SCHEMA = (
+    ("machine_id", "category"),
+    ("part_no", "str"),
+    ("rpm", "int"),
+    ("temperature", "float"),
+    ("order_date", "date"),
+    ("created_at", "datetime"),
+)
+
+ROWS = [
+    ("M-03", "PART-C", 1500, 70.5, date(2024, 5, 1), datetime(2024, 5, 1, 8, 0, 0)),
+    ("M-01", "PART-A", 1510, 71.0, date(2024, 5, 1), datetime(2024, 5, 1, 8, 0, 1)),
+    ("M-02", "PART-B", 1490, None, date(2024, 5, 2), datetime(2024, 5, 1, 8, 0, 2)),
+    ("M-01", "PART-A", 1505, 72.5, date(2024, 5, 2), datetime(2024, 5, 1, 8, 0, 3)),
+    ("M-10", "PART-D", 1520, 73.0, date(2024, 5, 3), datetime(2024, 5, 1, 8, 0, 4)),
+]
+
+
+class _Cursor:
+    """
+    以 fetchmany 分批回傳 rows，並記錄每次取回的筆數。
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.batches = []
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        self.sql = sql
+        self.params = params
+
+    def fetchmany(self, n):
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        self.batches.append(len(batch))
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class _Connection:
+    def __init__(self, rows):
+        self.cur = _Cursor(rows)
+
+    def cursor(self):
+        return self.cur
+
+
+def test_each_kind_gets_its_dtype():
+    conn = _Connection(ROWS)
+
+    df = fetch_typed(conn, "SELECT * FROM machine_data;", SCHEMA, chunk_size=2, params=(1,))
+
+    assert conn.cur.sql == "SELECT * FROM machine_data"
+    assert conn.cur.params == (1,)
+    assert conn.cur.batches == [2, 2, 1, 0]
+    assert conn.cur.closed
+    # str 欄位交給 pandas 決定字串 dtype（pandas 3 為 str，之前為 object）
+    assert pd.api.types.is_string_dtype(df["part_no"])
+    assert {name: str(dtype) for name, dtype in df.dtypes.items() if name != "part_no"} == {
+        "machine_id": "category",
+        "rpm": "int64",
+        "temperature": "float64",
+        "order_date": "datetime64[ns]",
+        "created_at": "datetime64[ns]",
+    }
+    assert df["rpm"].tolist() == [1500, 1510, 1490, 1505, 1520]
+    assert df["temperature"].isna().tolist() == [False, False, True, False, False]
+    assert df["order_date"].tolist()[2] == pd.Timestamp("2024-05-02")
+    assert df["created_at"].tolist()[4] == pd.Timestamp("2024-05-01 08:00:04")
+
+
+def test_category_codes_are_remapped_to_sorted_categories_across_chunks():
+    rows = [row[:1] for row in ROWS] + [(None,)]
+
+    df = fetch_typed(_Connection(rows), "SELECT machine_id", SCHEMA[:1], chunk_size=2)
+
+    categories = df["machine_id"].cat.categories.tolist()
+    assert categories == sorted(categories) == ["M-01", "M-02", "M-03", "M-10"]
+    assert df["machine_id"].tolist()[:5] == [row[0] for row in ROWS]
+    assert pd.isna(df["machine_id"].tolist()[5])
+    # 與字串欄位排序的結果一致
+    assert df.sort_values("machine_id")["machine_id"].astype(str).tolist()[:5] == sorted(row[0] for row in ROWS)
+
+
+def test_int_column_with_null_becomes_nullable():
+    df = fetch_typed(_Connection([(1,), (None,), (3,)]), "SELECT product_id", (("product_id", "int"),), chunk_size=2)
+
+    assert str(df["product_id"].dtype) == "Int64"
+    assert df["product_id"].isna().tolist() == [False, True, False]
+
+
+def test_empty_results_keep_the_schema_dtypes():
+    df = fetch_typed(_Connection([]), "SELECT * FROM machine_data", SCHEMA)
+    expected = empty_frame(SCHEMA)
+
+    assert len(df) == 0
+    assert list(df.columns) == [name for name, _ in SCHEMA]
+    pd.testing.assert_series_equal(df.dtypes, expected.dtypes)
+    assert str(df["rpm"].dtype) == "int64"
+    assert str(df["created_at"].dtype) == "datetime64[ns]"
+
+
+def test_iter_typed_chunks_yields_typed_frames():
+    chunks = list(iter_typed_chunks(_Connection(ROWS), "SELECT * FROM machine_data", SCHEMA, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(str(chunk["rpm"].dtype) == "int64" for chunk in chunks)
+    assert pd.concat(chunks, ignore_index=True)["part_no"].tolist() == [row[1] for row in ROWS]
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        empty_frame((("flag", "bool"),))